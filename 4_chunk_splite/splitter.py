@@ -1,8 +1,16 @@
+import sys
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
+import tiktoken
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import CharacterTextSplitter
 
+# 수집 Lambda와 같은 머리말/꼬리말 제거 로직 사용
+sys.path.append(str(Path(__file__).resolve().parent.parent / "6_RAG_pipeline"))
+from common.boilerplate import BoilerplateFilter
+
 st.set_page_config(page_title="RAG 문서 분석기", page_icon="📄", layout="wide")
 
 # 사이드바 설정
@@ -11,6 +19,9 @@ with st.sidebar:
     chunk_size = st.slider("청크 사이즈", 100, 1000, 500, 50)
     chunk_overlap = st.slider("오버랩 크기", 0, 200, 100, 10)
     separator = st.text_input("구분자", value="\n")
+    strip_boilerplate = st.checkbox("머리말/꼬리말 제거", value=True)
+    edge_lines = st.slider("검사할 가장자리 줄 수", 1, 5, 3, 1)
+    min_ratio = st.slider("반복 페이지 비율", 0.1, 1.0, 0.5, 0.05)
 
 # 메인 로직
 try:
@@ -25,7 +36,18 @@ try:
     # PDF 로딩 및 분할
     pdf_loader = PyPDFLoader("./data/univ-data.pdf")
     pdf = pdf_loader.load()
-    data = pdf_loader.load_and_split(text_splitter=splitter)
+    original = splitter.split_documents(pdf)
+
+    # 페이지 위/아래 반복 줄 제거 후 분할 (제거 전후 비교용으로 원본 분할도 유지)
+    boilerplate = BoilerplateFilter(enabled=strip_boilerplate, edge_lines=edge_lines, min_ratio=min_ratio)
+    boilerplate.fit((i, page.page_content) for i, page in enumerate(pdf))
+    for page in pdf:
+        page.page_content = boilerplate.strip(page.page_content)
+    data = splitter.split_documents(pdf)
+
+    encoding = tiktoken.get_encoding("gpt2")
+    count_tokens = lambda docs: sum(len(encoding.encode(doc.page_content, disallowed_special=())) for doc in docs)
+    boilerplate.record(count_tokens(original), count_tokens(data), len(original), len(data))
 
     # 메트릭 섹션
     st.subheader("스플리터 설정", divider="rainbow")
@@ -34,6 +56,22 @@ try:
     metrics[1].metric("오버랩 범위", chunk_overlap, "토큰", border=True)
     metrics[2].metric("나눠진 데이터 수", len(data), "청크", border=True)
 
+    # 머리말/꼬리말 제거 결과
+    st.subheader("머리말/꼬리말 제거", divider="rainbow")
+    stats = boilerplate.stats
+    strip_metrics = st.columns(3)
+    strip_metrics[0].metric("제거한 줄", stats.lines_removed, f"패턴 {stats.patterns}개", border=True)
+    strip_metrics[1].metric(
+        "토큰 수", stats.tokens_after, f"{stats.tokens_after - stats.tokens_before} ({-stats.token_reduction:.1%})",
+        delta_color="inverse", border=True
+    )
+    strip_metrics[2].metric(
+        "청크 수", stats.chunks_after, stats.chunks_after - stats.chunks_before, delta_color="inverse", border=True
+    )
+    if boilerplate.patterns:
+        with st.expander("반복 줄 패턴"):
+            st.write(boilerplate.patterns)
+
     # 데이터 프리뷰 섹션
     st.subheader("데이터 프리뷰", divider="rainbow")
     preview_cols = st.columns(2)
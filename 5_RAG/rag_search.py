@@ -1,5 +1,7 @@
+import sys
 import boto3
 import streamlit as st
+from pathlib import Path
 from langchain_aws import ChatBedrock
 from langchain_aws import BedrockEmbeddings
 from langchain_community.document_loaders import PyMuPDFLoader
@@ -7,6 +9,10 @@ from langchain.text_splitter import CharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 import chromadb
 
+# 6_RAG_pipeline/common 의 문서 임베딩 저장소 사용 (수집 Lambda, 8_evaluation과 공유)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "6_RAG_pipeline"))
+from common.embedding_store import EmbeddingStore, StoreBackedEmbeddings
+
 # 사이드바 자동 숨김 설정
 st.set_page_config(initial_sidebar_state="collapsed")
 st.title("🔍 학사 정보 검색 시스템")
@@ -22,7 +28,10 @@ def init_bedrock():
         model_id="anthropic.claude-3-haiku-20240307-v1:0",
         model_kwargs={"anthropic_version": "bedrock-2023-05-31"},
     )
-    embeddings = BedrockEmbeddings(region_name="us-east-1")
+    # 이미 임베딩한 청크는 저장소에서 읽고 새 청크만 Bedrock 호출 (EMBED_STORE_PATH)
+    embeddings = StoreBackedEmbeddings(
+        BedrockEmbeddings(region_name="us-east-1"), EmbeddingStore.from_env()
+    )
     return bedrock, embeddings
 
 
@@ -1,4 +1,12 @@
+import sys
 import psycopg2
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+from common.indexes import create_vector_index
+from common.corpus import CREATE_CORPUS_VERSION_SQL
+from common.lexical import create_lexical_index
+from common.vector_table import CREATE_VECTOR_TABLE_SQL
 
 # 연결 정보
 rds_host = ""
@@ -48,6 +56,7 @@ def create_database_and_user(user_index):
                filename TEXT,
                s3_key TEXT UNIQUE,
                chunk_count INTEGER,
+               content_hash TEXT,
                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
            )
         ''')
@@ -55,15 +64,41 @@ def create_database_and_user(user_index):
            CREATE TABLE IF NOT EXISTS documents (
                id SERIAL PRIMARY KEY,
                content TEXT,
-               embedding vector(1536),
                metadata JSONB,
+               content_tsv tsvector,
+               document_file_id INTEGER REFERENCES document_files (id) ON DELETE CASCADE,
+               chunk_hash TEXT,
+               chunk_index INTEGER,
                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
            )
         ''')
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS documents_document_file_id_idx ON documents (document_file_id)"
+        )
+        # 반복 청크의 leader 조회 (common/chunk_dedup.py)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS documents_chunk_hash_idx ON documents (document_file_id, chunk_hash)"
+        )
+        # 벡터는 본문과 분리된 좁은 테이블에 저장 (검색 시 넓은 행을 읽지 않음, common/vector_table.py)
+        cursor.execute(CREATE_VECTOR_TABLE_SQL)
+        # 업로드 중복 확인 (파일 SHA-256)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS document_files_content_hash_idx ON document_files (content_hash)"
+        )
+        # 문서 추가/삭제 시 증가하는 코퍼스 버전 (답변 캐시 무효화용)
+        cursor.execute(CREATE_CORPUS_VERSION_SQL)
         cursor.execute(f"GRANT ALL ON ALL SEQUENCES IN SCHEMA public TO {user_name}")
         
         print(f"Vector extension installed in {db_name}")
     
+    # 벡터 검색용 HNSW 인덱스 (빈 테이블에서도 생성 가능, 이후 삽입 시 자동 갱신)
+    index_info = create_vector_index(db_conn, method="hnsw")
+    print(f"ANN index {index_info['index']} created in {db_name}")
+    
+    # 하이브리드 검색용 어휘 색인 (GIN)
+    lexical_info = create_lexical_index(db_conn)
+    print(f"Lexical index {lexical_info['index']} created in {db_name}")
+    
     db_conn.close()
 
 # 사용자 및 데이터베이스를 원하는 횟수만큼 생성
@@ -0,0 +1,53 @@
+"""
+문서 임베딩 저장소(common/embedding_store.py) 관리 CLI
+
+사용 예:
+    python manage_embedding_store.py stats
+    python manage_embedding_store.py compact --max-age-days 90
+    python manage_embedding_store.py compact --max-entries 200000 --keep-model amazon.titan-embed-text-v1
+
+저장소 경로는 6_RAG_pipeline/.env 의 EMBED_STORE_PATH 를 사용합니다 (없으면 기본 경로).
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+
+sys.path.append(str(BASE_DIR))
+from common.embedding_store import EmbeddingStore
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="문서 임베딩 저장소 관리")
+    parser.add_argument("action", choices=["stats", "compact"])
+    parser.add_argument("--path", default=None, help="저장소 파일 (기본 EMBED_STORE_PATH)")
+    parser.add_argument("--max-age-days", type=float, default=None,
+                        help="마지막 사용 후 이 기간이 지난 항목 삭제 (compact)")
+    parser.add_argument("--max-entries", type=int, default=None,
+                        help="최근 사용 순으로 남길 최대 항목 수 (compact)")
+    parser.add_argument("--keep-model", action="append", default=None,
+                        help="남길 모델 ID, 여러 번 지정 가능 (compact, 나머지 모델 항목 삭제)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = EmbeddingStore(args.path) if args.path else EmbeddingStore.from_env()
+
+    try:
+        if args.action == "compact":
+            result = store.compact(args.max_age_days, args.max_entries, args.keep_model)
+            result["stats"] = store.stats()
+        else:
+            result = store.stats()
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+document_vectors.embedding ANN 인덱스 관리 CLI
+
+사용 예:
+    python manage_index.py list
+    python manage_index.py build --method hnsw --m 16 --ef-construction 64
+    python manage_index.py build --method ivfflat --lists 200 --concurrently
+    python manage_index.py rebuild --method hnsw --m 32 --ef-construction 128
+    python manage_index.py drop --method ivfflat
+    python manage_index.py lexical --batch-size 500   # content_tsv 컬럼/GIN 인덱스 생성 + 기존 행 채우기
+    python manage_index.py quantize --storage halfvec --concurrently   # 양자화 후보 검색 인덱스 (VECTOR_STORAGE)
+    python manage_index.py dequantize --storage binary
+
+접속 정보는 6_RAG_pipeline/.env 의 DB_HOST, DB_NAME, DB_USER, DB_PASSWORD 를 사용합니다.
+"""
+import sys
+import json
+import argparse
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig
+from common.indexes import (
+    INDEX_METHODS,
+    DEFAULT_HNSW_M,
+    DEFAULT_HNSW_EF_CONSTRUCTION,
+    create_vector_index,
+    rebuild_vector_index,
+    drop_vector_index,
+    list_vector_indexes,
+)
+from common.lexical import create_lexical_index, backfill_lexical
+from common.quantization import create_quantized_index, drop_quantized_index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="pgvector ANN 인덱스 관리")
+    parser.add_argument("action", choices=["list", "build", "rebuild", "drop", "lexical", "quantize", "dequantize"])
+    parser.add_argument("--method", choices=INDEX_METHODS, default="hnsw")
+    parser.add_argument("--storage", choices=["halfvec", "binary"], default="halfvec",
+                        help="양자화 인덱스 종류 (quantize/dequantize)")
+    parser.add_argument("--m", type=int, default=DEFAULT_HNSW_M, help="HNSW 노드당 연결 수")
+    parser.add_argument("--ef-construction", type=int, default=DEFAULT_HNSW_EF_CONSTRUCTION,
+                        help="HNSW 빌드 시 후보 리스트 크기")
+    parser.add_argument("--lists", type=int, default=None,
+                        help="IVFFlat 리스트 수 (생략 시 행 수로 계산)")
+    parser.add_argument("--concurrently", action="store_true",
+                        help="쓰기를 막지 않고 생성 (build)")
+    parser.add_argument("--maintenance-work-mem", default=None, help="예: 1GB")
+    parser.add_argument("--batch-size", type=int, default=500, help="content_tsv 채우기 배치 크기 (lexical)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = psycopg2.connect(**PoolConfig.from_env().connect_kwargs())
+    conn.autocommit = True
+
+    try:
+        if args.action == "list":
+            result = list_vector_indexes(conn)
+        elif args.action == "build":
+            result = create_vector_index(
+                conn, args.method, args.m, args.ef_construction, args.lists,
+                concurrently=args.concurrently,
+                maintenance_work_mem=args.maintenance_work_mem
+            )
+        elif args.action == "rebuild":
+            result = rebuild_vector_index(
+                conn, args.method, args.m, args.ef_construction, args.lists,
+                maintenance_work_mem=args.maintenance_work_mem
+            )
+        elif args.action == "lexical":
+            result = create_lexical_index(conn, concurrently=True)
+            result["backfilled_rows"] = backfill_lexical(conn, args.batch_size)
+        elif args.action == "quantize":
+            result = create_quantized_index(
+                conn, args.storage, args.m, args.ef_construction,
+                concurrently=args.concurrently,
+                maintenance_work_mem=args.maintenance_work_mem
+            )
+        elif args.action == "dequantize":
+            result = drop_quantized_index(conn, args.storage)
+        else:
+            result = drop_vector_index(conn, args.method)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
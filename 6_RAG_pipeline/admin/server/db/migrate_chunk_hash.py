@@ -0,0 +1,90 @@
+"""
+documents.chunk_hash / chunk_index 컬럼 마이그레이션 (증분 재수집, common/incremental.py)
+
+기존 청크도 재수집 시 내용 해시로 벡터를 재사용할 수 있도록 chunk_hash를 채웁니다.
+서비스 중에도 실행할 수 있도록 잠금을 짧게 유지합니다.
+
+1. chunk_hash, chunk_index 컬럼 추가 (기본값 없음 → 테이블 재작성 없음)
+2. (document_file_id, chunk_hash) btree 인덱스 CONCURRENTLY 생성 (반복 청크의 leader 조회)
+3. id 순서대로 batch_size씩 chunk_hash 채우기 (이미 채운 행은 건너뜀, 배치마다 커밋)
+
+chunk_index(문서 내 위치)는 기존 행에서 알 수 없으므로 비워 두고, 다음 재수집에서 채워집니다.
+
+사용 예:
+    python migrate_chunk_hash.py --batch-size 1000 --sleep 0.1
+
+접속 정보는 6_RAG_pipeline/.env 의 DB_HOST, DB_NAME, DB_USER, DB_PASSWORD 를 사용합니다.
+"""
+import sys
+import json
+import time
+import argparse
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig
+from common.incremental import BACKFILL_CHUNK_HASH_SQL
+
+INDEX_NAME = "documents_chunk_hash_idx"
+
+
+def add_columns(cursor):
+    cursor.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_hash TEXT")
+    cursor.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_index INTEGER")
+    cursor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON documents (document_file_id, chunk_hash)"
+    )
+
+
+def backfill(cursor, batch_size: int, sleep: float) -> int:
+    """id 구간 단위로 chunk_hash 채움"""
+    cursor.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM documents")
+    low, high = cursor.fetchone()
+    updated = 0
+    started = time.perf_counter()
+    while low <= high:
+        cursor.execute(BACKFILL_CHUNK_HASH_SQL, (low, low + batch_size))
+        updated += cursor.rowcount
+        low += batch_size
+        elapsed = time.perf_counter() - started
+        print(f"backfill: id < {low}, updated {updated} rows ({updated / elapsed if elapsed else 0:.0f} rows/s)")
+        if sleep:
+            time.sleep(sleep)
+    return updated
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="documents.chunk_hash / chunk_index 컬럼 마이그레이션")
+    parser.add_argument("--batch-size", type=int, default=1000, help="배치당 id 구간 크기")
+    parser.add_argument("--sleep", type=float, default=0.0, help="배치 사이 대기 시간(초)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = psycopg2.connect(**PoolConfig.from_env().connect_kwargs())
+    conn.autocommit = True  # CONCURRENTLY 및 배치별 커밋
+
+    try:
+        with conn.cursor() as cursor:
+            add_columns(cursor)
+            updated = backfill(cursor, args.batch_size, args.sleep)
+            cursor.execute("SELECT COUNT(*) FROM documents WHERE chunk_hash IS NULL")
+            missing = cursor.fetchone()[0]
+        print(json.dumps({
+            "columns": ["documents.chunk_hash", "documents.chunk_index"],
+            "index": INDEX_NAME,
+            "backfilled_rows": updated,
+            "rows_without_hash": missing
+        }, ensure_ascii=False, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
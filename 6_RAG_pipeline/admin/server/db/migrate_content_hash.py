@@ -0,0 +1,66 @@
+"""
+document_files.content_hash 컬럼 마이그레이션 (업로드/Lambda 중복 문서 확인)
+
+업로드 API와 Lambda는 파일 SHA-256을 document_files.content_hash 에 기록하고, 같은 내용의 문서가
+이미 있으면 다시 수집하지 않습니다. Lambda가 이 컬럼에 쓰므로 Lambda 배포 전에 실행합니다.
+
+1. content_hash 컬럼 추가 (기본값 없음 → 테이블 재작성 없음)
+2. btree 인덱스 CONCURRENTLY 생성
+
+기존 문서의 해시는 원본 파일이 필요하므로 채우지 않습니다. 해당 문서는 다음 재수집 때 기록되며,
+그 전까지는 같은 파일을 다시 올려도 중복으로 판단하지 않습니다.
+
+사용 예:
+    python migrate_content_hash.py
+
+접속 정보는 6_RAG_pipeline/.env 의 DB_HOST, DB_NAME, DB_USER, DB_PASSWORD 를 사용합니다.
+"""
+import sys
+import json
+import argparse
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig
+
+INDEX_NAME = "document_files_content_hash_idx"
+
+
+def add_column(cursor):
+    cursor.execute("ALTER TABLE document_files ADD COLUMN IF NOT EXISTS content_hash TEXT")
+    cursor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON document_files (content_hash)"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="document_files.content_hash 컬럼 마이그레이션")
+    return parser.parse_args()
+
+
+def main():
+    parse_args()
+    conn = psycopg2.connect(**PoolConfig.from_env().connect_kwargs())
+    conn.autocommit = True  # CONCURRENTLY
+
+    try:
+        with conn.cursor() as cursor:
+            add_column(cursor)
+            cursor.execute("SELECT COUNT(*) FROM document_files WHERE content_hash IS NULL")
+            missing = cursor.fetchone()[0]
+        print(json.dumps({
+            "column": "document_files.content_hash",
+            "index": INDEX_NAME,
+            "files_without_hash": missing
+        }, ensure_ascii=False, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+documents.document_file_id 컬럼 마이그레이션
+
+metadata->>'document_file_id' (JSONB, 인덱스 없음) 를 document_files(id) 를 참조하는
+정수 컬럼(ON DELETE CASCADE, btree 인덱스)으로 옮깁니다. 서비스 중에도 실행할 수 있도록
+잠금을 짧게 유지합니다.
+
+1. 컬럼 추가 (기본값 없음 → 테이블 재작성 없음)
+2. btree 인덱스 CONCURRENTLY 생성
+3. FK를 NOT VALID로 추가 (기존 행 검사 없이 새 쓰기부터 적용)
+4. id 순서대로 batch_size씩 채우기 (배치마다 커밋)
+5. VALIDATE CONSTRAINT (쓰기를 막지 않음)
+6. --delete-orphans: 채우지 못한 행(이미 삭제된 문서를 가리키거나 document_file_id가 없는 청크) 삭제
+
+document_files에 없는 문서를 가리키는 청크는 NULL로 남고, 문서 삭제(CASCADE)로는 지워지지 않습니다.
+먼저 옵션 없이 실행해 rows_without_file 개수를 확인한 뒤 --delete-orphans 로 다시 실행합니다
+(앞 단계는 이미 끝난 부분을 건너뛰므로 반복 실행해도 안전, 벡터 행은 CASCADE로 함께 삭제).
+
+사용 예:
+    python migrate_document_file_id.py --batch-size 1000 --sleep 0.1
+    python migrate_document_file_id.py --delete-orphans
+
+접속 정보는 6_RAG_pipeline/.env 의 DB_HOST, DB_NAME, DB_USER, DB_PASSWORD 를 사용합니다.
+"""
+import sys
+import json
+import time
+import argparse
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig
+
+FK_NAME = "documents_document_file_id_fkey"
+INDEX_NAME = "documents_document_file_id_idx"
+
+
+def add_column_and_constraints(cursor):
+    cursor.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS document_file_id INTEGER")
+    cursor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON documents (document_file_id)"
+    )
+    cursor.execute("SELECT 1 FROM pg_constraint WHERE conname = %s", (FK_NAME,))
+    if not cursor.fetchone():
+        cursor.execute(f"""
+            ALTER TABLE documents ADD CONSTRAINT {FK_NAME}
+            FOREIGN KEY (document_file_id) REFERENCES document_files (id)
+            ON DELETE CASCADE NOT VALID
+        """)
+
+
+def backfill(cursor, batch_size: int, sleep: float) -> int:
+    """id 구간 단위로 채움 (document_files에 없는 id를 가리키는 행은 NULL로 둠)"""
+    cursor.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM documents")
+    low, high = cursor.fetchone()
+    updated = 0
+    started = time.perf_counter()
+    while low <= high:
+        cursor.execute("""
+            UPDATE documents d
+            SET document_file_id = f.id
+            FROM document_files f
+            WHERE d.id >= %s AND d.id < %s
+              AND d.document_file_id IS NULL
+              AND d.metadata->>'document_file_id' ~ '^[0-9]+$'
+              AND f.id = (d.metadata->>'document_file_id')::int
+        """, (low, low + batch_size))
+        updated += cursor.rowcount
+        low += batch_size
+        elapsed = time.perf_counter() - started
+        print(f"backfill: id < {low}, updated {updated} rows ({updated / elapsed if elapsed else 0:.0f} rows/s)")
+        if sleep:
+            time.sleep(sleep)
+    return updated
+
+
+def delete_orphans(cursor, batch_size: int, sleep: float) -> int:
+    """document_file_id가 비어 있는 행을 id 구간 단위로 삭제 (backfill 이후에만 호출)"""
+    cursor.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM documents WHERE document_file_id IS NULL")
+    low, high = cursor.fetchone()
+    deleted = 0
+    while low <= high:
+        cursor.execute(
+            "DELETE FROM documents WHERE id >= %s AND id < %s AND document_file_id IS NULL",
+            (low, low + batch_size)
+        )
+        deleted += cursor.rowcount
+        low += batch_size
+        print(f"delete orphans: id < {low}, deleted {deleted} rows")
+        if sleep:
+            time.sleep(sleep)
+    return deleted
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="documents.document_file_id 컬럼 마이그레이션")
+    parser.add_argument("--batch-size", type=int, default=1000, help="배치당 id 구간 크기")
+    parser.add_argument("--sleep", type=float, default=0.0, help="배치 사이 대기 시간(초)")
+    parser.add_argument("--delete-orphans", action="store_true",
+                        help="document_files에 없는 문서를 가리키는 청크 삭제 (먼저 옵션 없이 개수 확인)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = psycopg2.connect(**PoolConfig.from_env().connect_kwargs())
+    conn.autocommit = True  # CONCURRENTLY 및 배치별 커밋
+
+    try:
+        with conn.cursor() as cursor:
+            add_column_and_constraints(cursor)
+            updated = backfill(cursor, args.batch_size, args.sleep)
+            cursor.execute(f"ALTER TABLE documents VALIDATE CONSTRAINT {FK_NAME}")
+            cursor.execute("SELECT COUNT(*) FROM documents WHERE document_file_id IS NULL")
+            orphans = cursor.fetchone()[0]
+            deleted = delete_orphans(cursor, args.batch_size, args.sleep) if args.delete_orphans and orphans else 0
+        if orphans and not args.delete_orphans:
+            print(f"document_files에 없는 문서를 가리키는 청크 {orphans}개가 남았습니다. "
+                  f"확인 후 --delete-orphans 로 다시 실행해 삭제하세요.")
+        print(json.dumps({
+            "column": "documents.document_file_id",
+            "index": INDEX_NAME,
+            "constraint": FK_NAME,
+            "backfilled_rows": updated,
+            "rows_without_file": orphans,
+            "deleted_orphans": deleted
+        }, ensure_ascii=False, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+documents.embedding → document_vectors 마이그레이션
+
+벡터를 본문(content, metadata, content_tsv)과 같은 힙에서 좁은 테이블
+document_vectors (chunk_id, document_file_id, embedding) 로 옮깁니다 (common/vector_table.py).
+서비스 중에도 실행할 수 있도록 id 구간 단위 배치로 복사합니다.
+
+1. document_vectors 테이블 생성
+2. id 순서대로 batch_size씩 복사 (이미 옮긴 행은 건너뜀, 배치마다 커밋)
+3. document_vectors HNSW 인덱스 CONCURRENTLY 생성
+4. --drop-inline: 모든 행이 옮겨졌는지 확인 후 documents.embedding 컬럼(과 그 인덱스) 삭제
+
+배포 순서:
+    python migrate_vector_table.py                 # 1~3
+    (서버/Lambda 배포 - 새 청크는 document_vectors에 저장)
+    python migrate_vector_table.py --drop-inline   # 배포 전후에 들어온 행까지 복사 후 기존 컬럼 삭제
+
+컬럼을 삭제해도 기존 행의 공간은 행이 다시 쓰일 때까지 남으므로, 점검 시간에 VACUUM FULL documents
+(또는 pg_repack)로 테이블을 다시 쓰면 본문 테이블 크기가 줄어듭니다.
+
+접속 정보는 6_RAG_pipeline/.env 의 DB_HOST, DB_NAME, DB_USER, DB_PASSWORD 를 사용합니다.
+"""
+import sys
+import json
+import time
+import argparse
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig
+from common.indexes import create_vector_index
+from common.vector_table import CREATE_VECTOR_TABLE_SQL, VECTOR_TABLE
+
+
+def has_inline_column(cursor) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'documents' AND column_name = 'embedding'
+    """)
+    return cursor.fetchone() is not None
+
+
+def copy_vectors(cursor, batch_size: int, sleep: float) -> int:
+    """id 구간 단위로 복사 (embedding이 없는 행, 이미 옮긴 행은 건너뜀)"""
+    cursor.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM documents")
+    low, high = cursor.fetchone()
+    copied = 0
+    started = time.perf_counter()
+    while low <= high:
+        cursor.execute(f"""
+            INSERT INTO {VECTOR_TABLE} (chunk_id, document_file_id, embedding)
+            SELECT id, document_file_id, embedding
+            FROM documents
+            WHERE id >= %s AND id < %s AND embedding IS NOT NULL
+            ON CONFLICT (chunk_id) DO NOTHING
+        """, (low, low + batch_size))
+        copied += cursor.rowcount
+        low += batch_size
+        elapsed = time.perf_counter() - started
+        print(f"copy: id < {low}, copied {copied} rows ({copied / elapsed if elapsed else 0:.0f} rows/s)")
+        if sleep:
+            time.sleep(sleep)
+    return copied
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="documents.embedding → document_vectors 마이그레이션")
+    parser.add_argument("--batch-size", type=int, default=1000, help="배치당 id 구간 크기")
+    parser.add_argument("--sleep", type=float, default=0.0, help="배치 사이 대기 시간(초)")
+    parser.add_argument("--maintenance-work-mem", default=None, help="인덱스 빌드용, 예: 1GB")
+    parser.add_argument("--drop-inline", action="store_true",
+                        help="복사 후 documents.embedding 컬럼 삭제 (새 코드 배포 후 실행)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = psycopg2.connect(**PoolConfig.from_env().connect_kwargs())
+    conn.autocommit = True  # CONCURRENTLY 및 배치별 커밋
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_VECTOR_TABLE_SQL)
+            copied = 0
+            dropped = False
+            if has_inline_column(cursor):
+                copied = copy_vectors(cursor, args.batch_size, args.sleep)
+        index = create_vector_index(
+            conn, "hnsw", concurrently=True, maintenance_work_mem=args.maintenance_work_mem
+        )
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM documents d
+                WHERE NOT EXISTS (SELECT 1 FROM {VECTOR_TABLE} v WHERE v.chunk_id = d.id)
+            """)
+            missing = cursor.fetchone()[0]
+            if args.drop_inline and has_inline_column(cursor):
+                if missing:
+                    raise RuntimeError(f"{missing} chunks have no row in {VECTOR_TABLE}; not dropping documents.embedding")
+                cursor.execute("ALTER TABLE documents DROP COLUMN embedding")
+                dropped = True
+        print(json.dumps({
+            "table": VECTOR_TABLE,
+            "index": index["index"],
+            "copied_rows": copied,
+            "chunks_without_vector": missing,
+            "inline_column_dropped": dropped
+        }, ensure_ascii=False, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,70 @@
 import os
-import json
-import tempfile
+import sys
+import time
+import itertools
 import boto3
+from botocore.config import Config
 import psycopg2
 import psycopg2.extras
-from langchain_aws import BedrockEmbeddings
-from langchain_text_splitters import CharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
+import psycopg2.errors
+from pathlib import Path
+from urllib.parse import unquote_plus
+
+# 배포 패키지에 common/ 디렉터리를 함께 넣습니다 (lambda.md 참고)
+# 저장소에서 직접 실행할 때는 6_RAG_pipeline 경로에서 찾습니다
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent.parent))
+from common.lexical import lexical_document
+from common.ingest_pipeline import run_pipeline
+from common.bulk_insert import write_chunks
+from common.incremental import ChunkReconciler, chunk_hash
+from common.chunk_dedup import RunDeduplicator
+from common.boilerplate import BoilerplateFilter
+from common.embedding_store import EmbeddingStore
+from common.pdf_source import open_s3_pdf
+from common.corpus import BUMP_CORPUS_VERSION_SQL, notify_corpus_change
+# LangChain 없이 boto3/tiktoken 직접 사용 (콜드 스타트 단축, common/lean_ingest.py)
+from common.lean_ingest import TitanEmbedder, TokenLineSplitter
+
+EMBED_CONCURRENCY = int(os.environ.get('EMBED_CONCURRENCY', '8'))
 
 s3_client = boto3.client('s3')
-bedrock_client = boto3.client(service_name='bedrock-runtime',region_name='us-east-1')
-embeddings = BedrockEmbeddings(client=bedrock_client, model_id="amazon.titan-embed-text-v1")
+# 스로틀링 재시도는 ConcurrentEmbedder가 동시 실행 한도와 함께 조절하므로 botocore 재시도는 끔
+bedrock_client = boto3.client(
+    service_name='bedrock-runtime',
+    region_name='us-east-1',
+    config=Config(
+        max_pool_connections=EMBED_CONCURRENCY,
+        retries={'max_attempts': 1, 'mode': 'standard'}
+    )
+)
+EMBED_MODEL_ID = "amazon.titan-embed-text-v1"
+embeddings = TitanEmbedder(bedrock_client, EMBED_MODEL_ID)
+# CharacterTextSplitter.from_tiktoken_encoder(chunk_size=500, chunk_overlap=50, separator='\n')와 같은 청크
+splitter = TokenLineSplitter(chunk_size=500, chunk_overlap=50, separator='\n')
+# 문서 임베딩 저장소 (EMBED_STORE_PATH를 EFS 등 영속 경로로 설정한 경우에만 사용)
+embedding_store = EmbeddingStore.from_env(default_path=None)
 
-def lambda_handler(event, context):
+def mark_superseded(bucket_name, key):
+    """새 버전으로 대체된 원본 객체에 superseded=true 태그 추가 (기존 sha256 태그 유지)"""
+    try:
+        tags = s3_client.get_object_tagging(Bucket=bucket_name, Key=key).get('TagSet', [])
+        tags = [tag for tag in tags if tag.get('Key') != 'superseded'] + [{'Key': 'superseded', 'Value': 'true'}]
+        s3_client.put_object_tagging(Bucket=bucket_name, Key=key, Tagging={'TagSet': tags})
+        print(f"이전 버전 정리 대상 표시: {key}")
+    except Exception as e:
+        print(f"이전 버전 태그 실패: {str(e)}")
+
+def process_record(bucket_name, file_key):
+    """
+    S3 객체 하나를 수집하고 결과 요약을 반환 (실패 시 롤백 후 예외를 그대로 raise)
+    
+    Lambda 핸들러와 로컬 수집 워커(local_worker.py)가 함께 사용합니다.
+    """
     DB_HOST = os.environ['DB_HOST']
     DB_NAME = os.environ['DB_NAME']
     DB_USER = os.environ['DB_USER']
     DB_PASSWORD = os.environ['DB_PASSWORD']
     
-    bucket_name = event['Records'][0]['s3']['bucket']['name']
-    file_key = event['Records'][0]['s3']['object']['key']
-    
     filename = file_key.split('_', 1)[1] if '_' in file_key else file_key
     
     print(f"처리 시작 - 버킷: {bucket_name}")
@@ -28,17 +72,11 @@ def lambda_handler(event, context):
     print(f"파일명: {filename}")
     
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            s3_client.download_fileobj(bucket_name, file_key, tmp_file)
-            pdf_path = tmp_file.name
-        
-        pdf_loader = PyPDFLoader(pdf_path)
-        splitter = CharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=500,
-            chunk_overlap=50,
-            separator='\n'
-        )
-        chunks = pdf_loader.load_and_split(text_splitter=splitter)
+        # 임시 파일 없이 메모리에서 파싱 (PARSE_MEMORY_LIMIT 초과 객체만 디스크로 스풀, common/pdf_source.py)
+        # SHA-256은 내려받으면서 계산 (업로드 API가 S3 태그로 붙이는 값과 같음)
+        pdf = open_s3_pdf(s3_client, bucket_name, file_key)
+        content_hash = pdf.sha256
+        print(f"PDF 로드 - {pdf.size} bytes, {pdf.page_count}페이지, {'디스크 스풀' if pdf.spooled else '메모리'}")
         
         conn = psycopg2.connect(
             host=DB_HOST,
@@ -49,57 +87,221 @@ def lambda_handler(event, context):
         cursor = conn.cursor()
         
         print(f"DB 연결 완료")
-        print(f"총 청크 개수: {len(chunks)}")
         
+        # 같은 내용의 파일이 다른 키로 이미 수집되어 있으면 건너뜀 (업로드 API를 거치지 않은 경우 대비)
+        cursor.execute("""
+            SELECT id, s3_key FROM document_files
+            WHERE content_hash = %s AND s3_key <> %s
+            LIMIT 1
+        """, (content_hash, file_key))
+        duplicate = cursor.fetchone()
+        if duplicate:
+            print(f"중복 파일 - 기존 문서 ID {duplicate[0]} ({duplicate[1]}), 수집 생략")
+            return {'key': file_key, 'status': 'duplicate', 'document_file_id': duplicate[0]}
+        
+        # 같은 S3 키(재처리) 또는 업로드 API가 지정한 문서 ID(새 버전)의 기존 문서가 있으면
+        # 그 문서를 갱신 (증분 재수집, common/incremental.py)
+        # 파일명은 서로 다른 문서가 같을 수 있으므로 식별에 쓰지 않음
+        replaces = pdf.metadata.get('document-id')
+        replaces = int(replaces) if replaces and replaces.isdigit() else None
         cursor.execute("""
-            INSERT INTO document_files (filename, s3_key, chunk_count)
-            VALUES (%s, %s, %s)
-            ON CONFLICT(s3_key) DO UPDATE SET chunk_count = EXCLUDED.chunk_count
-            RETURNING id
-        """, (filename, file_key, len(chunks)))
-        
-        document_file_id = cursor.fetchone()[0]
-        print(f"문서 파일 ID 생성: {document_file_id}")
-        
-        successful_chunks = 0
-        
-        for chunk in chunks:
-            cleaned_content = chunk.page_content.encode().decode().replace("\x00", "").strip()
-            
-            if not cleaned_content:
-                continue
-            
-            embedding_vector = embeddings.embed_query(cleaned_content)
-            
-            metadata = {
-                'page': chunk.metadata.get('page', 0) + 1,
-                'filename': filename,
-                's3_key': file_key,
-                'document_file_id': document_file_id
-            }
-            
+            SELECT id, s3_key FROM document_files
+            WHERE s3_key = %s OR id = %s
+            ORDER BY (s3_key = %s) DESC
+            LIMIT 1
+            FOR UPDATE
+        """, (file_key, replaces, file_key))
+        previous = cursor.fetchone()
+        previous_key = None
+        
+        # 청크 수는 수집이 끝난 뒤 갱신 (스트리밍 처리라 미리 알 수 없음)
+        if previous:
+            document_file_id, previous_key = previous
+            cursor.execute("""
+                UPDATE document_files SET s3_key = %s, content_hash = %s WHERE id = %s
+            """, (file_key, content_hash, document_file_id))
+            print(f"기존 문서 갱신: {document_file_id} ({previous_key})")
+        else:
             cursor.execute("""
-                INSERT INTO documents (content, embedding, metadata)
-                VALUES (%s, %s, %s)
-            """, (
-                cleaned_content,
-                embedding_vector,
-                json.dumps(metadata)
-            ))
-            successful_chunks += 1
+                INSERT INTO document_files (filename, s3_key, chunk_count, content_hash)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+            """, (filename, file_key, 0, content_hash))
+            document_file_id = cursor.fetchone()[0]
+            print(f"문서 파일 ID 생성: {document_file_id}")
+        
+        reconciler = ChunkReconciler(document_file_id)
+        reconciler.load(cursor)
+        # 실행 안에서 반복되는 청크(머리말/꼬리말, 공지 등)는 한 번만 임베딩 (DEDUP_MODE, common/chunk_dedup.py)
+        dedup = RunDeduplicator()
+        # 페이지 위/아래 반복 줄(머리말/꼬리말/쪽 번호)은 분할 전에 제거 (BOILERPLATE_STRIP, common/boilerplate.py)
+        # 반복 여부는 문서 전체를 봐야 하므로 표본 페이지(BOILERPLATE_SAMPLE_PAGES)를 먼저 훑음
+        # fit은 가장자리 줄 개수만 보관하고, 수집은 아래에서 다시 한 페이지씩 파싱 (메모리 일정)
+        boilerplate = BoilerplateFilter.from_env()
+        if boilerplate.enabled:
+            fit_started = time.perf_counter()
+            boilerplate.fit(pdf.pages(boilerplate.sample(pdf.page_count)))
+            print(f"머리말/꼬리말 탐지 - 표본 {boilerplate.stats.pages}/{pdf.page_count}페이지, "
+                  f"{time.perf_counter() - fit_started:.2f}초")
+        chunk_stride = splitter.chunk_size - splitter.chunk_overlap
+        positions = itertools.count()
+        
+        def split_page(page):
+            """(페이지 번호, 텍스트)를 분할해 새로 임베딩할 (내용, (위치, 해시, 메타데이터)) 목록 반환"""
+            number, text = page
+            stripped = boilerplate.strip(text)
+            chunks = splitter.split_text(stripped)
+            if boilerplate.enabled:
+                # 제거 전후 토큰/청크 수 (제거 전 청크 수는 원문을 다시 분할하지 않고 추정)
+                tokens_after = splitter.count_tokens(stripped)
+                tokens_before = tokens_after if stripped is text else splitter.count_tokens(text)
+                boilerplate.record_estimate(tokens_before, tokens_after, len(chunks), chunk_stride)
+            items = []
+            for chunk in chunks:
+                cleaned_content = chunk.encode().decode().replace("\x00", "").strip()
+                
+                if not cleaned_content:
+                    continue
+                chunk_index = next(positions)
+                digest = chunk_hash(cleaned_content)
+                metadata = {
+                    'page': number + 1,
+                    'filename': filename,
+                    's3_key': file_key,
+                    'document_file_id': document_file_id
+                }
+                if dedup.mode == 'store_once':
+                    # 앞에서 나온 텍스트면 행을 만들지 않고 leader 행의 pages에 페이지만 추가
+                    if dedup.register(cleaned_content, digest, number + 1):
+                        continue
+                    if reconciler.match(digest, chunk_index, metadata):
+                        continue
+                else:
+                    # 내용이 같은 기존 청크는 벡터를 재사용 (임베딩 생략)
+                    reused = reconciler.match(digest, chunk_index, metadata)
+                    leader = dedup.register(cleaned_content, digest, number + 1)
+                    if reused:
+                        continue
+                    if leader:
+                        # leader 벡터를 저장 후 복사 (임베딩 생략)
+                        dedup.add_follower(cleaned_content, metadata, digest, chunk_index, leader)
+                        continue
+                items.append((cleaned_content, (chunk_index, digest, metadata)))
+            return items
+        
+        def write_batch(items):
+            """임베딩된 배치를 일괄 저장 (INSERT_METHOD=copy|values), 커밋은 문서 단위로 아래에서 한 번"""
+            # lexical_document: 하이브리드 검색의 어휘 색인 (단어 + 한글 bigram → content_tsv)
+            rows = [
+                (content, vector, metadata, lexical_document(content), document_file_id, digest, chunk_index)
+                for content, (chunk_index, digest, metadata), vector in items
+            ]
+            return write_chunks(cursor, rows).rows
+        
+        # 저장소에 있는 텍스트는 Bedrock을 호출하지 않음 (common/embedding_store.py)
+        embed_one = embeddings.embed
+        if embedding_store is not None:
+            embed_one = embedding_store.wrap(EMBED_MODEL_ID, embed_one)
+            store_hits, store_misses = embedding_store.hits, embedding_store.misses
+        
+        # 페이지 단위 스트리밍: 파싱/분할 → 병렬 임베딩 → 저장 단계가 큐로 연결되어 동시에 진행
+        stats = run_pipeline(
+            pdf.pages(),
+            split_page,
+            embed_one,
+            write_batch,
+            concurrency=EMBED_CONCURRENCY
+        )
+        # 재사용 청크 위치/메타데이터 갱신 + 사라진 청크 삭제 (같은 트랜잭션)
+        reconcile = reconciler.apply(cursor)
+        # leader 행이 모두 저장된 뒤 반복 청크 반영 (벡터 복사 또는 pages 병합, 메타데이터 갱신 이후)
+        duplicated = dedup.write(cursor, document_file_id)
+        added = stats.rows + duplicated
+        successful_chunks = reconcile.reused + added
+        print(f"증분 수집 - 기존 {reconcile.existing}청크 중 재사용 {reconcile.reused}, "
+              f"추가 {added}, 삭제 {reconcile.removed}")
+        if boilerplate.enabled:
+            print(f"머리말/꼬리말 제거 - 패턴 {boilerplate.stats.patterns}개, {boilerplate.stats.lines_removed}줄, "
+                  f"토큰 {boilerplate.stats.tokens_before} → {boilerplate.stats.tokens_after} "
+                  f"(-{boilerplate.stats.token_reduction:.1%}), "
+                  f"청크(추정) {boilerplate.stats.chunks_before} → {boilerplate.stats.chunks_after}")
+        print(f"반복 청크 ({dedup.mode}) - {dedup.stats.occurrences}청크 중 고유 {dedup.stats.unique}, "
+              f"반복 {dedup.stats.followers} (중복률 {dedup.stats.dedup_ratio:.1%})")
+        print(f"수집 완료 - {stats.pages}페이지, {stats.chunks}청크, {stats.wall_seconds}초 "
+              f"({stats.chunks_per_sec} chunks/s)")
+        print(f"단계별 시간 - 파싱 {stats.parse_seconds}초, 임베딩 {stats.embed_seconds}초, "
+              f"저장 {stats.write_seconds}초, 임베딩 재시도 {stats.embed_retries}회 "
+              f"(최소 동시 실행 {stats.embed_min_concurrency}), 최대 RSS {stats.peak_rss_mb}MB")
+        if embedding_store is not None:
+            print(f"임베딩 저장소 - 재사용 {embedding_store.hits - store_hits}, "
+                  f"Bedrock 호출 {embedding_store.misses - store_misses}")
+        
+        # 목록 API가 document_files.chunk_count를 그대로 사용하므로 실제 저장된 청크 수로 갱신
+        cursor.execute(
+            "UPDATE document_files SET chunk_count = %s WHERE id = %s",
+            (successful_chunks, document_file_id)
+        )
+        
+        # 코퍼스 버전 증가 (서버의 시맨틱 답변 캐시 무효화, common/corpus.py 참고)
+        # corpus_version 테이블이 없는 기존 DB에서도 수집은 계속되도록 savepoint로 감쌈
+        cursor.execute("SAVEPOINT corpus_version")
+        version = None
+        try:
+            cursor.execute(BUMP_CORPUS_VERSION_SQL)
+            row = cursor.fetchone()
+            version = row[0] if row else None
+        except psycopg2.errors.UndefinedTable:
+            cursor.execute("ROLLBACK TO SAVEPOINT corpus_version")
+            print("corpus_version 테이블 없음 - 답변 캐시 버전 갱신 생략")
+        # 서버의 벡터 복제본이 이 문서의 벡터만 다시 읽도록 알림 (커밋 시 전달, common/replica.py)
+        notify_corpus_change(cursor, "upsert", document_file_id, version)
         
         conn.commit()
         
         print(f"처리 완료")
         print(f"성공한 청크: {successful_chunks}")
         
-    except Exception as e:
-        print(f"오류: {str(e)}")
+        # 이전 버전 원본은 지우지 않고 superseded 태그만 붙임 (S3 수명 주기 규칙으로 정리)
+        if previous_key and previous_key != file_key:
+            mark_superseded(bucket_name, previous_key)
+        
+        return {
+            'key': file_key,
+            'status': 'ingested',
+            'document_file_id': document_file_id,
+            'chunks': successful_chunks,
+            'reused': reconcile.reused,
+            'added': added,
+            'removed': reconcile.removed,
+            'dedup': dedup.stats.as_dict(),
+            'boilerplate': boilerplate.stats.as_dict(),
+            'seconds': stats.wall_seconds
+        }
+        
+    except Exception:
         if 'conn' in locals():
             conn.rollback()
+        raise
         
     finally:
         if 'conn' in locals():
             conn.close()
-        if 'pdf_path' in locals():
-            os.remove(pdf_path)
\ No newline at end of file
+        if 'pdf' in locals():
+            pdf.close()
+
+def lambda_handler(event, context):
+    """S3 알림의 레코드를 모두 처리 (한 문서의 실패가 같은 배치의 다른 문서를 막지 않음)"""
+    results = []
+    for record in event.get('Records', []):
+        bucket_name = record['s3']['bucket']['name']
+        # S3 알림의 키는 URL 인코딩되어 있음 (한글/공백 파일명)
+        file_key = unquote_plus(record['s3']['object']['key'])
+        try:
+            results.append(process_record(bucket_name, file_key))
+        except Exception as e:
+            print(f"오류 ({file_key}): {str(e)}")
+            results.append({'key': file_key, 'status': 'failed', 'error': str(e)})
+    
+    failed = sum(1 for result in results if result['status'] == 'failed')
+    print(f"배치 완료 - {len(results)}건 중 실패 {failed}건")
+    return {'results': results}
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""
+로컬 수집 워커
+
+Lambda와 같은 수집 로직(lambda_function.process_record)을 로컬에서 장시간 실행합니다.
+수천 개 파일의 백로그를 한 번에 수집하거나 Lambda 없이 개발할 때 사용합니다.
+큐 대신 디렉터리를 사용하며, 이벤트 파일은 S3 알림과 같은 형식({"Records": [...]})입니다.
+
+    <queue-dir>/incoming/*.json    대기 중인 이벤트
+    <queue-dir>/processing/        처리 중 (rename으로 가져가므로 워커 여러 개가 같은 디렉터리를 공유해도 됨)
+    <queue-dir>/done/              모든 레코드 성공 (<이름>.result.json 에 레코드별 결과)
+    <queue-dir>/failed/            실패한 레코드가 하나라도 있는 이벤트
+
+한 이벤트의 모든 레코드를 처리하며, 레코드(문서)마다 프로세스 풀에서 병렬로 실행합니다.
+문서에서 예외가 나거나 PDF 파서가 프로세스를 죽여도 그 문서만 실패로 기록되고 나머지는 계속 처리됩니다.
+(프로세스가 죽은 경우 남은 문서는 문서마다 별도 프로세스에서 다시 실행)
+
+사용 예:
+    python local_worker.py enqueue --queue-dir ./ingest_queue --bucket my-bucket --prefix documents/
+    python local_worker.py run --queue-dir ./ingest_queue --workers 4
+    python local_worker.py run --queue-dir ./ingest_queue --once      # 쌓인 이벤트만 처리하고 종료
+
+접속 정보는 6_RAG_pipeline/.env 의 DB_HOST, DB_NAME, DB_USER, DB_PASSWORD 를 사용합니다.
+Bedrock 동시 요청 수는 최대 workers × EMBED_CONCURRENCY 입니다.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import traceback
+import multiprocessing
+from pathlib import Path
+from urllib.parse import quote_plus, unquote_plus
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import boto3
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+
+QUEUE_DIRS = ("incoming", "processing", "done", "failed")
+
+# 워커 프로세스가 부모의 boto3 클라이언트/스레드를 물려받지 않도록 spawn 사용
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def ingest_record(bucket_name, file_key):
+    """워커 프로세스에서 문서 하나 수집 (예외는 실패 결과로 반환)"""
+    sys.path.append(str(Path(__file__).resolve().parent))
+    import lambda_function
+
+    started = time.perf_counter()
+    try:
+        result = lambda_function.process_record(bucket_name, file_key)
+    except Exception as e:
+        traceback.print_exc()
+        result = {'key': file_key, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+    result['worker_pid'] = os.getpid()
+    result['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def event_records(event):
+    """S3 알림 이벤트 → [(버킷, 키)] (키는 URL 디코딩)"""
+    return [
+        (record['s3']['bucket']['name'], unquote_plus(record['s3']['object']['key']))
+        for record in event.get('Records', [])
+    ]
+
+
+class LocalWorker:
+    """디렉터리 큐의 이벤트를 프로세스 풀로 처리"""
+
+    def __init__(self, queue_dir, workers=None):
+        self.queue_dir = Path(queue_dir)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        for name in QUEUE_DIRS:
+            (self.queue_dir / name).mkdir(parents=True, exist_ok=True)
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_MP_CONTEXT)
+        return self._pool
+
+    def _reset_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def recover(self):
+        """이전 실행이 중단되어 processing/ 에 남은 이벤트를 incoming/ 으로 되돌림"""
+        recovered = 0
+        for path in sorted((self.queue_dir / "processing").glob("*.json")):
+            path.rename(self.queue_dir / "incoming" / path.name)
+            recovered += 1
+        return recovered
+
+    def claim(self, limit):
+        """incoming/ 의 이벤트를 최대 limit개 processing/ 으로 옮겨 가져옴 (다른 워커가 먼저 가져간 파일은 건너뜀)"""
+        claimed = []
+        for path in sorted((self.queue_dir / "incoming").glob("*.json")):
+            if len(claimed) >= limit:
+                break
+            target = self.queue_dir / "processing" / path.name
+            try:
+                path.rename(target)
+            except FileNotFoundError:
+                continue
+            claimed.append(target)
+        return claimed
+
+    def process_records(self, records):
+        """[(버킷, 키)] 를 병렬 처리, 입력 순서대로 결과 반환"""
+        results = [None] * len(records)
+        crashed = []
+        pool = self._get_pool()
+        futures = {pool.submit(ingest_record, bucket, key): i for i, (bucket, key) in enumerate(records)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except BrokenProcessPool:
+                crashed.append(i)
+
+        if crashed:
+            # 어떤 문서가 프로세스를 죽였는지 알 수 없으므로 남은 문서를 하나씩 격리해 다시 실행
+            self._reset_pool()
+            for i in crashed:
+                bucket, key = records[i]
+                try:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=_MP_CONTEXT) as single:
+                        results[i] = single.submit(ingest_record, bucket, key).result()
+                except BrokenProcessPool:
+                    results[i] = {'key': key, 'status': 'failed', 'error': "worker process crashed"}
+        return results
+
+    def process_files(self, paths):
+        """이벤트 파일들의 레코드를 한꺼번에 병렬 처리하고 done/ 또는 failed/ 로 옮김"""
+        owners, records = [], []
+        for path in paths:
+            try:
+                event = json.loads(path.read_text(encoding="utf-8"))
+                file_records = event_records(event)
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"[worker] 잘못된 이벤트 {path.name}: {e}")
+                self._finish(path, [{'status': 'failed', 'error': f"invalid event: {e}"}])
+                continue
+            owners.extend([path] * len(file_records))
+            records.extend(file_records)
+            if not file_records:
+                self._finish(path, [])
+
+        by_file = {}
+        for path, result in zip(owners, self.process_records(records)):
+            by_file.setdefault(path, []).append(result)
+            print(f"[worker] {result['status']:<9} {result['key']} "
+                  f"chunks={result.get('chunks', '-')} {result.get('elapsed_seconds', '-')}s")
+        for path, results in by_file.items():
+            self._finish(path, results)
+        return [result for results in by_file.values() for result in results]
+
+    def _finish(self, path, results):
+        failed = any(result['status'] == 'failed' for result in results)
+        target_dir = self.queue_dir / ("failed" if failed else "done")
+        (target_dir / (path.stem + ".result.json")).write_text(
+            json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        path.rename(target_dir / path.name)
+
+    def run(self, once=False, poll_interval=2.0, files_per_round=None):
+        """incoming/ 을 감시하며 이벤트 처리 (once=True면 비어 있을 때 종료)"""
+        files_per_round = files_per_round or self.workers
+        totals = {'ingested': 0, 'duplicate': 0, 'failed': 0}
+        try:
+            while True:
+                paths = self.claim(files_per_round)
+                if not paths:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                for result in self.process_files(paths):
+                    totals[result['status']] = totals.get(result['status'], 0) + 1
+        finally:
+            self.close()
+        return totals
+
+
+def enqueue_prefix(queue_dir, bucket, prefix="", batch_size=50, suffix=".pdf"):
+    """S3 prefix 아래 객체를 batch_size개씩 S3 알림 형식 이벤트 파일로 incoming/ 에 추가"""
+    incoming = Path(queue_dir) / "incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+    paginator = boto3.client('s3').get_paginator('list_objects_v2')
+    batch, files, objects = [], 0, 0
+
+    def flush():
+        nonlocal batch, files
+        if batch:
+            name = f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}.json"
+            (incoming / name).write_text(json.dumps({'Records': batch}, ensure_ascii=False), encoding="utf-8")
+            files += 1
+            batch = []
+
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if suffix and not obj['Key'].lower().endswith(suffix):
+                continue
+            batch.append({'s3': {'bucket': {'name': bucket}, 'object': {'key': quote_plus(obj['Key'])}}})
+            objects += 1
+            if len(batch) >= batch_size:
+                flush()
+    flush()
+    return {'objects': objects, 'event_files': files}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="로컬 수집 워커")
+    parser.add_argument("action", choices=["run", "enqueue"])
+    parser.add_argument("--queue-dir", default="./ingest_queue")
+    parser.add_argument("--workers", type=int, default=None, help="동시에 수집할 문서 수 (기본 CPU 수)")
+    parser.add_argument("--once", action="store_true", help="쌓인 이벤트만 처리하고 종료 (run)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="incoming/ 확인 간격, 초 (run)")
+    parser.add_argument("--recover", action="store_true",
+                        help="시작 시 processing/ 에 남은 이벤트를 다시 처리 (run, 다른 워커가 없을 때만)")
+    parser.add_argument("--bucket", default=os.getenv("BUCKET_NAME"), help="enqueue 대상 버킷")
+    parser.add_argument("--prefix", default="documents/", help="enqueue 대상 prefix")
+    parser.add_argument("--batch-size", type=int, default=50, help="이벤트 파일당 레코드 수 (enqueue)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.action == "enqueue":
+        result = enqueue_prefix(args.queue_dir, args.bucket, args.prefix, args.batch_size)
+    else:
+        worker = LocalWorker(args.queue_dir, args.workers)
+        if args.recover:
+            print(f"[worker] 복구한 이벤트: {worker.recover()}")
+        print(f"[worker] {worker.queue_dir} 감시 시작 (workers={worker.workers})")
+        result = worker.run(once=args.once, poll_interval=args.poll_interval)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import os
+import sys
+import time
 import uuid
 import boto3
-import psycopg2
-import numpy as np
-from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
+import psycopg.errors
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
@@ -11,13 +12,34 @@ from typing import Optional, Dict
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_aws import ChatBedrock, BedrockEmbeddings
-from langchain_core.messages import HumanMessage
-from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
-env_path = Path(__file__).parent.parent.parent / '.env'
+BASE_DIR = Path(__file__).parent.parent.parent
+env_path = BASE_DIR / '.env'
 load_dotenv(dotenv_path=env_path)
 
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig, get_pool, get_async_pool, pool_stats, close_pools
+from common.aws import get_bedrock_client as get_shared_bedrock_client, configure_default_executor
+from common.embedding_cache import get_embedding_cache
+from common.metrics import record_latency, latency_summary
+from common.session_store import SessionStore
+from common.answer_cache import get_answer_cache, answer_scope
+from common.replica import get_vector_replica
+from common.corpus import get_corpus_version, BUMP_CORPUS_VERSION_SQL, CORPUS_CHANNEL
+from common.hybrid import HybridParams, resolve_hybrid, ahybrid_search
+from common.quantization import rescore_candidates, search_ef, create_quantized_index, drop_quantized_index
+from common.postprocess import (
+    resolve_postprocess, candidate_sql, postprocess_rows, VECTOR_LAYOUT, HYBRID_LAYOUT
+)
+from common.pgvector_codec import as_float32
+from common.uploads import stream_upload, UploadTooLarge
+from common.indexes import (
+    create_vector_index, rebuild_vector_index, drop_vector_index,
+    list_vector_indexes, asearch_params
+)
+
 app = FastAPI(
     title="RAG Admin API",
     description="관리자용 문서 관리 및 RAG 챗봇 API",
@@ -34,61 +56,93 @@ app.add_middleware(
 
 # 공통 유틸리티 함수
 def get_db_connection():
-    """데이터베이스 연결 생성"""
-    conn = psycopg2.connect(
-        host=os.getenv('DB_HOST'),
-        database=os.getenv('DB_NAME'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD')
-    )
-    conn.autocommit = True
-    return conn
+    """공유 커넥션 풀에서 연결 대여 (`with get_db_connection() as conn:`)"""
+    return get_pool().connection()
 
 def get_s3_client():
     """S3 클라이언트 생성"""
     return boto3.client('s3', region_name=os.getenv('AWS_REGION', 'us-east-1'))
 
 def get_bedrock_client():
-    """Bedrock 클라이언트 생성"""
-    return boto3.client("bedrock-runtime", region_name="us-east-1")
+    """Bedrock 클라이언트 (커넥션 풀 크기가 설정된 프로세스 공유 클라이언트)"""
+    return get_shared_bedrock_client()
 
 # 임베딩 및 유사도 검색 함수
-def get_embedding(text, bedrock_client=None):
-    """텍스트 임베딩 생성"""
-    if not bedrock_client:
-        bedrock_client = get_bedrock_client()
-    
-    embeddings = BedrockEmbeddings(
-        client=bedrock_client,
-        model_id="amazon.titan-embed-text-v1"
-    )
-    return embeddings.embed_query(text)
-
-def find_similar_chunks(query_embedding, k=3):
-    """유사도 기반 문서 검색"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+_embeddings = None
+
+def get_embeddings_model(bedrock_client=None):
+    """BedrockEmbeddings 객체를 한 번만 생성해 재사용"""
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = BedrockEmbeddings(
+            client=bedrock_client or get_bedrock_client(),
+            model_id=EMBEDDING_MODEL_ID
+        )
+    return _embeddings
+
+async def get_embedding(text, bedrock_client=None):
+    """텍스트 임베딩 생성 (반복 질의는 캐시에서 반환, Titan 호출은 스레드풀에서 실행)"""
+    embeddings = get_embeddings_model(bedrock_client)
+    return await get_embedding_cache().aget_or_compute(EMBEDDING_MODEL_ID, text, embeddings.aembed_query)
+
+async def find_similar_chunks(query_embedding, k=3, ef_search=None, probes=None,
+                              query_text=None, hybrid: Optional[HybridParams] = None, timings=None):
+    """
+    유사도 기반 문서 검색 (비동기 커넥션 풀, ef_search/probes로 재현율-지연 조절)
+
+    hybrid와 query_text가 주어지면 벡터 + 어휘 검색을 한 문장에서 실행해 RRF로 합칩니다.
+    VECTOR_STORAGE가 halfvec/binary면 양자화 인덱스 후보를 full 벡터로 재정렬합니다 (common/quantization.py).
+    후보는 임계값/MMR/이웃 청크 제외 후처리로 k개를 고릅니다 (common/postprocess.py).
+    timings(dict)를 넘기면 단계별 소요 시간(ms)을 채웁니다.
+
+    Returns:
+        [(content, metadata, similarity), ...]  similarity = 1 - DB 코사인 거리
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    # 질의/결과 벡터는 float32 np.ndarray로 바이너리 전송 (common/pgvector_codec.py)
+    query_vector = as_float32(query_embedding)
+    post = resolve_postprocess()
+    fetch = post.fetch_count(k)
+    use_hybrid = hybrid is not None and query_text
+    # VECTOR_REPLICA가 켜져 있고 최신이면 인메모리 정확 검색 (common/replica.py), 아니면 SQL
+    replica = get_vector_replica()
+    use_replica = not use_hybrid and replica.enabled and \
+        replica.fresh(await get_corpus_version().aget(get_async_pool()))
+    ef_search = search_ef(ef_search, hybrid.vector_candidates if use_hybrid else fetch)
+    async with get_async_pool().connection() as conn, asearch_params(conn, ef_search, probes):
+        if use_hybrid:
+            rows, leg_timings = await ahybrid_search(
+                conn, query_vector, query_text, fetch, hybrid
+            )
+            timings.update(leg_timings)
+            layout = HYBRID_LAYOUT
+        elif use_replica:
+            rows = await replica.candidates(conn, query_vector, fetch, post.needs_vectors)
+            timings["vector_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            timings["replica"] = True
+            layout = VECTOR_LAYOUT
+        else:
+            # 벡터 테이블에서 후보를 구하고 본문만 조인, 벡터는 후처리에 필요할 때만 읽음
+            cursor = await conn.execute(candidate_sql(post), {
+                "embedding": query_vector,
+                "k": fetch,
+                "candidates": rescore_candidates(fetch)
+            }, binary=True)
+            
+            rows = await cursor.fetchall()
+            timings["vector_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            layout = VECTOR_LAYOUT
+    timings["search_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    for leg in ("vector_ms", "lexical_ms"):
+        if leg in timings:
+            record_latency(f"retrieval.{leg[:-3]}", timings[leg])
     
-    try:
-        cursor.execute("""
-            SELECT content, metadata,
-                   embedding as doc_embedding
-            FROM documents
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s;
-        """, (query_embedding, k))
-        
-        results = cursor.fetchall()
-        
-        def calculate_cosine_similarity(qe, e):
-            qe_array = np.array(qe, dtype=float)
-            e_array = np.array(e, dtype=float)
-            return np.dot(qe_array, e_array) / (np.linalg.norm(qe_array) * np.linalg.norm(e_array))
-        
-        return [(row[0], row[1], calculate_cosine_similarity(query_embedding, row[2])) for row in results]
-    finally:
-        cursor.close()
-        conn.close()
+    post_started = time.perf_counter()
+    selected = postprocess_rows(rows, k, post, **layout)
+    timings["postprocess_ms"] = round((time.perf_counter() - post_started) * 1000, 2)
+    return [(row[0], row[1], similarity) for row, similarity in selected]
 
 # Pydantic 모델
 class ApiResponse(BaseModel):
@@ -99,10 +153,37 @@ class ApiResponse(BaseModel):
 class ChatRequest(BaseModel):
     query: str
     session_id: Optional[str] = "default"
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+    retrieval_mode: Optional[str] = None  # vector | hybrid (기본 RETRIEVAL_MODE)
+    vector_weight: Optional[float] = None
+    lexical_weight: Optional[float] = None
+    vector_candidates: Optional[int] = None
+    lexical_candidates: Optional[int] = None
+
+    def hybrid_params(self) -> Optional[HybridParams]:
+        return resolve_hybrid(
+            self.retrieval_mode,
+            vector_weight=self.vector_weight, lexical_weight=self.lexical_weight,
+            vector_candidates=self.vector_candidates, lexical_candidates=self.lexical_candidates
+        )
+
+class IndexRequest(BaseModel):
+    action: str = "build"  # build | rebuild | drop | quantize | dequantize
+    method: str = "hnsw"  # hnsw | ivfflat
+    storage: str = "halfvec"  # halfvec | binary (quantize/dequantize)
+    m: int = 16
+    ef_construction: int = 64
+    lists: Optional[int] = None
+    concurrently: bool = True
+    maintenance_work_mem: Optional[str] = None
 
 class DocumentUploadResponse(BaseModel):
     s3_key: str
     document_id: Optional[int] = None
+    duplicate: bool = False  # 같은 내용의 문서가 이미 있어 업로드/재수집하지 않음
+    sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
 
 # RAG 챗봇 엔드포인트
 class RAGChatbot:
@@ -118,27 +199,50 @@ class RAGChatbot:
             },
             streaming=True
         )
-        self.chat_histories = {}
+        # 세션 수/길이 상한과 만료가 있는 대화 기록 저장소 (SESSION_* 환경 변수)
+        self.session_store = SessionStore.from_env()
 
     def get_session_history(self, session_id):
-        if session_id not in self.chat_histories:
-            self.chat_histories[session_id] = InMemoryChatMessageHistory()
-        return self.chat_histories[session_id]
+        return self.session_store.get_session_history(session_id)
 
-    def generate_response(self, query: str, session_id: Optional[str] = None):
-        session_id = session_id or "default"
-        
-        conversation = RunnableWithMessageHistory(
+    def _conversation(self, session_id: str):
+        return RunnableWithMessageHistory(
             self.llm,
-            self.get_session_history,
-            max_history=3
+            self.get_session_history
         ).with_config(configurable={"session_id": session_id})
 
-        query_embedding = get_embedding(query, self.bedrock_client)
-        similar_chunks = find_similar_chunks(query_embedding)
+    async def retrieve(self, query: str, ef_search: Optional[int] = None, probes: Optional[int] = None,
+                       query_embedding=None, hybrid: Optional[HybridParams] = None, timings=None):
+        if query_embedding is None:
+            query_embedding = await get_embedding(query, self.bedrock_client)
+        return await find_similar_chunks(
+            query_embedding, ef_search=ef_search, probes=probes,
+            query_text=query, hybrid=hybrid, timings=timings
+        )
+
+    async def lookup_cached_answer(self, query: str, session_id: str, scope: str):
+        """
+        (질의 임베딩, 코퍼스 버전, 캐시 항목 또는 None) - 비슷한 질문의 이전 답변 조회
+
+        대화 기록이 있는 세션의 답변은 이전 맥락에 의존하므로 조회/저장하지 않습니다
+        (버전 None → store도 생략). scope는 검색 설정 지문입니다 (answer_scope).
+        """
+        query_embedding = await get_embedding(query, self.bedrock_client)
+        if await self.get_session_history(session_id).aget_messages():
+            return query_embedding, None, None
+        version = await get_corpus_version().aget(get_async_pool())
+        return query_embedding, version, get_answer_cache().lookup(query_embedding, version, scope)
+
+    def remember_cached_answer(self, session_id: str, query: str, similar_chunks, response: str):
+        """캐시 적중 시에도 대화 맥락이 이어지도록 세션 기록에 질문/답변 추가"""
+        self.get_session_history(session_id).add_messages(
+            [self.build_prompt(query, similar_chunks), AIMessage(content=response)]
+        )
+
+    def build_prompt(self, query: str, similar_chunks) -> HumanMessage:
         context = "\n\n".join([chunk[0] for chunk in similar_chunks])
 
-        prompt = HumanMessage(content=f"""이전 대화 기록과 문서 내용을 참고하여 답변해주세요.
+        return HumanMessage(content=f"""이전 대화 기록과 문서 내용을 참고하여 답변해주세요.
         
         질문: {query}
         
@@ -148,8 +252,112 @@ class RAGChatbot:
         위 내용과 이전 대화 맥락을 바탕으로 질문에 대해 명확하고 친절하게 답변해주세요. 
         문서에 없는 내용은 언급하지 말고, 확실한 정보만 답변에 포함해주세요.""")
 
-        response = conversation.invoke([prompt], config={"configurable": {"session_id": session_id}})
-        return response.content, similar_chunks
+    async def generate_response(self, query: str, session_id: Optional[str] = None,
+                                ef_search: Optional[int] = None, probes: Optional[int] = None,
+                                hybrid: Optional[HybridParams] = None, timings=None):
+        """(답변, 참고 청크, 캐시 여부) 반환"""
+        session_id = session_id or "default"
+        scope = answer_scope(ef_search=ef_search, probes=probes, hybrid=hybrid)
+        query_embedding, version, cached = await self.lookup_cached_answer(query, session_id, scope)
+        if cached is not None:
+            entry, _ = cached
+            self.remember_cached_answer(session_id, query, entry["chunks"], entry["response"])
+            return entry["response"], entry["chunks"], True
+
+        similar_chunks = await self.retrieve(query, ef_search, probes, query_embedding, hybrid, timings)
+        prompt = self.build_prompt(query, similar_chunks)
+
+        response = await self._conversation(session_id).ainvoke(
+            [prompt], config={"configurable": {"session_id": session_id}}
+        )
+        get_answer_cache().store(
+            query_embedding, version, {"response": response.content, "chunks": similar_chunks}, scope
+        )
+        return response.content, similar_chunks, False
+
+    async def stream_response(self, query: str, session_id: Optional[str] = None,
+                              ef_search: Optional[int] = None, probes: Optional[int] = None,
+                              hybrid: Optional[HybridParams] = None):
+        """참고 문서 → 토큰 → 완료 순서로 이벤트(dict)를 내보내는 비동기 제너레이터"""
+        session_id = session_id or "default"
+        started = time.perf_counter()
+
+        scope = answer_scope(ef_search=ef_search, probes=probes, hybrid=hybrid)
+        query_embedding, version, cached = await self.lookup_cached_answer(query, session_id, scope)
+        if cached is not None:
+            # 캐시 적중: 저장된 답변을 한 번에 내보냄
+            entry, similarity = cached
+            self.remember_cached_answer(session_id, query, entry["chunks"], entry["response"])
+            references = format_references(entry["chunks"])
+            total_ms = (time.perf_counter() - started) * 1000
+            record_latency("chat.cached", total_ms)
+            yield {"type": "references", "references": references}
+            yield {"type": "token", "content": entry["response"]}
+            yield {
+                "type": "done",
+                "status": "success",
+                "response": entry["response"],
+                "references": references,
+                "cached": True,
+                "cache_similarity": round(similarity, 4),
+                "metrics": {"retrieval_ms": None, "ttft_ms": round(total_ms, 2), "total_ms": round(total_ms, 2)}
+            }
+            return
+
+        search_timings = {}
+        similar_chunks = await self.retrieve(query, ef_search, probes, query_embedding, hybrid, search_timings)
+        retrieval_ms = (time.perf_counter() - started) * 1000
+        references = format_references(similar_chunks)
+        yield {"type": "references", "references": references}
+
+        prompt = self.build_prompt(query, similar_chunks)
+        parts = []
+        ttft_ms = None
+        async for chunk in self._conversation(session_id).astream(
+            [prompt], config={"configurable": {"session_id": session_id}}
+        ):
+            text = chunk_text(chunk.content)
+            if not text:
+                continue
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+                record_latency("chat.ttft", ttft_ms)
+            parts.append(text)
+            yield {"type": "token", "content": text}
+
+        total_ms = (time.perf_counter() - started) * 1000
+        record_latency("chat.total", total_ms)
+        metrics = {
+            "retrieval_ms": round(retrieval_ms, 2),
+            "ttft_ms": round(ttft_ms, 2) if ttft_ms is not None else None,
+            "total_ms": round(total_ms, 2),
+            "search": search_timings
+        }
+        print(f"[stream] session={session_id} ttft_ms={metrics['ttft_ms']} total_ms={metrics['total_ms']}")
+        response = "".join(parts)
+        get_answer_cache().store(query_embedding, version, {"response": response, "chunks": similar_chunks}, scope)
+        yield {
+            "type": "done",
+            "status": "success",
+            "response": response,
+            "references": references,
+            "cached": False,
+            "metrics": metrics
+        }
+
+def chunk_text(content) -> str:
+    """스트리밍 청크의 content(문자열 또는 content block 리스트)에서 텍스트 추출"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    return ""
+
+def format_references(chunks):
+    return [{"content": chunk[0], "metadata": chunk[1]} for chunk in chunks]
 
 rag_chatbot = RAGChatbot()
 
@@ -157,20 +365,36 @@ rag_chatbot = RAGChatbot()
 @app.post("/api/chat", response_model=ApiResponse)
 async def chat_endpoint(request: ChatRequest):
     try:
-        response, chunks = rag_chatbot.generate_response(request.query, request.session_id)
+        timings = {}
+        response, chunks, cached = await rag_chatbot.generate_response(
+            request.query, request.session_id, request.ef_search, request.probes,
+            request.hybrid_params(), timings
+        )
         return ApiResponse(
             status="success", 
             message="답변 생성 완료", 
             data={
                 "response": response, 
-                "references": [{"content": chunk[0], "metadata": chunk[1]} for chunk in chunks]
+                "references": format_references(chunks),
+                "cached": cached,
+                "search_metrics": timings
             }
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
+    """
+    스트리밍 채팅
+    
+    요청: {"query": ..., "session_id": ..., "ef_search"?: ..., "probes"?: ...,
+           "retrieval_mode"?: "vector" | "hybrid", "vector_weight"?: ..., "lexical_weight"?: ...,
+           "vector_candidates"?: ..., "lexical_candidates"?: ...}
+    응답: references → token(여러 번) → done(전체 답변, 참고 문서, 캐시 여부, 지연 시간 지표) 순서
+    """
     await websocket.accept()
     try:
         while True:
@@ -179,53 +403,53 @@ async def websocket_chat(websocket: WebSocket):
             session_id = data.get('session_id', 'default')
             
             try:
-                response, chunks = rag_chatbot.generate_response(query, session_id)
-                await websocket.send_json({
-                    "status": "success",
-                    "response": response,
-                    "references": [{"content": chunk[0], "metadata": chunk[1]} for chunk in chunks]
-                })
+                hybrid = resolve_hybrid(
+                    data.get('retrieval_mode'),
+                    vector_weight=data.get('vector_weight'), lexical_weight=data.get('lexical_weight'),
+                    vector_candidates=data.get('vector_candidates'),
+                    lexical_candidates=data.get('lexical_candidates')
+                )
+                async for event in rag_chatbot.stream_response(
+                    query, session_id, data.get('ef_search'), data.get('probes'), hybrid
+                ):
+                    await websocket.send_json(event)
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
                 await websocket.send_json({
+                    "type": "error",
                     "status": "error",
                     "message": str(e)
                 })
     except WebSocketDisconnect:
         print("WebSocket disconnected")
 
+@app.delete("/api/chat-history/{session_id}", response_model=ApiResponse)
+def clear_chat_history(session_id: str):
+    try:
+        rag_chatbot.session_store.clear(session_id)
+        return ApiResponse(status="success", message="대화 기록이 초기화되었습니다.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# 동기 DB 호출을 쓰는 엔드포인트는 일반 def로 정의해 스레드풀에서 실행 (이벤트 루프 블로킹 방지)
 @app.get("/api/admin/documents")
-async def get_admin_documents():
+def get_admin_documents():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                metadata->>'filename' as filename,
-                metadata->>'s3_key' as s3_key,
-                metadata->>'document_file_id' as document_file_id,
-                COUNT(*) as chunk_count,
-                MAX(created_at) as latest_created_at
-            FROM documents
-            WHERE metadata->>'filename' IS NOT NULL
-            GROUP BY metadata->>'filename', metadata->>'s3_key', metadata->>'document_file_id'
-            ORDER BY latest_created_at DESC
-        """)
-        
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            # 문서 단위 목록은 document_files에서 조회 (청크 전체 GROUP BY 없이 문서 수에 비례)
+            cursor.execute("""
+                SELECT id, filename, s3_key, chunk_count, created_at
+                FROM document_files
+                ORDER BY created_at DESC
+            """)
+            
+            rows = cursor.fetchall()
         
         documents = []
         for row in rows:
             try:
-                filename, s3_key, document_file_id, chunk_count, created_at = row
-                doc_id = None
-                if document_file_id:
-                    try:
-                        doc_id = int(document_file_id)
-                    except (ValueError, TypeError):
-                        doc_id = None
+                doc_id, filename, s3_key, chunk_count, created_at = row
                 doc = {
                     "id": doc_id,
                     "title": filename or "Untitled",
@@ -248,8 +472,29 @@ async def get_admin_documents():
         print(f"Error in get_admin_documents: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def find_document_by_hash(sha256: str) -> Optional[Dict]:
+    """같은 내용(SHA-256)으로 이미 수집된 문서 조회"""
+    try:
+        async with get_async_pool().connection() as conn:
+            cursor = await conn.execute(
+                "SELECT id, s3_key FROM document_files WHERE content_hash = %s ORDER BY id LIMIT 1",
+                (sha256,)
+            )
+            row = await cursor.fetchone()
+    except Exception as e:
+        # content_hash 컬럼이 없는 기존 DB: 중복 확인 없이 업로드
+        print(f"Warning: duplicate check skipped: {e}")
+        return None
+    return {"id": row[0], "s3_key": row[1]} if row else None
+
 @app.post("/api/admin/documents", response_model=DocumentUploadResponse)
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(file: UploadFile = File(...), document_id: Optional[int] = Form(None)):
+    """
+    PDF를 파트 단위로 S3에 스트리밍 업로드 (크기 제한, 동일 파일은 업로드/재수집 생략)
+
+    document_id를 주면 그 문서의 새 버전으로 올립니다. S3 메타데이터(document-id)로 전달되어
+    Lambda가 파일명이 아닌 이 ID로 기존 문서를 찾아 증분 재수집합니다.
+    """
     try:
         s3_client = get_s3_client()
         bucket_name = os.getenv('BUCKET_NAME')
@@ -257,37 +502,66 @@ async def upload_document(file: UploadFile = File(...)):
         if not bucket_name:
             raise ValueError("BUCKET_NAME environment variable is not set")
         
-        file_content = await file.read()
         file_key = f"documents/{uuid.uuid4()}_{file.filename}"
         
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=file_key,
-            Body=file_content,
-            ContentType="application/pdf"
+        result = await stream_upload(
+            file, s3_client, bucket_name, file_key,
+            content_type="application/pdf",
+            find_duplicate=find_document_by_hash,
+            metadata={"document-id": str(document_id)} if document_id is not None else None
         )
+        print(f"[upload] key={file_key} size={result.size} parts={result.parts} "
+              f"duplicate={result.duplicate is not None} elapsed_ms={result.elapsed_ms}")
         
+        if result.duplicate is not None:
+            return DocumentUploadResponse(
+                s3_key=result.duplicate["s3_key"],
+                document_id=result.duplicate["id"],
+                duplicate=True,
+                sha256=result.sha256,
+                size_bytes=result.size
+            )
         return DocumentUploadResponse(
-            s3_key=file_key
+            s3_key=file_key,
+            sha256=result.sha256,
+            size_bytes=result.size
         )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # 문서 삭제
 @app.delete("/api/admin/documents/{doc_id}", response_model=ApiResponse)
-async def delete_document(doc_id: int):
+def delete_document(doc_id: int):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            DELETE FROM documents 
-            WHERE metadata->>'document_file_id' = %s
-        """, (str(doc_id),))
-        
-        deleted_count = cursor.rowcount
-        cursor.close()
-        conn.close()
+        # 파일 행 삭제(청크는 ON DELETE CASCADE, document_file_id 인덱스 사용)와
+        # 코퍼스 버전 증가, 변경 알림을 한 문장(한 트랜잭션)으로 실행
+        # → 답변 캐시 무효화, 서버 벡터 복제본에서 이 문서 제거 (common/replica.py)
+        delete_sql = """
+            WITH deleted_chunks AS (
+                DELETE FROM documents WHERE document_file_id = %(doc_id)s RETURNING 1
+            ), deleted_file AS (
+                DELETE FROM document_files WHERE id = %(doc_id)s
+            ){bump}
+            SELECT COUNT(*), pg_notify(%(channel)s, json_build_object(
+                'op', 'delete', 'document_file_id', %(doc_id)s::int, 'version', {version}
+            )::text)
+            FROM deleted_chunks
+        """
+        params = {"doc_id": doc_id, "channel": CORPUS_CHANNEL}
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            try:
+                cursor.execute(
+                    delete_sql.format(bump=f", bumped AS ({BUMP_CORPUS_VERSION_SQL.strip()})",
+                                      version="(SELECT version FROM bumped)"),
+                    params
+                )
+            except psycopg.errors.UndefinedTable:
+                # corpus_version 테이블이 없는 기존 DB (답변 캐시도 비활성 상태)
+                cursor.execute(delete_sql.format(bump="", version="NULL"), params)
+            deleted_count = cursor.fetchone()[0]
+        get_corpus_version().invalidate()
         
         return ApiResponse(
             status="success",
@@ -297,6 +571,77 @@ async def delete_document(doc_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# 벡터 인덱스 관리 (빌드가 오래 걸리므로 스레드풀에서 실행되는 동기 함수로 정의)
+@app.get("/api/admin/index", response_model=ApiResponse)
+def get_vector_indexes():
+    try:
+        with get_db_connection() as conn:
+            indexes = list_vector_indexes(conn)
+        return ApiResponse(status="success", message="Index list retrieved", data={"indexes": indexes})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/admin/index", response_model=ApiResponse)
+def manage_vector_index(request: IndexRequest):
+    try:
+        with get_db_connection() as conn:
+            if request.action == "build":
+                result = create_vector_index(
+                    conn, request.method, request.m, request.ef_construction, request.lists,
+                    concurrently=request.concurrently,
+                    maintenance_work_mem=request.maintenance_work_mem
+                )
+            elif request.action == "rebuild":
+                result = rebuild_vector_index(
+                    conn, request.method, request.m, request.ef_construction, request.lists,
+                    maintenance_work_mem=request.maintenance_work_mem
+                )
+            elif request.action == "drop":
+                result = drop_vector_index(conn, request.method, concurrently=request.concurrently)
+            elif request.action == "quantize":
+                result = create_quantized_index(
+                    conn, request.storage, request.m, request.ef_construction,
+                    concurrently=request.concurrently,
+                    maintenance_work_mem=request.maintenance_work_mem
+                )
+            elif request.action == "dequantize":
+                result = drop_quantized_index(conn, request.storage, concurrently=request.concurrently)
+            else:
+                raise ValueError(f"Unknown action: {request.action}")
+        return ApiResponse(status="success", message=f"Index {request.action} completed", data=result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/admin/stats")
+async def get_admin_stats():
+    """커넥션 풀 등 서버 내부 지표 조회"""
+    return {
+        "status": "success",
+        "message": "Stats retrieved successfully",
+        "data": {
+            "db_pool": pool_stats(),
+            "embedding_cache": get_embedding_cache().stats(),
+            "latency": latency_summary(),
+            "sessions": rag_chatbot.session_store.stats(),
+            "answer_cache": get_answer_cache().stats(),
+            "vector_replica": get_vector_replica().stats()
+        }
+    }
+
+@app.on_event("startup")
+async def startup():
+    configure_default_executor()
+    await get_async_pool().open()
+    # 인메모리 벡터 복제본은 백그라운드에서 로드 (VECTOR_REPLICA, 로드 중에는 SQL 검색)
+    get_vector_replica().start(get_async_pool(), PoolConfig.from_env().connect_kwargs())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await get_vector_replica().stop()
+    await close_pools()
+
 # 정적 파일 서빙 (기존과 동일)
 build_dir = os.path.join(os.path.dirname(__file__), "../client/build")
 if os.path.exists(build_dir):
@@ -0,0 +1,111 @@
+"""
+채팅 API 동시성 벤치마크
+
+동시 요청 수(in-flight)를 늘려가며 처리량(req/s)과 지연 시간을 측정합니다.
+채팅 부하가 걸린 동안 /health 응답 시간도 함께 측정해 이벤트 루프가 막히는지 확인합니다.
+비동기 파이프라인이라면 동시 요청 수에 비례해 처리량이 늘고 /health 지연은 낮게 유지됩니다.
+
+사용 예:
+    pip install httpx
+    python chat_concurrency.py --url http://localhost:8002 --levels 1,2,4,8,16 --requests 32
+    python chat_concurrency.py --url http://localhost:8001 --health-path /api/admin/stats
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+DEFAULT_QUERIES = [
+    "휴학 신청은 어떻게 하나요?",
+    "복학 신청 기간은 언제인가요?",
+    "졸업요건이 뭐야?",
+    "조기졸업을 하려면 어떤 요건을 충족해야 하나요?",
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+async def run_level(client, args, concurrency):
+    """concurrency개 요청을 동시에 유지하며 args.requests개를 처리"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            payload = {
+                "query": DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)],
+                "session_id": f"bench-{concurrency}-{i}",
+            }
+            started = time.perf_counter()
+            try:
+                response = await client.post(args.chat_path, json=payload)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                errors += 1
+
+    health_latencies = []
+    stop = asyncio.Event()
+
+    async def probe_health():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                await client.get(args.health_path)
+                health_latencies.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                pass
+            await asyncio.sleep(0.2)
+
+    prober = asyncio.create_task(probe_health())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    return {
+        "concurrency": concurrency,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p95_ms": percentile(latencies, 0.95) if latencies else 0.0,
+        "health_p95_ms": percentile(health_latencies, 0.95) if health_latencies else 0.0,
+        "errors": errors,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="채팅 API 동시성 벤치마크")
+    parser.add_argument("--url", default="http://localhost:8002")
+    parser.add_argument("--chat-path", default="/api/chat")
+    parser.add_argument("--health-path", default="/health")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="동시 요청 수 목록")
+    parser.add_argument("--requests", type=int, default=32, help="단계별 요청 수")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    limits = httpx.Limits(max_connections=max(levels) + 4)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        print(f"{'in-flight':>9} {'req/s':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'health p95':>11} {'errors':>7}")
+        baseline = None
+        for concurrency in levels:
+            result = await run_level(client, args, concurrency)
+            baseline = baseline or result["throughput_rps"]
+            speedup = result["throughput_rps"] / baseline if baseline else 0.0
+            print(
+                f"{result['concurrency']:>9} {result['throughput_rps']:>8.2f} "
+                f"{result['p50_ms']:>9.0f} {result['p95_ms']:>9.0f} "
+                f"{result['health_p95_ms']:>11.1f} {result['errors']:>7}   x{speedup:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+수집 Lambda import 시간 벤치마크 (콜드 스타트)
+
+모듈 로드 시점 import 비용을 새 파이썬 프로세스에서 측정합니다.
+
+- langchain : 기존 핸들러의 import (boto3, psycopg2, langchain_aws, langchain_text_splitters,
+              langchain_community.document_loaders)
+- lean      : 현재 lambda_function 모듈 import (common/lean_ingest.py, 클라이언트 생성 포함)
+              + 첫 분할 시 tiktoken 인코더 로드 시간(first_split_ms)
+
+--verify 는 PDF 페이지마다 LangChain CharacterTextSplitter.from_tiktoken_encoder(500, 50, '\\n')와
+TokenLineSplitter의 청크가 바이트 단위로 같은지 확인합니다.
+
+사용 예:
+    pip install langchain-aws langchain-community langchain-text-splitters tiktoken pymupdf
+    python ingest_import.py --runs 5
+    python ingest_import.py --verify --file ../../5_RAG/data/univ-data.pdf
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LAMBDA_DIR = BASE_DIR / "admin" / "server" / "lambda"
+DEFAULT_FILE = BASE_DIR.parent / "5_RAG" / "data" / "univ-data.pdf"
+
+MODES = ("langchain", "lean")
+
+
+def run_child(mode):
+    """한 가지 import 세트를 현재 프로세스에서 실행하고 결과를 JSON 한 줄로 출력"""
+    started = time.perf_counter()
+    first_split_ms = 0.0
+    if mode == "langchain":
+        import boto3  # noqa: F401
+        import psycopg2  # noqa: F401
+        from langchain_aws import BedrockEmbeddings  # noqa: F401
+        from langchain_text_splitters import CharacterTextSplitter  # noqa: F401
+        from langchain_community.document_loaders import PyPDFLoader  # noqa: F401
+        imported = time.perf_counter()
+        CharacterTextSplitter.from_tiktoken_encoder(chunk_size=500, chunk_overlap=50, separator="\n").split_text("가")
+        first_split_ms = (time.perf_counter() - imported) * 1000
+    else:
+        sys.path.append(str(LAMBDA_DIR))
+        import lambda_function
+        imported = time.perf_counter()
+        lambda_function.splitter.split_text("가")
+        first_split_ms = (time.perf_counter() - imported) * 1000
+    print(json.dumps({
+        "import_ms": round((imported - started) * 1000, 1),
+        "first_split_ms": round(first_split_ms, 1),
+        "modules": len(sys.modules),
+    }))
+
+
+def verify(path):
+    """페이지별 청크가 LangChain 분할기와 같은지 확인"""
+    import pymupdf
+    from langchain_text_splitters import CharacterTextSplitter
+    sys.path.append(str(BASE_DIR))
+    from common.lean_ingest import TokenLineSplitter
+
+    reference = CharacterTextSplitter.from_tiktoken_encoder(chunk_size=500, chunk_overlap=50, separator="\n")
+    lean = TokenLineSplitter(chunk_size=500, chunk_overlap=50, separator="\n")
+    pages = chunks = mismatched = 0
+    with pymupdf.open(path) as doc:
+        for number in range(doc.page_count):
+            text = doc.load_page(number).get_text()
+            expected, actual = reference.split_text(text), lean.split_text(text)
+            pages += 1
+            chunks += len(expected)
+            if [c.encode("utf-8") for c in expected] != [c.encode("utf-8") for c in actual]:
+                mismatched += 1
+                print(f"page {number + 1}: langchain {len(expected)} chunks, lean {len(actual)} chunks")
+    print(json.dumps({"pages": pages, "chunks": chunks, "mismatched_pages": mismatched}))
+    return mismatched == 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="수집 Lambda import 시간 벤치마크")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--runs", type=int, default=5, help="모드별 반복 횟수 (매번 새 프로세스)")
+    parser.add_argument("--verify", action="store_true", help="청크 동일성 확인")
+    parser.add_argument("--file", default=str(DEFAULT_FILE), help="--verify 에 사용할 PDF")
+    parser.add_argument("--child", choices=MODES, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(args.child)
+        return
+    if args.verify:
+        sys.exit(0 if verify(args.file) else 1)
+
+    print(f"{'mode':<10} {'import_ms':>10} {'first_split_ms':>15} {'modules':>8}")
+    for mode in args.modes.split(","):
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode],
+                check=True, capture_output=True, text=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        print(f"{mode:<10} {statistics.median(r['import_ms'] for r in runs):>10.1f} "
+              f"{statistics.median(r['first_split_ms'] for r in runs):>15.1f} {runs[0]['modules']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+어휘 검색 질의 확인 (common/lexical.py)
+
+lexical_query가 만드는 tsquery를 확인합니다. 검색 품질이 질의 형태에 크게 좌우되므로
+lexical.py를 고친 뒤에는 이 스크립트를 실행합니다.
+
+- 기대 질의: 두 음절 단어, 조사가 붙은 단어, "3.75" 같은 숫자/과목 코드, 중복 단어, 용어 없는 질의
+- MAX_QUERY_WORDS: 단어가 많아도 그룹 수가 상한을 넘지 않음
+- 색인 일치: 질의의 모든 용어가 같은 텍스트의 lexical_document 용어에 포함되고,
+  그 문서(와 조사만 다른 문서)에 질의가 일치함 (파이썬에서 tsquery를 직접 평가)
+- --db: to_tsquery('simple', …) 파싱, 실제 to_tsvector(lexical_document(…)) 와의 일치,
+        tsvector 어휘소가 lexical_terms와 같은지 확인
+
+하나라도 실패하면 종료 코드 1.
+
+사용 예:
+    python lexical_query_check.py
+    python lexical_query_check.py --db      # 6_RAG_pipeline/.env 의 DB 접속 정보 사용
+"""
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from common.lexical import MAX_QUERY_WORDS, TS_CONFIG, lexical_document, lexical_query, lexical_terms
+
+# (질의, 기대 tsquery)
+EXPECTED = [
+    ("졸업", "'졸업'"),
+    ("졸업 요건", "'졸업' | '요건'"),
+    ("복학신청을", "('복학신청을' | ('복학' & '학신' & '신청'))"),
+    ("재수강은", "('재수강은' | ('재수' & '수강'))"),
+    ("휴학을", "('휴학을' | '휴학')"),
+    ("3.75", "'3.75'"),
+    ("학점 3.75 이상", "'학점' | '3.75' | '이상'"),
+    ("복학신청을 3.75", "('복학신청을' | ('복학' & '학신' & '신청')) | '3.75'"),
+    ("CSE101 재수강", "'cse101' | ('재수강' | '재수')"),
+    ("졸업 졸업 요건", "'졸업' | '요건'"),
+    ("", None),
+    ("?!  ...", None),
+]
+
+# (질의, 일치해야 하는 문서) - 조사/어미만 다른 문서도 bigram 그룹으로 일치
+MATCHES = [
+    ("복학신청을 언제", "복학신청은 학기 시작 전까지 합니다."),
+    ("졸업요건 알려줘", "졸업요건: 130학점 이상"),
+    ("평점 3.75", "평점평균 3.75 이상이면 조기졸업 가능"),
+    ("CSE101 재수강", "cse101 과목은 재수강할 수 있습니다."),
+]
+
+_TERM_LITERAL = re.compile(r"'([^']*)'")
+
+
+def query_terms(query):
+    return _TERM_LITERAL.findall(query or "")
+
+
+def evaluate(query, document):
+    """tsquery(|, &, 괄호, 작은따옴표 용어)를 document의 lexical_terms 집합에 대해 평가"""
+    terms = set(lexical_terms(document))
+    expression = _TERM_LITERAL.sub(lambda m: repr(m.group(1) in terms), query)
+    expression = expression.replace("|", " or ").replace("&", " and ")
+    return bool(eval(expression, {"__builtins__": {}}))
+
+
+def run_checks():
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+            print(f"FAIL {message}")
+
+    for text, expected in EXPECTED:
+        actual = lexical_query(text)
+        check(actual == expected, f"lexical_query({text!r}) = {actual!r}, expected {expected!r}")
+
+    words = [f"단어{i}번" for i in range(MAX_QUERY_WORDS + 4)]
+    capped = lexical_query(" ".join(words))
+    kept = [word for word in words if word in query_terms(capped)]
+    check(kept == words[:MAX_QUERY_WORDS], f"MAX_QUERY_WORDS: kept {kept} in {capped!r}")
+
+    for text, _ in EXPECTED + MATCHES:
+        query = lexical_query(text)
+        if query is None:
+            continue
+        indexed = set(lexical_document(text).split())
+        missing = [term for term in query_terms(query) if term not in indexed]
+        check(not missing, f"terms of {query!r} not indexed by lexical_document({text!r}): {missing}")
+        check(evaluate(query, text), f"{query!r} does not match its own text {text!r}")
+
+    for text, document in MATCHES:
+        query = lexical_query(text)
+        check(evaluate(query, document), f"{query!r} does not match {document!r}")
+    return failures
+
+
+def run_db_checks():
+    """PostgreSQL에서 질의 파싱/일치와 tsvector 어휘소 확인"""
+    import psycopg2
+    from dotenv import load_dotenv
+    from common.db import PoolConfig
+
+    load_dotenv(dotenv_path=BASE_DIR / ".env")
+    failures = []
+    conn = psycopg2.connect(**PoolConfig.from_env().connect_kwargs())
+    try:
+        with conn.cursor() as cursor:
+            for text, document in [(text, text) for text, _ in EXPECTED] + MATCHES:
+                query = lexical_query(text)
+                if query is None:
+                    continue
+                try:
+                    cursor.execute(
+                        f"SELECT to_tsvector('{TS_CONFIG}', %s) @@ to_tsquery('{TS_CONFIG}', %s), "
+                        f"tsvector_to_array(to_tsvector('{TS_CONFIG}', %s))",
+                        (lexical_document(document), query, lexical_document(document))
+                    )
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    failures.append(f"to_tsquery({query!r}): {e.pgerror or e}")
+                    print(f"FAIL {failures[-1]}")
+                    continue
+                matched, lexemes = cursor.fetchone()
+                if not matched:
+                    failures.append(f"db: {query!r} does not match {document!r}")
+                    print(f"FAIL {failures[-1]}")
+                if set(lexemes) != set(lexical_terms(document)):
+                    failures.append(f"db: tsvector of {document!r} = {sorted(lexemes)}")
+                    print(f"FAIL {failures[-1]}")
+    finally:
+        conn.close()
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="어휘 검색 질의 확인")
+    parser.add_argument("--db", action="store_true", help="PostgreSQL to_tsquery 파싱/일치도 확인")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    failures = run_checks()
+    db_failures = run_db_checks() if args.db else []
+    print(json.dumps({
+        "cases": len(EXPECTED) + len(MATCHES),
+        "failures": len(failures),
+        "db_failures": len(db_failures) if args.db else None
+    }, ensure_ascii=False, indent=2))
+    sys.exit(1 if failures or db_failures else 0)
+
+
+if __name__ == "__main__":
+    main()
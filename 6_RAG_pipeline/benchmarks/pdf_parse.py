@@ -0,0 +1,131 @@
+"""
+PDF 파싱 경로 벤치마크 (수집 Lambda)
+
+기존 경로와 메모리 파싱 경로의 콜드 파싱 시간을 비교합니다.
+모드마다 새 파이썬 프로세스를 띄워(콜드 스타트와 같은 조건) PDF 백엔드 import + 전체 페이지 텍스트 추출 시간을 잽니다.
+
+- tempfile : 임시 파일에 쓰고 PyPDFLoader로 다시 읽기 (기존 Lambda 경로)
+- memory   : 바이트를 PyMuPDF에 그대로 전달 (common/pdf_source.py, 기본 경로)
+- spool    : PARSE_MEMORY_LIMIT 초과 시의 디스크 스풀 + PyMuPDF
+
+입력은 로컬 파일(--file) 또는 S3 객체(--bucket/--key)이며, S3의 경우 내려받는 시간도 포함됩니다.
+
+사용 예:
+    pip install pymupdf pypdf langchain-community
+    python pdf_parse.py --file ../../5_RAG/data/univ-data.pdf --runs 5
+    python pdf_parse.py --bucket my-bucket --key documents/xxx_univ-data.pdf --modes tempfile,memory
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+MODES = ("tempfile", "memory", "spool")
+DEFAULT_FILE = Path(__file__).resolve().parent.parent.parent / "5_RAG" / "data" / "univ-data.pdf"
+
+
+class LocalObjectClient:
+    """로컬 파일을 S3 get_object/download_fileobj 처럼 읽는 대체 클라이언트"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get_object(self, Bucket, Key):
+        return {"ContentLength": os.path.getsize(self.path), "Body": open(self.path, "rb")}
+
+    def download_fileobj(self, Bucket, Key, fileobj):
+        with open(self.path, "rb") as f:
+            while True:
+                block = f.read(1024 * 1024)
+                if not block:
+                    break
+                fileobj.write(block)
+
+
+def run_child(args):
+    """한 가지 모드를 현재 프로세스에서 실행하고 결과를 JSON 한 줄로 출력"""
+    from common.ingest_pipeline import peak_rss_mb
+
+    if args.bucket:
+        import boto3
+        client = boto3.client("s3")
+    else:
+        client = LocalObjectClient(args.file)
+
+    started = time.perf_counter()
+    pages = chars = 0
+    if args.child == "tempfile":
+        from langchain_community.document_loaders import PyPDFLoader
+        imported = time.perf_counter()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+            client.download_fileobj(args.bucket, args.key, tmp_file)
+            pdf_path = tmp_file.name
+        try:
+            for page in PyPDFLoader(pdf_path).lazy_load():
+                pages += 1
+                chars += len(page.page_content)
+        finally:
+            os.remove(pdf_path)
+    else:
+        from common.pdf_source import open_s3_pdf
+        import pymupdf  # noqa: F401  (import 시간을 따로 측정)
+        imported = time.perf_counter()
+        memory_limit = 0 if args.child == "spool" else None
+        with open_s3_pdf(client, args.bucket, args.key, memory_limit=memory_limit) as pdf:
+            for _, text in pdf.pages():
+                pages += 1
+                chars += len(text)
+    finished = time.perf_counter()
+
+    print(json.dumps({
+        "import_ms": round((imported - started) * 1000, 1),
+        "parse_ms": round((finished - imported) * 1000, 1),
+        "total_ms": round((finished - started) * 1000, 1),
+        "pages": pages,
+        "chars": chars,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="PDF 파싱 경로 벤치마크")
+    parser.add_argument("--file", default=str(DEFAULT_FILE), help="로컬 PDF (--bucket이 없을 때)")
+    parser.add_argument("--bucket", default=None)
+    parser.add_argument("--key", default=None)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--runs", type=int, default=5, help="모드별 반복 횟수 (매번 새 프로세스)")
+    parser.add_argument("--child", choices=MODES, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    source = ["--bucket", args.bucket, "--key", args.key] if args.bucket else ["--file", args.file]
+    print(f"{'mode':<9} {'import_ms':>10} {'parse_ms':>10} {'total_ms':>10} {'pages':>6} {'chars':>9} {'rss_mb':>7}")
+    for mode in args.modes.split(","):
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, *source],
+                check=True, capture_output=True, text=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        median = {name: statistics.median(run[name] for run in runs)
+                  for name in ("import_ms", "parse_ms", "total_ms", "peak_rss_mb")}
+        print(f"{mode:<9} {median['import_ms']:>10.1f} {median['parse_ms']:>10.1f} {median['total_ms']:>10.1f} "
+              f"{runs[0]['pages']:>6} {runs[0]['chars']:>9} {median['peak_rss_mb']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+분할기 동일성 확인 (TokenLineSplitter vs LangChain)
+
+수집 Lambda의 TokenLineSplitter(common/lean_ingest.py)가 기존 분할기
+CharacterTextSplitter.from_tiktoken_encoder(chunk_size=500, chunk_overlap=50, separator="\\n")와
+같은 청크를 만드는지 확인합니다. 청크가 바뀌면 chunk_hash가 달라져 재수집 때 전부 다시 임베딩되므로,
+분할기를 고친 뒤에는 이 스크립트를 실행합니다.
+
+- PDF: 5_RAG/data/*.pdf (또는 --files) 의 모든 페이지 텍스트 (PyMuPDF, Lambda와 같은 추출)
+- 합성 입력: 구분자 없는 긴 줄, 빈/공백 페이지, 구분자로 시작/끝나는 텍스트, chunk_size 경계 줄 등
+
+페이지/입력마다 split_text 결과가 바이트 단위로 같아야 하며, 하나라도 다르면 종료 코드 1.
+
+사용 예:
+    pip install langchain-text-splitters tiktoken pymupdf
+    python splitter_equivalence.py
+    python splitter_equivalence.py --files ../../5_RAG/data/univ-data.pdf --show 3
+"""
+import sys
+import json
+import glob
+import argparse
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PATTERN = str(BASE_DIR.parent / "5_RAG" / "data" / "*.pdf")
+
+sys.path.append(str(BASE_DIR))
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+SEPARATOR = "\n"
+
+
+def synthetic_cases():
+    """PDF에 드물게 나오는 경계 입력 (이름, 텍스트)"""
+    line = "휴학 신청은 학기 개시일 전까지 학사 포털에서 할 수 있습니다."
+    return [
+        ("empty", ""),
+        ("whitespace_only", "   \t  "),
+        ("newlines_only", "\n\n\n"),
+        ("whitespace_lines", " \n\t\n  \n"),
+        ("long_line_korean", "가나다라마바사" * 600),
+        ("long_line_ascii", "lorem ipsum dolor sit amet " * 300),
+        ("long_line_between_short", f"{line}\n{'졸업요건' * 800}\n{line}"),
+        ("leading_trailing_separator", f"\n\n{line}\n{line}\n\n"),
+        ("blank_lines_between", f"{line}\n\n\n{line}\n \n{line}"),
+        ("many_short_lines", "\n".join(f"{i}. {line}" for i in range(200))),
+        ("lines_near_chunk_size", "\n".join(("학점" * 240, "학점" * 250, "학점" * 10, "학점" * 245))),
+        ("overlap_sized_lines", "\n".join("과목 " * 24 for _ in range(60))),
+        ("crlf", f"{line}\r\n{line}\r\n"),
+        ("mixed", "CSE101 재수강 3.75\n\n" + "\n".join(["- 3 -", line, "학사 행정 정보"] * 50)),
+    ]
+
+
+def pdf_cases(patterns):
+    """PDF 파일별 페이지 텍스트 (이름, 텍스트)"""
+    import pymupdf
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not paths:
+        raise SystemExit(f"PDF를 찾지 못했습니다: {patterns}")
+    for path in paths:
+        with pymupdf.open(path) as doc:
+            for number in range(doc.page_count):
+                yield f"{Path(path).name}:{number + 1}", doc.load_page(number).get_text()
+
+
+def compare(cases, reference, lean, show):
+    """입력마다 두 분할기의 청크를 비교하고 (입력 수, 청크 수, 불일치 목록) 반환"""
+    inputs = chunks = 0
+    mismatched = []
+    for name, text in cases:
+        expected, actual = reference.split_text(text), lean.split_text(text)
+        inputs += 1
+        chunks += len(expected)
+        if [c.encode("utf-8") for c in expected] != [c.encode("utf-8") for c in actual]:
+            mismatched.append(name)
+            if len(mismatched) <= show:
+                first = next(
+                    (i for i, (a, b) in enumerate(zip(expected, actual)) if a != b),
+                    min(len(expected), len(actual))
+                )
+                print(f"{name}: langchain {len(expected)} chunks, lean {len(actual)} chunks, 첫 차이 청크 {first}")
+    return inputs, chunks, mismatched
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="TokenLineSplitter / LangChain 분할기 동일성 확인")
+    parser.add_argument("--files", nargs="*", default=[DEFAULT_PATTERN], help="PDF 경로 또는 glob 패턴")
+    parser.add_argument("--no-pdf", action="store_true", help="합성 입력만 확인")
+    parser.add_argument("--show", type=int, default=10, help="자세히 출력할 불일치 수")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    from langchain_text_splitters import CharacterTextSplitter
+    from common.lean_ingest import TokenLineSplitter
+
+    reference = CharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, separator=SEPARATOR
+    )
+    lean = TokenLineSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, separator=SEPARATOR)
+
+    results = {"synthetic": compare(synthetic_cases(), reference, lean, args.show)}
+    if not args.no_pdf:
+        results["pdf"] = compare(pdf_cases(args.files), reference, lean, args.show)
+
+    print(json.dumps({
+        kind: {"inputs": inputs, "chunks": chunks, "mismatched": len(mismatched), "examples": mismatched[:args.show]}
+        for kind, (inputs, chunks, mismatched) in results.items()
+    }, ensure_ascii=False, indent=2))
+    sys.exit(1 if any(mismatched for _, _, mismatched in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
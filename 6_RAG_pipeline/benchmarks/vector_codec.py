@@ -0,0 +1,161 @@
+"""
+벡터 직렬화 벤치마크 (텍스트 리터럴 vs pgvector 바이너리)
+
+클라이언트 쪽에서 벡터 하나를 보내고 받는 데 드는 시간과 전송 바이트를 비교합니다.
+
+- query : 검색 질의 1건 - 질의 벡터 인코딩 + 결과 벡터 k개 디코딩 (관리자 API find_similar_chunks)
+    text    '[x1,...]' 문자열 생성 → 결과 텍스트를 split 후 np.array (기존 서버 경로)
+    binary  float32 np.ndarray → pgvector 바이너리, 결과는 np.frombuffer (common/pgvector_codec.py)
+- chunk : 수집 청크 1개의 벡터 인코딩
+    text    execute_values용 텍스트 리터럴 (INSERT_METHOD=values)
+    binary  COPY (FORMAT binary)용 인코딩 (common/bulk_insert.py, 기본 경로)
+
+--db 를 주면 psycopg 3 연결로 document_vectors에서 k개 벡터를 text/binary 형식으로 읽는
+왕복 시간도 함께 잽니다 (6_RAG_pipeline/.env 의 DB 접속 정보 사용).
+
+사용 예:
+    python vector_codec.py --runs 2000 --k 3
+    python vector_codec.py --db --k 10
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=BASE_DIR / ".env")
+sys.path.append(str(BASE_DIR))
+from common.bulk_insert import encode_vector as encode_copy_vector
+from common.pgvector_codec import (
+    as_float32, encode_vector, decode_vector, vector_literal
+)
+from common.quantization import VECTOR_DIMENSIONS
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+def measure(fn, runs):
+    """fn()을 runs회 실행한 µs 목록"""
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    return latencies
+
+
+def text_query(embedding, results):
+    literal = "[" + ",".join(map(str, embedding)) + "]"
+    vectors = [np.array(value.strip("[]").split(","), dtype=float) for value in results]
+    return literal, vectors
+
+
+def binary_query(embedding, results):
+    data = encode_vector(as_float32(embedding))
+    vectors = [decode_vector(value) for value in results]
+    return data, vectors
+
+
+def client_cases(args):
+    rng = random.Random(args.seed)
+    # Titan 응답(JSON → 파이썬 float 리스트)과 같은 형태의 질의/결과 벡터
+    embedding = [rng.uniform(-0.1, 0.1) for _ in range(args.dimensions)]
+    stored = [np.array([rng.uniform(-0.1, 0.1) for _ in range(args.dimensions)], dtype=np.float32)
+              for _ in range(args.k)]
+    text_results = [vector_literal(vector) for vector in stored]
+    binary_results = [encode_vector(vector) for vector in stored]
+
+    cases = [
+        ("query", "text", lambda: text_query(embedding, text_results),
+         len(text_query(embedding, text_results)[0]) + sum(map(len, text_results))),
+        ("query", "binary", lambda: binary_query(embedding, binary_results),
+         len(encode_vector(embedding)) + sum(map(len, binary_results))),
+        ("chunk", "text", lambda: "[" + ",".join(map(str, embedding)) + "]",
+         len("[" + ",".join(map(str, embedding)) + "]")),
+        ("chunk", "binary", lambda: encode_copy_vector(embedding), len(encode_copy_vector(embedding))),
+    ]
+    results = []
+    for scope, codec, fn, size in cases:
+        fn()
+        latencies = measure(fn, args.runs)
+        results.append({
+            "scope": scope,
+            "codec": codec,
+            "bytes": size,
+            "p50_us": round(percentile(latencies, 0.5), 1),
+            "p95_us": round(percentile(latencies, 0.95), 1),
+        })
+    return results
+
+
+def db_cases(args):
+    """document_vectors에서 k개 벡터를 text/binary 결과 형식으로 읽는 왕복 시간"""
+    import psycopg
+    from common.db import PoolConfig
+    from common.pgvector_codec import register_vector_info
+    from psycopg.types import TypeInfo
+
+    results = []
+    with psycopg.connect(**PoolConfig.from_env().connect_kwargs(), autocommit=True) as conn:
+        register_vector_info(conn, TypeInfo.fetch(conn, "vector"))
+        query_vector = conn.execute("SELECT embedding FROM document_vectors LIMIT 1", binary=True).fetchone()[0]
+        sql = "SELECT embedding FROM document_vectors ORDER BY embedding <=> %s LIMIT %s"
+        for codec, binary in (("text", False), ("binary", True)):
+            def run():
+                return conn.execute(sql, (query_vector, args.k), binary=binary).fetchall()
+            run()
+            latencies = [value / 1000 for value in measure(run, args.db_runs)]
+            results.append({
+                "scope": "db",
+                "codec": codec,
+                "bytes": None,
+                "p50_ms": round(percentile(latencies, 0.5), 3),
+                "p95_ms": round(percentile(latencies, 0.95), 3),
+            })
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="벡터 직렬화 벤치마크 (text vs binary)")
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=3, help="질의당 결과 벡터 수")
+    parser.add_argument("--dimensions", type=int, default=VECTOR_DIMENSIONS)
+    parser.add_argument("--db", action="store_true", help="DB 왕복(document_vectors 조회)도 측정")
+    parser.add_argument("--db-runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = client_cases(args)
+    db_results = db_cases(args) if args.db else []
+
+    if args.json:
+        print(json.dumps({"client": results, "db": db_results}, indent=2))
+        return
+    print(f"dimensions={args.dimensions} k={args.k} runs={args.runs}")
+    print(f"{'scope':<6} {'codec':<7} {'bytes':>8} {'p50_us':>9} {'p95_us':>9}")
+    for r in results:
+        print(f"{r['scope']:<6} {r['codec']:<7} {r['bytes']:>8} {r['p50_us']:>9.1f} {r['p95_us']:>9.1f}")
+    for scope in ("query", "chunk"):
+        text, binary = [r for r in results if r["scope"] == scope]
+        print(f"{scope}: {text['p50_us'] - binary['p50_us']:.1f}us, "
+              f"{text['bytes'] - binary['bytes']} bytes saved per {scope} (p50)")
+    if db_results:
+        print(f"{'scope':<6} {'codec':<7} {'p50_ms':>8} {'p95_ms':>8}")
+        for r in db_results:
+            print(f"{r['scope']:<6} {r['codec']:<7} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+벡터 테이블 분리 벤치마크 (inline vs split)
+
+사용자 API 검색(top-k의 content, metadata)을 두 가지 레이아웃으로 실행해 비교합니다.
+
+- inline : documents.embedding 으로 정렬하며 content, metadata를 함께 읽는 기존 방식
+- split  : document_vectors 에서 top-k를 구하고 최종 k개의 본문만 조인 (common/vector_table.py)
+
+질의마다 EXPLAIN (ANALYZE, BUFFERS) 의 공유 버퍼 hit/read 블록 수와 실행 시간,
+그리고 같은 SQL을 실제로 실행한 왕복 지연을 잽니다. 테이블/인덱스 크기도 함께 출력합니다.
+
+inline은 migrate_vector_table.py --drop-inline 전(documents.embedding 컬럼이 남아 있을 때)에만 측정할 수 있습니다.
+첫 번째 모드가 캐시를 데우지 않도록 --warmup 회 먼저 실행합니다.
+
+사용 예:
+    python vector_layout.py --queries 100 --k 3
+    python vector_layout.py --layouts split --queries 200 --ef-search 100
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+import psycopg2
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=BASE_DIR / ".env")
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig
+from common.vector_table import VECTOR_TABLE, top_k_sql
+
+LAYOUTS = ("inline", "split")
+
+INLINE_SQL = """
+    SELECT content, metadata FROM documents
+    ORDER BY embedding <=> %(embedding)s::vector LIMIT %(k)s
+"""
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+def layout_sql(layout):
+    return INLINE_SQL if layout == "inline" else top_k_sql(["content", "metadata"], storage="full")
+
+
+def explain(cursor, sql, params):
+    """(shared hit, shared read, 실행 ms)"""
+    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0][0]
+    root = plan["Plan"]
+    return root.get("Shared Hit Blocks", 0), root.get("Shared Read Blocks", 0), plan["Execution Time"]
+
+
+def relation_sizes(cursor):
+    sizes = {}
+    for table in ("documents", VECTOR_TABLE):
+        cursor.execute("SELECT pg_relation_size(%s), pg_total_relation_size(%s)", (table, table))
+        heap, total = cursor.fetchone()
+        sizes[table] = {"heap_mb": round(heap / 1024 / 1024, 1), "total_mb": round(total / 1024 / 1024, 1)}
+    return sizes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="벡터 테이블 분리 벤치마크")
+    parser.add_argument("--layouts", default=",".join(LAYOUTS))
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 레이아웃별 실행 횟수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = psycopg2.connect(**PoolConfig.from_env().connect_kwargs())
+    conn.autocommit = True
+    cursor = conn.cursor()
+    if args.ef_search:
+        cursor.execute("SELECT set_config('hnsw.ef_search', %s, false)", (str(args.ef_search),))
+
+    cursor.execute(f"SELECT chunk_id FROM {VECTOR_TABLE}")
+    ids = [row[0] for row in cursor.fetchall()]
+    random.Random(args.seed).shuffle(ids)
+    cursor.execute(f"SELECT embedding::text FROM {VECTOR_TABLE} WHERE chunk_id = ANY(%s)", (ids[:args.queries],))
+    queries = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns WHERE table_name = 'documents' AND column_name = 'embedding'
+    """)
+    has_inline = cursor.fetchone() is not None
+
+    results = []
+    for layout in args.layouts.split(","):
+        if layout == "inline" and not has_inline:
+            print("inline: documents.embedding 컬럼 없음 - 건너뜀", file=sys.stderr)
+            continue
+        sql = layout_sql(layout)
+        for vector in queries[:args.warmup]:
+            cursor.execute(sql, {"embedding": vector, "k": args.k, "candidates": args.k})
+            cursor.fetchall()
+        hits, reads, executions, latencies = [], [], [], []
+        for vector in queries:
+            params = {"embedding": vector, "k": args.k, "candidates": args.k}
+            hit, read, execution_ms = explain(cursor, sql, params)
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits.append(hit)
+            reads.append(read)
+            executions.append(execution_ms)
+        results.append({
+            "layout": layout,
+            "shared_hit_blocks": round(statistics.mean(hits), 1),
+            "shared_read_blocks": round(statistics.mean(reads), 1),
+            "execution_ms": round(statistics.median(executions), 2),
+            "p50_ms": round(percentile(latencies, 0.5), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+        })
+    sizes = relation_sizes(cursor)
+    conn.close()
+
+    if args.json:
+        print(json.dumps({"results": results, "sizes": sizes}, indent=2))
+        return
+    print(f"queries={len(queries)} k={args.k}")
+    print(f"{'layout':<7} {'hit_blocks':>10} {'read_blocks':>11} {'exec_ms':>8} {'p50_ms':>8} {'p95_ms':>8}")
+    for r in results:
+        print(f"{r['layout']:<7} {r['shared_hit_blocks']:>10.1f} {r['shared_read_blocks']:>11.1f} "
+              f"{r['execution_ms']:>8.2f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f}")
+    for table, size in sizes.items():
+        print(f"{table}: heap {size['heap_mb']}MB, total {size['total_mb']}MB")
+
+
+if __name__ == "__main__":
+    main()
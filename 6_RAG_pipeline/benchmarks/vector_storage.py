@@ -0,0 +1,134 @@
+"""
+벡터 저장 방식별 재현율-지연 벤치마크 (full / halfvec / binary + 재정렬)
+
+코퍼스에서 청크 벡터를 질의로 뽑아(자기 자신은 결과에서 제외) 다음을 비교합니다.
+
+- 정답: 인덱스를 끈 순차 스캔의 정확한 코사인 top-k
+- 모드별: common/quantization.py 의 nearest_sql (양자화 모드는 재정렬 후보 수별로)
+- recall@k, 질의 지연 p50/p95 (DB 왕복 포함), 사용한 인덱스 크기
+
+양자화 모드는 manage_index.py quantize 로 표현식 인덱스를 먼저 만들어야 하며, 없는 모드는 건너뜁니다.
+
+사용 예:
+    python vector_storage.py --queries 200 --k 3 --candidates 10,20,40,80
+    python vector_storage.py --modes full,binary --candidates 40,100,200 --ef-search 100
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+import psycopg2
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=BASE_DIR / ".env")
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig
+from common.indexes import index_name, list_vector_indexes
+from common.quantization import STORAGE_MODES, nearest_sql, quantized_index_name, search_ef
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+def sample_queries(cursor, count, seed):
+    """질의로 쓸 청크 (id, 벡터 텍스트)"""
+    cursor.execute("SELECT chunk_id FROM document_vectors")
+    ids = [row[0] for row in cursor.fetchall()]
+    random.Random(seed).shuffle(ids)
+    cursor.execute("SELECT chunk_id, embedding::text FROM document_vectors WHERE chunk_id = ANY(%s)", (ids[:count],))
+    return cursor.fetchall()
+
+
+def run_query(conn, sql, params, ef_search=None, exact=False):
+    """트랜잭션 범위 설정으로 검색 한 번 실행 → (id 목록, ms)"""
+    with conn.cursor() as cursor:
+        if exact:
+            cursor.execute("SELECT set_config('enable_indexscan', 'off', true)")
+        if ef_search is not None:
+            cursor.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),))
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        elapsed = (time.perf_counter() - started) * 1000
+    conn.commit()
+    return [row[0] for row in rows], elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="벡터 저장 방식별 재현율-지연 벤치마크")
+    parser.add_argument("--modes", default=",".join(STORAGE_MODES))
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--candidates", default="10,20,40,80", help="재정렬 후보 수 목록 (양자화 모드)")
+    parser.add_argument("--ef-search", type=int, default=None, help="HNSW ef_search (기본: 40 또는 후보 수)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = psycopg2.connect(**PoolConfig.from_env().connect_kwargs())
+    with conn.cursor() as cursor:
+        queries = sample_queries(cursor, args.queries, args.seed)
+    conn.commit()
+    indexes = {index["index"]: index for index in list_vector_indexes(conn)}
+    conn.commit()
+
+    # 자기 자신을 빼고 k개를 비교하도록 k+1개 조회
+    limit = args.k + 1
+    exact_sql = nearest_sql(["chunk_id"], "full")
+    truth = {}
+    for query_id, vector in queries:
+        ids, _ = run_query(conn, exact_sql, {"embedding": vector, "k": limit}, exact=True)
+        truth[query_id] = set([i for i in ids if i != query_id][:args.k])
+
+    results = []
+    for mode in args.modes.split(","):
+        name = index_name("hnsw") if mode == "full" else quantized_index_name(mode)
+        if name not in indexes:
+            print(f"{mode}: 인덱스 {name} 없음 - 건너뜀", file=sys.stderr)
+            continue
+        candidate_counts = [None] if mode == "full" else [int(c) for c in args.candidates.split(",")]
+        sql = nearest_sql(["chunk_id"], mode)
+        for candidates in candidate_counts:
+            ef_search = search_ef(args.ef_search, limit, mode, candidates)
+            recalls, latencies = [], []
+            for query_id, vector in queries:
+                ids, elapsed = run_query(
+                    conn, sql, {"embedding": vector, "k": limit, "candidates": max(candidates or 0, limit)},
+                    ef_search
+                )
+                found = [i for i in ids if i != query_id][:args.k]
+                recalls.append(len(truth[query_id] & set(found)) / max(1, len(truth[query_id])))
+                latencies.append(elapsed)
+            results.append({
+                "mode": mode,
+                "candidates": candidates,
+                "ef_search": ef_search,
+                "recall": round(statistics.mean(recalls), 4),
+                "p50_ms": round(percentile(latencies, 0.5), 2),
+                "p95_ms": round(percentile(latencies, 0.95), 2),
+                "index_mb": round(indexes[name]["size_bytes"] / 1024 / 1024, 1),
+            })
+    conn.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"queries={len(queries)} k={args.k}")
+    print(f"{'mode':<8} {'candidates':>10} {'ef_search':>9} {'recall':>7} {'p50_ms':>8} {'p95_ms':>8} {'index_mb':>9}")
+    for r in results:
+        print(f"{r['mode']:<8} {str(r['candidates'] or '-'):>10} {str(r['ef_search'] or '-'):>9} "
+              f"{r['recall']:>7.4f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['index_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+관리자/사용자 서버가 함께 사용하는 공통 모듈
+
+서버 코드에서는 `6_RAG_pipeline` 디렉토리를 sys.path에 추가한 뒤
+`from common.db import get_pool` 형태로 가져옵니다.
+"""
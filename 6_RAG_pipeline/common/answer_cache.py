@@ -0,0 +1,164 @@
+"""
+시맨틱 답변 캐시
+
+"복학 신청 언제?" / "복학 신청 기간 알려줘" 처럼 표현만 다른 질문에 대해
+검색 + 답변 생성을 다시 하지 않고 이전 답변을 반환합니다.
+
+- 키: 질의 임베딩. 코사인 유사도가 threshold 이상인 가장 가까운 항목을 적중으로 봅니다.
+- 범위: 코퍼스 버전(common/corpus.py). 버전이 바뀌면 캐시 전체를 비웁니다.
+- 검색 설정: answer_scope(ef_search, probes, 하이브리드 설정 등)가 같은 항목끼리만 비교합니다.
+  대화 기록에 의존하는 답변(후속 질문)은 호출 측에서 캐시를 쓰지 않습니다.
+
+환경 변수 (.env):
+    ANSWER_CACHE_ENABLED       true | false (기본 true)
+    ANSWER_CACHE_THRESHOLD     적중 기준 코사인 유사도 (기본 0.92)
+    ANSWER_CACHE_MAX_ENTRIES   최대 항목 수 (기본 1000)
+    ANSWER_CACHE_TTL           항목 유효 시간, 초 (기본 3600)
+"""
+import os
+import time
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def answer_scope(**params) -> str:
+    """검색 설정 지문 (같은 설정으로 검색해 만든 답변끼리만 재사용)"""
+    return repr(sorted(params.items()))
+
+
+class SemanticAnswerCache:
+    """질의 임베딩 유사도 기반 답변 캐시 (스레드 안전)"""
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1000,
+                 ttl: float = 3600, enabled: bool = True):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._vectors = np.empty((0, 0), dtype=np.float32)  # 단위 벡터 행렬
+        self._payloads = []
+        self._scopes = []
+        self._created = []
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticAnswerCache":
+        return cls(
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+            max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+            enabled=os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true",
+        )
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _reset_locked(self, version: Optional[int]):
+        self._version = version
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._payloads = []
+        self._scopes = []
+        self._created = []
+
+    def _check_version_locked(self, version: int):
+        if self._version != version:
+            if self._payloads:
+                self.invalidations += 1
+            self._reset_locked(version)
+
+    def _drop_locked(self, keep: np.ndarray):
+        self._vectors = self._vectors[keep]
+        self._payloads = [p for p, k in zip(self._payloads, keep) if k]
+        self._scopes = [s for s, k in zip(self._scopes, keep) if k]
+        self._created = [c for c, k in zip(self._created, keep) if k]
+
+    def lookup(self, embedding, version: Optional[int],
+               scope: Hashable = None) -> Optional[Tuple[Any, float]]:
+        """(payload, 유사도) 또는 None - scope가 같은 항목 중에서만 찾음"""
+        if not self.enabled or version is None:
+            return None
+        query = self._unit(embedding)
+        with self._lock:
+            self._check_version_locked(version)
+            if not self._payloads:
+                self.misses += 1
+                return None
+
+            # 만료 항목 제거
+            now = time.monotonic()
+            alive = np.array([now - c < self.ttl for c in self._created])
+            if not alive.all():
+                self._drop_locked(alive)
+                if not self._payloads:
+                    self.misses += 1
+                    return None
+
+            similarities = np.where(
+                np.array([s == scope for s in self._scopes]), self._vectors @ query, -np.inf
+            )
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity >= self.threshold:
+                self.hits += 1
+                return self._payloads[best], similarity
+            self.misses += 1
+            return None
+
+    def store(self, embedding, version: Optional[int], payload: Any, scope: Hashable = None):
+        if not self.enabled or version is None:
+            return
+        vector = self._unit(embedding)[None, :]
+        with self._lock:
+            self._check_version_locked(version)
+            self._vectors = vector if not self._payloads else np.vstack([self._vectors, vector])
+            self._payloads.append(payload)
+            self._scopes.append(scope)
+            self._created.append(time.monotonic())
+            overflow = len(self._payloads) - self.max_entries
+            if overflow > 0:
+                keep = np.ones(len(self._payloads), dtype=bool)
+                keep[:overflow] = False
+                self._drop_locked(keep)
+                self.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            self._reset_locked(None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "corpus_version": self._version,
+                "entries": len(self._payloads),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = SemanticAnswerCache.from_env()
+    return _answer_cache
@@ -0,0 +1,63 @@
+"""
+AWS 클라이언트 공통 설정
+
+Bedrock 런타임 클라이언트를 프로세스당 하나만 만들고, 동시에 처리할 요청 수에 맞춰
+botocore 커넥션 풀 크기와 이벤트 루프 기본 스레드풀 크기를 맞춥니다.
+boto3 호출은 동기식이므로 비동기 엔드포인트에서는 스레드풀로 넘겨 실행합니다.
+
+환경 변수 (.env):
+    AWS_REGION                     리전 (기본 us-east-1)
+    BEDROCK_MAX_POOL_CONNECTIONS   Bedrock HTTP 커넥션 풀 크기 = 오프로딩 스레드 수 (기본 50)
+    BEDROCK_MAX_ATTEMPTS           재시도 포함 최대 시도 횟수 (기본 5, adaptive 모드)
+"""
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import boto3
+from botocore.config import Config
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def max_pool_connections() -> int:
+    return int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+
+
+def bedrock_config() -> Config:
+    return Config(
+        max_pool_connections=max_pool_connections(),
+        retries={
+            "max_attempts": int(os.getenv("BEDROCK_MAX_ATTEMPTS", "5")),
+            "mode": "adaptive",
+        },
+    )
+
+
+def get_bedrock_client(region_name: Optional[str] = None):
+    """공유 bedrock-runtime 클라이언트 (boto3 클라이언트는 스레드 안전)"""
+    region_name = region_name or os.getenv("AWS_REGION", "us-east-1")
+    key = ("bedrock-runtime", region_name)
+    if key not in _clients:
+        with _clients_lock:
+            if key not in _clients:
+                _clients[key] = boto3.client(
+                    "bedrock-runtime", region_name=region_name, config=bedrock_config()
+                )
+    return _clients[key]
+
+
+def configure_default_executor(loop: Optional[asyncio.AbstractEventLoop] = None):
+    """
+    이벤트 루프 기본 스레드풀을 Bedrock 커넥션 풀 크기에 맞춤
+
+    LangChain의 ainvoke/astream/aembed_query는 동기 boto3 호출을 기본 실행기로 넘기므로,
+    스레드 수가 커넥션 수보다 적으면 동시 요청이 스레드 대기열에서 줄을 서게 됩니다.
+    """
+    loop = loop or asyncio.get_running_loop()
+    loop.set_default_executor(
+        ThreadPoolExecutor(max_workers=max_pool_connections(), thread_name_prefix="bedrock")
+    )
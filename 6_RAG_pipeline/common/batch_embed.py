@@ -0,0 +1,166 @@
+"""
+청크 임베딩 병렬 처리 (수집 Lambda 등 배치 작업용)
+
+청크마다 embed_query를 순서대로 호출하면 300쪽 PDF에 수 분이 걸립니다.
+ConcurrentEmbedder(embed_concurrently)는 스레드 concurrency개로 동시에 호출하되, Bedrock 스로틀링이 나면
+동시 실행 한도를 절반으로 줄이고(성공이 이어지면 1씩 회복) 지수 백오프 + 지터 후 재시도합니다.
+결과는 입력 순서와 같습니다.
+
+botocore 자체 재시도와 겹치지 않도록 호출 측 클라이언트는 재시도를 끄는 것을 권장합니다
+(`Config(retries={"max_attempts": 1, "mode": "standard"})`).
+
+환경 변수:
+    EMBED_CONCURRENCY    동시 임베딩 요청 수 (기본 8)
+    EMBED_MAX_RETRIES    청크당 최대 재시도 횟수 (기본 8)
+"""
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+THROTTLE_CODES = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+)
+
+
+def is_throttle(exc: BaseException) -> bool:
+    """
+    스로틀링 오류 여부
+
+    LangChain BedrockEmbeddings는 botocore ClientError를 ValueError로 감싸므로
+    예외 체인(__cause__/__context__)과 메시지를 함께 확인합니다.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        code = getattr(exc, "response", {}).get("Error", {}).get("Code") if hasattr(exc, "response") else None
+        if code in THROTTLE_CODES or any(name in str(exc) for name in THROTTLE_CODES):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+class AdaptiveLimiter:
+    """스로틀링 시 한도를 절반으로, 성공 시 조금씩 늘리는 동시 실행 제한 (AIMD)"""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.min_limit = self.limit
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._active >= int(self.limit):
+                self._cond.wait()
+            self._active += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self._active -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)
+                self.min_limit = min(self.min_limit, self.limit)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+@dataclass
+class EmbedStats:
+    chunks: int = 0
+    seconds: float = 0.0
+    chunks_per_sec: float = 0.0
+    retries: int = 0
+    throttles: int = 0
+    concurrency: int = 0
+    min_concurrency: int = 0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class ConcurrentEmbedder:
+    """
+    여러 배치에 걸쳐 스레드풀과 동시 실행 한도(스로틀링 상태)를 유지하는 임베딩 실행기
+
+    스트리밍 수집처럼 배치를 여러 번 나눠 보낼 때 사용합니다. stats는 누적값입니다.
+    """
+
+    def __init__(self, embed_one: Callable[[str], List[float]], concurrency: int = None,
+                 max_retries: int = None, base_delay: float = 0.5, max_delay: float = 20.0):
+        self.embed_one = embed_one
+        self.concurrency = concurrency or int(os.getenv("EMBED_CONCURRENCY", "8"))
+        self.max_retries = int(os.getenv("EMBED_MAX_RETRIES", "8")) if max_retries is None else max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = AdaptiveLimiter(self.concurrency)
+        self.stats = EmbedStats(concurrency=self.concurrency, min_concurrency=self.concurrency)
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed")
+
+    def _embed(self, text: str) -> List[float]:
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                vector = self.embed_one(text)
+            except Exception as e:
+                throttled = is_throttle(e)
+                self.limiter.release(throttled=throttled)
+                if not throttled or attempt >= self.max_retries:
+                    raise
+                with self._stats_lock:
+                    self.stats.throttles += 1
+                    self.stats.retries += 1
+                # full jitter 지수 백오프
+                time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt))))
+                attempt += 1
+                continue
+            self.limiter.release()
+            return vector
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """texts를 동시에 임베딩 (결과 순서 = 입력 순서)"""
+        if not texts:
+            return []
+        started = time.perf_counter()
+        vectors = list(self._executor.map(self._embed, texts))
+        with self._stats_lock:
+            self.stats.chunks += len(texts)
+            self.stats.seconds = round(self.stats.seconds + time.perf_counter() - started, 3)
+            self.stats.chunks_per_sec = (
+                round(self.stats.chunks / self.stats.seconds, 2) if self.stats.seconds else 0.0
+            )
+            self.stats.min_concurrency = int(self.limiter.min_limit)
+        return vectors
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def embed_concurrently(texts: Sequence[str], embed_one: Callable[[str], List[float]],
+                       concurrency: int = None, max_retries: int = None,
+                       base_delay: float = 0.5, max_delay: float = 20.0
+                       ) -> Tuple[List[List[float]], EmbedStats]:
+    """
+    texts를 동시에 임베딩 (결과 순서 = 입력 순서)
+
+    스로틀링은 최대 max_retries번 재시도하고, 그 밖의 오류나 재시도 초과는 그대로 raise합니다.
+    """
+    with ConcurrentEmbedder(embed_one, concurrency, max_retries, base_delay, max_delay) as embedder:
+        vectors = embedder.embed(texts)
+    return vectors, embedder.stats
@@ -0,0 +1,172 @@
+"""
+페이지 머리말/꼬리말 제거 (분할 전 단계)
+
+PDF 페이지마다 붙는 문서 제목, 쪽 번호, 기관명 같은 줄이 청크 본문에 섞이면
+임베딩 토큰과 청크 수가 늘고 generate_response 의 참고 문서(프롬프트)도 지저분해집니다.
+BoilerplateFilter는 문서 전체 페이지를 한 번 훑어(fit) 페이지 위/아래 가장자리에 반복되는 줄을 찾고,
+분할 전에 각 페이지의 가장자리에서만 그 줄을 지웁니다(strip). 본문 중간의 같은 줄은 건드리지 않습니다.
+
+    boilerplate = BoilerplateFilter.from_env()
+    boilerplate.fit(pdf.pages(boilerplate.sample(pdf.page_count)))   # 표본 페이지의 가장자리 줄만 보관
+    for number, text in pdf.pages():                                   # 수집은 다시 한 페이지씩
+        chunks = splitter.split_text(boilerplate.strip(text))
+
+- 줄 비교는 공백 정리 후 그대로 비교하고, 쪽 번호 형태("3", "- 3 -", "3 / 40", "Page 3")만 한 패턴으로 취급
+- 가장자리 줄 EDGE_LINES개 중 BOILERPLATE_MIN_RATIO 이상의 페이지(최소 BOILERPLATE_MIN_PAGES)에 나온 줄을 반복 줄로 판단
+- fit은 페이지 텍스트를 보관하지 않고 가장자리 줄 개수만 세며, 긴 문서는 고르게 뽑은
+  BOILERPLATE_SAMPLE_PAGES개 페이지만 훑습니다 (sample, 메모리와 추가 파싱 시간이 문서 크기와 무관)
+- 제거 전후 토큰 수/청크 수는 record()로 누적해 stats로 보고
+  (수집 Lambda는 원문을 다시 분할하지 않고 record_estimate()로 제거 전 청크 수를 추정)
+
+수집 Lambda와 4_chunk_splite/splitter.py(확인용 화면)가 함께 사용합니다.
+
+환경 변수:
+    BOILERPLATE_STRIP       true | false (기본 true)
+    BOILERPLATE_EDGE_LINES  페이지 위/아래에서 검사할 줄 수 (기본 3)
+    BOILERPLATE_MIN_RATIO   반복 줄로 볼 최소 페이지 비율 (기본 0.5)
+    BOILERPLATE_MIN_PAGES   반복 줄로 볼 최소 페이지 수 (기본 3)
+    BOILERPLATE_SAMPLE_PAGES  fit에 사용할 최대 페이지 수 (기본 50, 0이면 전체)
+"""
+import os
+import re
+import math
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+_PAGE_NUMBER = re.compile(
+    r"^[\W_]*(?:page|p\.?|페이지)?\s*\d{1,4}\s*(?:(?:/|of|쪽|페이지)\s*\d{0,4})?[\W_]*$",
+    re.IGNORECASE
+)
+PAGE_NUMBER_KEY = "<page-number>"
+
+
+def line_key(line: str) -> str:
+    """반복 여부 비교 키 (공백 정리, 쪽 번호 형태는 하나의 키)"""
+    normalized = _WHITESPACE.sub(" ", line).strip()
+    if normalized and _PAGE_NUMBER.match(normalized):
+        return PAGE_NUMBER_KEY
+    return normalized
+
+
+@dataclass
+class BoilerplateStats:
+    pages: int = 0
+    patterns: int = 0
+    lines_removed: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    chunks_before: int = 0
+    chunks_after: int = 0
+
+    @property
+    def token_reduction(self) -> float:
+        if not self.tokens_before:
+            return 0.0
+        return round(1 - self.tokens_after / self.tokens_before, 4)
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), "token_reduction": self.token_reduction}
+
+
+class BoilerplateFilter:
+    """문서 하나의 페이지 위/아래 반복 줄 탐지 및 제거"""
+
+    def __init__(self, enabled: bool = True, edge_lines: int = 3, min_ratio: float = 0.5, min_pages: int = 3,
+                 sample_pages: int = 50):
+        self.enabled = enabled
+        self.edge_lines = edge_lines
+        self.min_ratio = min_ratio
+        self.min_pages = min_pages
+        self.sample_pages = sample_pages
+        self.top: Set[str] = set()
+        self.bottom: Set[str] = set()
+        self.stats = BoilerplateStats()
+
+    @classmethod
+    def from_env(cls) -> "BoilerplateFilter":
+        return cls(
+            enabled=os.getenv("BOILERPLATE_STRIP", "true").lower() == "true",
+            edge_lines=int(os.getenv("BOILERPLATE_EDGE_LINES", "3")),
+            min_ratio=float(os.getenv("BOILERPLATE_MIN_RATIO", "0.5")),
+            min_pages=int(os.getenv("BOILERPLATE_MIN_PAGES", "3")),
+            sample_pages=int(os.getenv("BOILERPLATE_SAMPLE_PAGES", "50"))
+        )
+
+    def _edges(self, text: str) -> Tuple[List[str], List[str]]:
+        keys = [key for key in (line_key(line) for line in text.split("\n")) if key]
+        return keys[:self.edge_lines], keys[-self.edge_lines:]
+
+    def sample(self, page_count: int) -> List[int]:
+        """fit에 사용할 페이지 번호 (sample_pages개를 문서 전체에서 고르게, 0이면 전체)"""
+        if self.sample_pages <= 0 or page_count <= self.sample_pages:
+            return list(range(page_count))
+        step = page_count / self.sample_pages
+        return sorted({int(i * step) for i in range(self.sample_pages)})
+
+    def fit(self, pages: Iterable[Tuple[int, str]]) -> "BoilerplateFilter":
+        """(페이지 번호, 텍스트)를 한 번 훑어 위/아래 반복 줄 패턴을 찾음 (가장자리 줄만 보관)"""
+        top_counts: Counter = Counter()
+        bottom_counts: Counter = Counter()
+        page_count = 0
+        for _, text in pages:
+            page_count += 1
+            if not self.enabled:
+                continue
+            top, bottom = self._edges(text)
+            top_counts.update(set(top))
+            bottom_counts.update(set(bottom))
+        self.stats.pages = page_count
+        threshold = max(self.min_pages, math.ceil(self.min_ratio * page_count))
+        self.top = {key for key, count in top_counts.items() if count >= threshold}
+        self.bottom = {key for key, count in bottom_counts.items() if count >= threshold}
+        self.stats.patterns = len(self.top | self.bottom)
+        return self
+
+    @property
+    def patterns(self) -> List[str]:
+        return sorted(self.top | self.bottom)
+
+    def strip(self, text: str) -> str:
+        """페이지 위/아래 가장자리에서 반복 줄을 연속으로 지운 텍스트 (반복 줄이 아닌 줄을 만나면 멈춤)"""
+        if not (self.top or self.bottom):
+            return text
+        lines = text.split("\n")
+        start = self._edge_cut(lines, self.top)
+        end = len(lines) - self._edge_cut(lines[start:][::-1], self.bottom)
+        if start == 0 and end == len(lines):
+            return text
+        return "\n".join(lines[start:end])
+
+    def _edge_cut(self, lines: List[str], keys: Set[str]) -> int:
+        """앞에서부터 지울 줄 수 (반복 줄 사이의 빈 줄 포함, 최대 edge_lines개의 반복 줄)"""
+        cut = removed = 0
+        for index, line in enumerate(lines):
+            key = line_key(line)
+            if not key:
+                continue
+            if key not in keys or removed >= self.edge_lines:
+                break
+            removed += 1
+            cut = index + 1
+        self.stats.lines_removed += removed
+        return cut
+
+    def record(self, tokens_before: int, tokens_after: int, chunks_before: int, chunks_after: int):
+        """페이지 하나의 제거 전후 토큰/청크 수 누적"""
+        self.stats.tokens_before += tokens_before
+        self.stats.tokens_after += tokens_after
+        self.stats.chunks_before += chunks_before
+        self.stats.chunks_after += chunks_after
+
+    def record_estimate(self, tokens_before: int, tokens_after: int, chunks_after: int, stride: int):
+        """
+        record와 같지만 제거 전 청크 수는 추정 (원문 재분할 생략)
+
+        stride는 청크 하나가 새로 덮는 토큰 수(chunk_size - chunk_overlap)이며,
+        제거된 토큰 수를 stride로 나눈 만큼 청크가 더 있었다고 봅니다.
+        """
+        removed = tokens_before - tokens_after
+        self.record(tokens_before, tokens_after, chunks_after + round(removed / max(1, stride)), chunks_after)
+
@@ -0,0 +1,168 @@
+"""
+청크 일괄 저장 (수집 Lambda 등 psycopg2 배치 작업용)
+
+본문은 documents, 벡터는 좁은 벡터 테이블 document_vectors에 저장합니다 (common/vector_table.py).
+두 테이블은 한 SQL 문(INSERT ... RETURNING 을 CTE로 연결)에서 함께 채웁니다.
+
+청크마다 INSERT 하면서 1536차원 벡터를 텍스트 리터럴로 보내면 문서 하나에 수천 번 왕복합니다.
+write_chunks는 다음 두 방식 중 하나로 batch_size행씩 보냅니다.
+
+- copy   (기본): 임시 테이블에 `COPY ... FROM STDIN (FORMAT binary)` 로 적재한 뒤
+                  `INSERT ... SELECT` 한 번으로 documents/document_vectors에 옮김 (content_tsv는 이때 계산)
+                  벡터는 pgvector 바이너리 형식(float32)으로 전송
+- values        : psycopg2.extras.execute_values 다중 행 INSERT
+
+커밋은 호출 측이 문서 단위로 한 번 수행합니다 (실패 시 문서 전체 롤백).
+
+환경 변수:
+    INSERT_METHOD       copy | values (기본 copy)
+    INSERT_BATCH_SIZE   한 번에 보내는 행 수 (기본 500)
+"""
+import io
+import os
+import sys
+import json
+import time
+import struct
+from array import array
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import psycopg2.extras
+
+from common.lexical import TS_CONFIG
+from common.vector_table import VECTOR_TABLE
+
+INSERT_METHODS = ("copy", "values")
+
+STAGING_TABLE = "documents_staging"
+
+# (content, embedding, metadata(dict), lexical_document, document_file_id, chunk_hash, chunk_index)
+ChunkRow = Tuple[str, Sequence[float], Dict, str, int, str, int]
+
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_TRAILER = struct.pack(">h", -1)
+
+# source(content, embedding, metadata, lexical, document_file_id, chunk_hash, chunk_index) → 두 테이블
+# 한 문서의 배치 안에서 chunk_index가 유일하므로 (document_file_id, chunk_index)로 새 id와 벡터를 짝지음
+_INSERT_SQL = f"""
+    WITH source AS MATERIALIZED (
+        {{source}}
+    ), inserted AS (
+        INSERT INTO documents (content, metadata, content_tsv, document_file_id, chunk_hash, chunk_index)
+        SELECT content, metadata, to_tsvector('{TS_CONFIG}', lexical), document_file_id, chunk_hash, chunk_index
+        FROM source
+        RETURNING id, document_file_id, chunk_index
+    )
+    INSERT INTO {VECTOR_TABLE} (chunk_id, document_file_id, embedding)
+    SELECT i.id, i.document_file_id, s.embedding
+    FROM inserted i
+    JOIN source s ON s.document_file_id = i.document_file_id AND s.chunk_index = i.chunk_index
+"""
+
+
+@dataclass
+class InsertStats:
+    method: str = "copy"
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    rows_per_sec: float = 0.0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _field(data: bytes) -> bytes:
+    return struct.pack(">i", len(data)) + data
+
+
+def encode_vector(vector: Sequence[float]) -> bytes:
+    """pgvector 바이너리 입력 형식: dim(int16), unused(int16), float32[dim] (빅엔디언)"""
+    values = array("f", vector)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return struct.pack(">HH", len(values), 0) + values.tobytes()
+
+
+def encode_copy_binary(rows: Iterable[ChunkRow]) -> bytes:
+    """COPY (FORMAT binary) 스트림 (content, embedding, metadata jsonb, lexical, document_file_id, chunk_hash, chunk_index)"""
+    buffer = io.BytesIO()
+    buffer.write(_COPY_HEADER)
+    for content, embedding, metadata, lexical, document_file_id, digest, chunk_index in rows:
+        buffer.write(struct.pack(">h", 7))
+        buffer.write(_field(content.encode("utf-8")))
+        buffer.write(_field(encode_vector(embedding)))
+        # jsonb 바이너리 형식: 버전 1 + JSON 텍스트
+        buffer.write(_field(b"\x01" + json.dumps(metadata, ensure_ascii=False).encode("utf-8")))
+        buffer.write(_field(lexical.encode("utf-8")))
+        buffer.write(_field(struct.pack(">i", document_file_id)))
+        buffer.write(_field(digest.encode("utf-8")))
+        buffer.write(_field(struct.pack(">i", chunk_index)))
+    buffer.write(_COPY_TRAILER)
+    return buffer.getvalue()
+
+
+def _batches(rows: Sequence[ChunkRow], size: int) -> Iterable[Sequence[ChunkRow]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _copy(cursor, rows: Sequence[ChunkRow], batch_size: int) -> int:
+    cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+            content TEXT,
+            embedding vector,
+            metadata JSONB,
+            lexical TEXT,
+            document_file_id INTEGER,
+            chunk_hash TEXT,
+            chunk_index INTEGER
+        ) ON COMMIT DELETE ROWS
+    """)
+    batches = 0
+    for batch in _batches(rows, batch_size):
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} (content, embedding, metadata, lexical, document_file_id, chunk_hash, chunk_index) "
+            f"FROM STDIN WITH (FORMAT binary)",
+            io.BytesIO(encode_copy_binary(batch))
+        )
+        batches += 1
+    cursor.execute(_INSERT_SQL.format(source=f"SELECT * FROM {STAGING_TABLE}"))
+    cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+    return batches
+
+
+def _values(cursor, rows: Sequence[ChunkRow], batch_size: int) -> int:
+    psycopg2.extras.execute_values(
+        cursor,
+        _INSERT_SQL.format(source=(
+            "SELECT * FROM (VALUES %s) "
+            "AS v (content, embedding, metadata, lexical, document_file_id, chunk_hash, chunk_index)"
+        )),
+        [
+            (content, "[" + ",".join(map(str, embedding)) + "]", json.dumps(metadata), lexical, document_file_id,
+             digest, chunk_index)
+            for content, embedding, metadata, lexical, document_file_id, digest, chunk_index in rows
+        ],
+        template="(%s, %s::vector, %s::jsonb, %s, %s::int, %s, %s::int)",
+        page_size=batch_size
+    )
+    return (len(rows) + batch_size - 1) // batch_size
+
+
+def write_chunks(cursor, rows: List[ChunkRow], method: str = None, batch_size: int = None) -> InsertStats:
+    """청크 행을 일괄 저장 (트랜잭션은 호출 측에서 커밋)"""
+    method = (method or os.getenv("INSERT_METHOD", "copy")).lower()
+    if method not in INSERT_METHODS:
+        raise ValueError(f"Unsupported insert method: {method} (use one of {INSERT_METHODS})")
+    batch_size = max(1, batch_size or int(os.getenv("INSERT_BATCH_SIZE", "500")))
+
+    stats = InsertStats(method=method, rows=len(rows))
+    if not rows:
+        return stats
+    started = time.perf_counter()
+    stats.batches = _copy(cursor, rows, batch_size) if method == "copy" else _values(cursor, rows, batch_size)
+    stats.seconds = round(time.perf_counter() - started, 3)
+    stats.rows_per_sec = round(len(rows) / stats.seconds, 1) if stats.seconds else 0.0
+    return stats
@@ -0,0 +1,148 @@
+"""
+수집 실행 단위 청크 중복 제거
+
+학사 PDF는 머리말/꼬리말, 공지, 표 제목이 여러 페이지에 그대로 반복됩니다.
+RunDeduplicator는 한 번의 수집 실행 안에서 정규화 텍스트(common/embedding_store.text_sha)가 같은 청크를 묶어
+처음 나온 청크(leader)만 임베딩하고, 나머지(follower)는 모드에 따라 처리합니다.
+
+- fanout     (기본): follower도 행으로 저장하되 벡터는 leader의 document_vectors 행에서 SQL로 복사 (임베딩 호출/전송 없음)
+- store_once       : follower 행을 만들지 않고 leader 행 metadata.pages 에 페이지 번호를 모음
+                     (같은 내용이 top-k를 여러 칸 차지하지 않음)
+- off              : 중복 제거 안 함
+
+follower는 파싱 중에는 목록에만 쌓고, 모든 leader가 저장된 뒤 write()에서 한 번에 반영합니다.
+벡터를 메모리에 들고 있지 않으므로 스트리밍 파이프라인의 메모리 상한이 유지됩니다.
+
+환경 변수:
+    DEDUP_MODE   fanout | store_once | off (기본 fanout)
+"""
+import os
+import json
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2.extras
+
+from common.embedding_store import text_sha
+from common.lexical import TS_CONFIG, lexical_document
+from common.vector_table import VECTOR_TABLE
+
+DEDUP_MODES = ("fanout", "store_once", "off")
+
+
+@dataclass
+class DedupStats:
+    mode: str = "fanout"
+    occurrences: int = 0
+    unique: int = 0
+    followers: int = 0
+    missing_leaders: int = 0
+    dedup_ratio: float = 0.0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class RunDeduplicator:
+    """문서 하나의 수집 실행 동안 정규화 텍스트 → leader 청크를 기억"""
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = (mode or os.getenv("DEDUP_MODE", "fanout")).lower()
+        if self.mode not in DEDUP_MODES:
+            raise ValueError(f"Unsupported dedup mode: {self.mode} (use one of {DEDUP_MODES})")
+        self.stats = DedupStats(mode=self.mode)
+        self._leaders: Dict[str, Tuple[str, int]] = {}  # text_sha -> (leader chunk_hash, leader page)
+        self._followers: List[Tuple[str, Dict, str, int, str]] = []  # fanout: (content, metadata, hash, index, leader)
+        self._pages: Dict[str, List[int]] = {}  # store_once: leader chunk_hash -> 페이지 목록
+
+    def register(self, content: str, digest: str, page: int) -> Optional[str]:
+        """처음 나온 텍스트면 leader로 기록하고 None, 이미 나온 텍스트면 leader의 chunk_hash 반환"""
+        self.stats.occurrences += 1
+        if self.mode == "off":
+            self.stats.unique += 1
+            return None
+        key = text_sha(content)
+        leader = self._leaders.get(key)
+        if leader is None:
+            self._leaders[key] = (digest, page)
+            self.stats.unique += 1
+            return None
+        self.stats.followers += 1
+        if self.mode == "store_once":
+            pages = self._pages.setdefault(leader[0], [leader[1]])
+            if page not in pages:
+                pages.append(page)
+        return leader[0]
+
+    def add_follower(self, content: str, metadata: Dict, digest: str, chunk_index: int, leader: str):
+        """fanout 모드 follower (write()에서 leader 벡터를 복사해 저장)"""
+        self._followers.append((content, metadata, digest, chunk_index, leader))
+
+    def write(self, cursor, document_file_id: int, page_size: int = 500) -> int:
+        """follower 반영 (leader 행이 모두 저장된 뒤 같은 트랜잭션에서 호출), 새로 저장한 행 수 반환
+
+        leader 벡터를 먼저 찾아 짝이 있는 follower만 documents/벡터 행을 함께 만듭니다.
+        leader 벡터가 없는 follower는 저장하지 않고 stats.missing_leaders 로 남깁니다.
+        """
+        document_file_id = int(document_file_id)
+        inserted = 0
+        if self._followers:
+            rows = psycopg2.extras.execute_values(
+                cursor,
+                f"""
+                WITH v (content, metadata, lexical, chunk_hash, chunk_index, source_hash) AS (VALUES %s),
+                src AS MATERIALIZED (
+                    SELECT v.*, leader.embedding
+                    FROM v
+                    JOIN LATERAL (
+                        SELECT dv.embedding FROM documents d
+                        JOIN {VECTOR_TABLE} dv ON dv.chunk_id = d.id
+                        WHERE d.document_file_id = {document_file_id} AND d.chunk_hash = v.source_hash
+                        LIMIT 1
+                    ) AS leader ON TRUE
+                ), inserted AS (
+                    INSERT INTO documents (content, metadata, content_tsv, document_file_id, chunk_hash, chunk_index)
+                    SELECT content, metadata::jsonb, to_tsvector('{TS_CONFIG}', lexical),
+                           {document_file_id}, chunk_hash, chunk_index::int
+                    FROM src
+                    RETURNING id, chunk_index
+                )
+                INSERT INTO {VECTOR_TABLE} (chunk_id, document_file_id, embedding)
+                SELECT i.id, {document_file_id}, src.embedding
+                FROM inserted i
+                JOIN src ON src.chunk_index::int = i.chunk_index
+                RETURNING chunk_id
+                """,
+                [
+                    (content, json.dumps(metadata, ensure_ascii=False), lexical_document(content),
+                     digest, chunk_index, leader)
+                    for content, metadata, digest, chunk_index, leader in self._followers
+                ],
+                page_size=page_size,
+                fetch=True
+            )
+            inserted = len(rows)
+            missing = len(self._followers) - inserted
+            if missing:
+                self.stats.missing_leaders += missing
+                print(f"경고: leader 벡터를 찾지 못한 반복 청크 {missing}개는 저장하지 않았습니다 "
+                      f"(document_file_id={document_file_id})")
+        if self._pages:
+            psycopg2.extras.execute_values(
+                cursor,
+                f"""
+                UPDATE documents AS d
+                SET metadata = d.metadata || jsonb_build_object('pages', v.pages::jsonb)
+                FROM (VALUES %s) AS v (chunk_hash, pages)
+                WHERE d.document_file_id = {document_file_id} AND d.chunk_hash = v.chunk_hash
+                """,
+                [(digest, json.dumps(sorted(pages))) for digest, pages in self._pages.items()],
+                page_size=page_size
+            )
+        self.stats.dedup_ratio = (
+            round(1 - self.stats.unique / self.stats.occurrences, 4) if self.stats.occurrences else 0.0
+        )
+        self._followers.clear()
+        self._pages.clear()
+        self._leaders.clear()
+        return inserted
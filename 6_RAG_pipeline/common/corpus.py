@@ -0,0 +1,124 @@
+"""
+코퍼스 버전
+
+문서가 수집(Lambda)되거나 삭제(delete_document)될 때마다 corpus_version 테이블의
+버전을 1 올립니다. 답변 캐시 등 코퍼스 내용에 의존하는 캐시는 이 버전으로 범위를 나눠,
+버전이 바뀌면 이전 결과를 더 이상 사용하지 않습니다.
+
+같은 트랜잭션에서 CORPUS_CHANNEL로 NOTIFY를 보내며 (커밋 시 전달), 서버의 인메모리 벡터 복제본
+(common/replica.py)이 이를 받아 바뀐 문서의 벡터만 다시 읽습니다.
+    payload: {"op": "upsert" | "delete", "document_file_id": N, "version": 새 버전 또는 null}
+
+환경 변수 (.env):
+    CORPUS_VERSION_TTL   서버가 버전을 다시 읽기까지의 간격, 초 (기본 5)
+"""
+import os
+import json
+import time
+import threading
+from typing import Optional, Tuple
+
+CREATE_CORPUS_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS corpus_version (
+        id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO corpus_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+"""
+
+# 문서 INSERT/DELETE와 같은 트랜잭션에서 실행
+BUMP_CORPUS_VERSION_SQL = """
+    UPDATE corpus_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1
+    RETURNING version
+"""
+
+CORPUS_CHANNEL = "corpus_changed"
+
+SELECT_CORPUS_VERSION_SQL = "SELECT version FROM corpus_version WHERE id = 1"
+
+
+def notify_corpus_change(cursor, op: str, document_file_id: int, version: Optional[int] = None):
+    """코퍼스 변경 알림 (psycopg2 커서, 커밋될 때 LISTEN 중인 서버에 전달)"""
+    cursor.execute("SELECT pg_notify(%s, %s)", (CORPUS_CHANNEL, json.dumps({
+        "op": op, "document_file_id": document_file_id, "version": version
+    })))
+
+
+class CorpusVersion:
+    """TTL 동안 마지막으로 읽은 버전을 재사용하는 버전 조회기"""
+
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self._version: Optional[int] = None
+        self._read_at: Optional[float] = None  # None이면 아직 읽지 않음 (또는 무효화됨)
+        self._warned = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CorpusVersion":
+        return cls(ttl=float(os.getenv("CORPUS_VERSION_TTL", "5")))
+
+    def _cached(self) -> Tuple[bool, Optional[int]]:
+        """(TTL 안의 값인지, 버전) - 테이블이 없어 None을 읽은 경우도 TTL 동안 재사용"""
+        with self._lock:
+            if self._read_at is not None and time.monotonic() - self._read_at < self.ttl:
+                return True, self._version
+        return False, None
+
+    def _remember(self, version: Optional[int]) -> Optional[int]:
+        with self._lock:
+            self._version = version
+            self._read_at = time.monotonic()
+        return version
+
+    def _unavailable(self, error: Exception) -> Optional[int]:
+        """조회 실패(테이블 없음 등): 경고는 한 번만 출력하고 None을 TTL 동안 기억"""
+        if not self._warned:
+            self._warned = True
+            print(f"Warning: corpus_version unavailable, answer cache disabled: {error}")
+        return self._remember(None)
+
+    def get(self, conn) -> Optional[int]:
+        """현재 버전 (테이블이 없으면 None → 호출 측은 캐시를 사용하지 않음)"""
+        fresh, version = self._cached()
+        if fresh:
+            return version
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(SELECT_CORPUS_VERSION_SQL)
+                row = cursor.fetchone()
+        except Exception as e:
+            return self._unavailable(e)
+        return self._remember(row[0] if row else None)
+
+    async def aget(self, pool) -> Optional[int]:
+        """get의 비동기 버전 (AsyncConnectionPool 사용)"""
+        fresh, version = self._cached()
+        if fresh:
+            return version
+        try:
+            async with pool.connection() as conn:
+                cursor = await conn.execute(SELECT_CORPUS_VERSION_SQL)
+                row = await cursor.fetchone()
+        except Exception as e:
+            return self._unavailable(e)
+        return self._remember(row[0] if row else None)
+
+    def invalidate(self):
+        """이 프로세스에서 버전을 올렸을 때 다음 조회에서 바로 다시 읽도록 함"""
+        with self._lock:
+            self._read_at = None
+
+
+_corpus_version: Optional[CorpusVersion] = None
+_corpus_lock = threading.Lock()
+
+
+def get_corpus_version() -> CorpusVersion:
+    global _corpus_version
+    if _corpus_version is None:
+        with _corpus_lock:
+            if _corpus_version is None:
+                _corpus_version = CorpusVersion.from_env()
+    return _corpus_version
@@ -0,0 +1,222 @@
+"""
+PostgreSQL 커넥션 풀
+
+관리자/사용자 서버가 프로세스 단위로 공유하는 커넥션 풀입니다.
+요청마다 새로 연결(TCP + TLS + 인증)하지 않고 열어 둔 연결을 재사용하며,
+연결 수를 DB_POOL_MAX_SIZE 이하로 제한해 RDS의 max_connections 고갈을 막습니다.
+
+- ConnectionPool: psycopg 3(psycopg_pool) 기반 동기 풀
+- AsyncConnectionPool: psycopg 3(psycopg_pool) 기반 비동기 풀
+  (연결마다 pgvector 바이너리 코덱 등록, common/pgvector_codec.py)
+
+환경 변수 (.env):
+    DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD   접속 정보
+    DB_POOL_MIN_SIZE       유휴 상태로 유지할 최소 연결 수 (기본 1)
+    DB_POOL_MAX_SIZE       최대 연결 수 (기본 10)
+    DB_POOL_TIMEOUT        연결을 기다리는 최대 시간, 초 (기본 30)
+    DB_POOL_MAX_LIFETIME   연결 최대 수명, 초 (기본 1800)
+    DB_POOL_MAX_IDLE       최소 개수를 넘는 유휴 연결을 닫는 기준, 초 (기본 300)
+
+두 풀 모두 `pip install "psycopg[binary]" "psycopg-pool>=3.2"` 가 필요합니다 (check= 인자).
+"""
+import os
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class PoolConfig:
+    """커넥션 풀 설정"""
+    host: Optional[str] = None
+    port: int = 5432
+    dbname: Optional[str] = None
+    user: Optional[str] = None
+    password: Optional[str] = None
+    min_size: int = 1
+    max_size: int = 10
+    timeout: float = 30.0
+    max_lifetime: float = 1800.0
+    max_idle: float = 300.0
+    autocommit: bool = True
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            host=os.getenv('DB_HOST'),
+            port=int(os.getenv('DB_PORT', '5432')),
+            dbname=os.getenv('DB_NAME'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            max_idle=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        )
+
+    def connect_kwargs(self) -> Dict:
+        """psycopg2.connect / psycopg.connect 공통 인자"""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "dbname": self.dbname,
+            "user": self.user,
+            "password": self.password,
+        }
+
+
+def _stats(pool, max_size: int) -> Dict:
+    """psycopg_pool 지표를 서버 stats 응답 형식으로 변환"""
+    raw = pool.get_stats()
+    requests = raw.get("requests_num", 0)
+    wait_ms = raw.get("requests_wait_ms", 0)
+    return {
+        "pool_size": raw.get("pool_size", 0),
+        "pool_available": raw.get("pool_available", 0),
+        "max_size": max_size,
+        "requests": requests,
+        "requests_waited": raw.get("requests_queued", 0),
+        "wait_ms_total": wait_ms,
+        "wait_ms_avg": round(wait_ms / requests, 3) if requests else 0.0,
+        "timeouts": raw.get("requests_errors", 0),
+        "connections_opened": raw.get("connections_num", 0),
+        "connections_lost": raw.get("connections_lost", 0),
+    }
+
+
+class ConnectionPool:
+    """
+    psycopg 3 기반 동기 커넥션 풀
+
+    psycopg_pool.ConnectionPool에 PoolConfig를 적용한 래퍼입니다.
+    스레드풀에서 실행되는 관리자 API(문서 목록/삭제, 인덱스 관리)와 사용자 문서 목록이 사용합니다.
+    연결은 꺼낼 때마다 상태를 확인하고(check), max_lifetime/max_idle에 따라 교체/정리됩니다.
+    """
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        from psycopg_pool import ConnectionPool as _Pool
+
+        self.config = config or PoolConfig.from_env()
+        self._pool = _Pool(
+            conninfo="",
+            kwargs={**self.config.connect_kwargs(), "autocommit": self.config.autocommit},
+            min_size=self.config.min_size,
+            max_size=self.config.max_size,
+            timeout=self.config.timeout,
+            max_lifetime=self.config.max_lifetime,
+            max_idle=self.config.max_idle,
+            check=_Pool.check_connection,
+            open=True,
+        )
+
+    def connection(self, timeout: Optional[float] = None):
+        """`with pool.connection() as conn:` 형태로 사용 (대기 시간 초과 시 psycopg_pool.PoolTimeout)"""
+        return self._pool.connection(timeout=timeout)
+
+    def close(self):
+        self._pool.close()
+
+    def stats(self) -> Dict:
+        return _stats(self._pool, self.config.max_size)
+
+
+class AsyncConnectionPool:
+    """
+    psycopg 3 기반 비동기 커넥션 풀
+
+    psycopg_pool.AsyncConnectionPool에 PoolConfig를 적용한 래퍼입니다.
+    """
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        from psycopg_pool import AsyncConnectionPool as _AsyncPool
+
+        self.config = config or PoolConfig.from_env()
+        self._pool = _AsyncPool(
+            conninfo="",
+            kwargs={**self.config.connect_kwargs(), "autocommit": self.config.autocommit},
+            min_size=self.config.min_size,
+            max_size=self.config.max_size,
+            timeout=self.config.timeout,
+            max_lifetime=self.config.max_lifetime,
+            max_idle=self.config.max_idle,
+            check=_AsyncPool.check_connection,
+            configure=self._configure,
+            open=False,
+        )
+        self._opened = False
+        self._vector_info = None
+
+    async def _configure(self, conn):
+        """새 연결에 vector ↔ float32 np.ndarray 바이너리 코덱 등록 (타입 정보는 한 번만 조회)"""
+        from common.pgvector_codec import register_vector_async
+
+        self._vector_info = await register_vector_async(conn, self._vector_info)
+
+    async def open(self):
+        if not self._opened:
+            await self._pool.open()
+            self._opened = True
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None):
+        """`async with pool.connection() as conn:` 형태로 사용"""
+        await self.open()
+        async with self._pool.connection(timeout=timeout) as conn:
+            yield conn
+
+    async def close(self):
+        if self._opened:
+            await self._pool.close()
+            self._opened = False
+
+    def stats(self) -> Dict:
+        return _stats(self._pool, self.config.max_size)
+
+
+# 프로세스 단위 공유 풀
+_pool: Optional[ConnectionPool] = None
+_async_pool: Optional[AsyncConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """프로세스 공유 동기 풀 (최초 호출 시 생성)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def get_async_pool() -> AsyncConnectionPool:
+    """프로세스 공유 비동기 풀 (최초 호출 시 생성)"""
+    global _async_pool
+    if _async_pool is None:
+        with _pool_lock:
+            if _async_pool is None:
+                _async_pool = AsyncConnectionPool()
+    return _async_pool
+
+
+def pool_stats() -> Dict:
+    """생성된 풀들의 지표"""
+    stats = {}
+    if _pool is not None:
+        stats["sync"] = _pool.stats()
+    if _async_pool is not None:
+        stats["async"] = _async_pool.stats()
+    return stats
+
+
+async def close_pools():
+    """서버 종료 시 모든 풀 정리"""
+    global _pool, _async_pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
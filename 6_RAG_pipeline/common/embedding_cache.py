@@ -0,0 +1,264 @@
+"""
+질의 임베딩 캐시
+
+같은 질문(휴학, 복학, 졸업요건 등)이 반복될 때 Titan 임베딩 호출을 생략합니다.
+키는 (모델 ID, 정규화된 질의 텍스트)이며 두 단계로 저장합니다.
+
+- 메모리: 크기 제한 LRU + TTL
+- 디스크(선택): SQLite 파일, 서버를 재시작해도 유지되고 여러 워커가 공유
+  (시작 시와 PRUNE_INTERVAL회 저장마다 만료 항목과 최대 항목 수 초과분을 오래된 순으로 삭제,
+  조회/저장은 이벤트 루프를 막지 않도록 스레드에서 실행)
+
+환경 변수 (.env):
+    EMBED_CACHE_MAX_ENTRIES   메모리 LRU 최대 항목 수 (기본 10000, 0이면 캐시 끔)
+    EMBED_CACHE_TTL           메모리 항목 유효 시간, 초 (기본 86400)
+    EMBED_CACHE_DB_PATH       디스크 캐시 SQLite 경로 (비우면 디스크 캐시 사용 안 함)
+    EMBED_CACHE_DISK_TTL      디스크 항목 유효 시간, 초 (기본 2592000 = 30일)
+    EMBED_CACHE_DISK_MAX_ENTRIES  디스크 최대 항목 수 (기본 100000)
+"""
+import os
+import asyncio
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+# 디스크 계층 정리 주기 (저장 횟수)
+PRUNE_INTERVAL = 256
+
+
+def normalize_query(text: str) -> str:
+    """NFKC 정규화 + 공백 정리 (전각 문자, 연속 공백/줄바꿈 차이를 같은 질의로 취급)"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def cache_key(model_id: str, normalized_text: str) -> str:
+    return hashlib.sha256(f"{model_id}\x00{normalized_text}".encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """SQLite 기반 영속 캐시 (벡터는 float32 BLOB)"""
+
+    def __init__(self, path: str, ttl: float, max_entries: int = 100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.pruned = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS query_embeddings (
+                key TEXT PRIMARY KEY,
+                model_id TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS query_embeddings_created_at ON query_embeddings (created_at)"
+        )
+        self._conn.commit()
+        self.prune()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return array("f", row[0]).tolist()
+
+    def put(self, key: str, model_id: str, vector: List[float]):
+        blob = array("f", vector).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?, ?, ?)",
+                (key, model_id, len(vector), blob, time.time())
+            )
+            self._conn.commit()
+            self._puts += 1
+            due = self._puts % PRUNE_INTERVAL == 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """만료 항목과 max_entries 초과분(오래된 순) 삭제 → 삭제한 항목 수"""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM query_embeddings WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+            removed += self._conn.execute("""
+                DELETE FROM query_embeddings WHERE key IN (
+                    SELECT key FROM query_embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,)).rowcount
+            self._conn.commit()
+            self.pruned += removed
+            return removed
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """메모리 LRU/TTL + 선택적 디스크 계층 임베딩 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 86400,
+                 disk_path: Optional[str] = None, disk_ttl: float = 30 * 86400,
+                 disk_max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path, disk_ttl, disk_max_entries) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        return cls(
+            max_entries=int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "10000")),
+            ttl=float(os.getenv("EMBED_CACHE_TTL", "86400")),
+            disk_path=os.getenv("EMBED_CACHE_DB_PATH") or None,
+            disk_ttl=float(os.getenv("EMBED_CACHE_DISK_TTL", str(30 * 86400))),
+            disk_max_entries=int(os.getenv("EMBED_CACHE_DISK_MAX_ENTRIES", "100000")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, model_id: str, text: str) -> Optional[List[float]]:
+        key = cache_key(model_id, normalize_query(text))
+        vector = self._memory_get(key)
+        if vector is None and self._disk is not None:
+            vector = self._disk_get(key)
+        if vector is None:
+            self._miss()
+        return vector
+
+    def put(self, model_id: str, text: str, vector: List[float]):
+        key = cache_key(model_id, normalize_query(text))
+        self._store(key, vector)
+        if self._disk is not None:
+            self._disk.put(key, model_id, vector)
+
+    def _memory_get(self, key: str) -> Optional[List[float]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            vector, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            del self._entries[key]
+            self.expirations += 1
+            return None
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        """디스크 계층 조회 (적중하면 메모리에 올림)"""
+        vector = self._disk.get(key)
+        if vector is not None:
+            self._store(key, vector)
+            with self._lock:
+                self.disk_hits += 1
+        return vector
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _store(self, key: str, vector: List[float]):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def aget_or_compute(self, model_id: str, text: str,
+                              acompute: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """
+        캐시에 없으면 정규화된 텍스트로 acompute를 호출해 채움
+
+        메모리 계층은 바로 조회하고, SQLite 디스크 계층 조회/저장은 스레드에서 실행합니다.
+        """
+        normalized = normalize_query(text)
+        if not self.enabled:
+            return await acompute(normalized)
+        key = cache_key(model_id, normalized)
+        vector = self._memory_get(key)
+        if vector is None and self._disk is not None:
+            vector = await asyncio.to_thread(self._disk_get, key)
+        if vector is not None:
+            return vector
+
+        self._miss()
+        vector = await acompute(normalized)
+        self._store(key, vector)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.put, key, model_id, vector)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+        if self._disk is not None:
+            stats["disk_entries"] = self._disk.size()
+            stats["disk_max_entries"] = self._disk.max_entries
+            stats["disk_pruned"] = self._disk.pruned
+            stats["disk_path"] = self._disk.path
+        return stats
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """프로세스 공유 임베딩 캐시 (환경 변수로 설정)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache.from_env()
+    return _cache
@@ -0,0 +1,290 @@
+"""
+문서 임베딩 저장소 (내용 주소 기반, 로컬 SQLite)
+
+같은 PDF를 수집 Lambda, 5_RAG(Chroma.from_documents), 8_evaluation(ChromaDBRetriever)이
+각각 다시 임베딩합니다. EmbeddingStore는 (모델 ID, 차원, 정규화된 텍스트 SHA-256)을 키로
+벡터(float32 BLOB)를 파일 하나에 저장하고, 세 경로 모두 Bedrock 호출 전에 먼저 조회합니다.
+
+- 항목마다 추정 토큰 수와 재사용 횟수(hits)를 기록해 절약한 비용을 계산
+- compact(): 오래 쓰지 않은 항목/상한 초과 항목 제거 후 VACUUM
+  (6_RAG_pipeline/admin/server/db/manage_embedding_store.py 로 실행)
+
+질의 임베딩 캐시(common/embedding_cache.py)는 서버 프로세스용 메모리 LRU이고,
+이 저장소는 배치 작업 간에 공유되는 영속 저장소입니다.
+
+환경 변수:
+    EMBED_STORE_PATH            저장소 파일 경로 (기본 6_RAG_pipeline/embedding_store.sqlite3,
+                                Lambda는 설정한 경우에만 사용 - EFS 경로 등)
+    EMBED_STORE_PRICE_PER_1K    1K 토큰당 임베딩 가격, USD (기본 0.0001, Titan Text Embeddings)
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from common.embedding_cache import normalize_query
+
+DEFAULT_STORE_PATH = str(Path(__file__).resolve().parent.parent / "embedding_store.sqlite3")
+DEFAULT_PRICE_PER_1K = 0.0001
+
+# 모델별 임베딩 차원 (키에 포함해 차원이 다른 벡터가 섞이지 않도록 함)
+MODEL_DIMENSIONS = {
+    "amazon.titan-embed-text-v1": 1536,
+    "amazon.titan-embed-text-v2:0": 1024,
+}
+
+
+def text_sha(text: str) -> str:
+    """정규화된 텍스트 SHA-256 (NFKC + 공백 정리 후, 줄바꿈 차이만 있는 청크는 같은 키)"""
+    return hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+
+
+def _file_bytes(path: str) -> int:
+    """SQLite 파일 + WAL 크기"""
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 근사치 (한국어 기준 약 2자당 1토큰)"""
+    return max(1, len(text) // 2)
+
+
+class EmbeddingStore:
+    """(model_id, dim, text_sha) → float32 벡터 영속 저장소 (스레드 안전)"""
+
+    def __init__(self, path: str, price_per_1k: float = DEFAULT_PRICE_PER_1K):
+        self.path = path
+        self.price_per_1k = price_per_1k
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                text_sha TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                tokens INTEGER NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_id, dim, text_sha)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings (last_used)"
+        )
+        # compact()로 지운 항목의 누적 절약 토큰 (통계가 정리 후에도 유지되도록)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS evicted_totals (
+                model_id TEXT PRIMARY KEY,
+                entries INTEGER NOT NULL,
+                saved_tokens INTEGER NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, default_path: Optional[str] = DEFAULT_STORE_PATH) -> Optional["EmbeddingStore"]:
+        """EMBED_STORE_PATH(없으면 default_path)로 생성, 경로가 없으면 None (저장소 사용 안 함)"""
+        path = os.getenv("EMBED_STORE_PATH") or default_path
+        if not path:
+            return None
+        return cls(path, price_per_1k=float(os.getenv("EMBED_STORE_PRICE_PER_1K", str(DEFAULT_PRICE_PER_1K))))
+
+    def get_many(self, model_id: str, dim: int, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """texts 순서대로 저장된 벡터 (없으면 None), 찾은 항목은 hits/last_used 갱신"""
+        keys = [text_sha(text) for text in texts]
+        found: Dict[str, bytes] = {}
+        now = time.time()
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            # SQLite 변수 개수 제한(999)보다 작게 나눠 조회
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_sha, vector FROM embeddings WHERE model_id = ? AND dim = ? "
+                    f"AND text_sha IN ({','.join('?' * len(part))})",
+                    (model_id, dim, *part)
+                ).fetchall()
+                found.update(rows)
+            hit_keys = [key for key in keys if key in found]
+            if hit_keys:
+                self._conn.executemany(
+                    "UPDATE embeddings SET hits = hits + 1, last_used = ? "
+                    "WHERE model_id = ? AND dim = ? AND text_sha = ?",
+                    [(now, model_id, dim, key) for key in hit_keys]
+                )
+                self._conn.commit()
+            self.hits += len(hit_keys)
+            self.misses += len(keys) - len(hit_keys)
+        return [array("f", found[key]).tolist() if key in found else None for key in keys]
+
+    def put_many(self, model_id: str, dim: int, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """벡터 저장 (차원이 dim과 다른 벡터는 저장하지 않음)"""
+        now = time.time()
+        rows = [
+            (model_id, dim, text_sha(text), array("f", vector).tobytes(), estimate_tokens(text), now, now)
+            for text, vector in zip(texts, vectors)
+            if len(vector) == dim
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model_id, dim, text_sha, vector, tokens, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def embed_many(self, model_id: str, dim: int, texts: Sequence[str],
+                   compute: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """저장소에 없는 텍스트만 compute로 임베딩해 채운 뒤 texts 순서대로 반환"""
+        vectors = self.get_many(model_id, dim, texts)
+        # 같은 키(정규화 후 동일한 텍스트)는 한 번만 임베딩
+        missing: Dict[str, List[int]] = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(text_sha(texts[i]), []).append(i)
+        if missing:
+            batch = [texts[indices[0]] for indices in missing.values()]
+            computed = compute(batch)
+            self.put_many(model_id, dim, batch, computed)
+            for indices, vector in zip(missing.values(), computed):
+                for i in indices:
+                    vectors[i] = vector
+        return vectors
+
+    def wrap(self, model_id: str, embed_one: Callable[[str], List[float]],
+             dim: Optional[int] = None) -> Callable[[str], List[float]]:
+        """텍스트 하나를 임베딩하는 함수를 저장소 조회/저장으로 감쌈 (ConcurrentEmbedder 등에 그대로 전달)"""
+        dim = dim or MODEL_DIMENSIONS[model_id]
+
+        def embed(text: str) -> List[float]:
+            return self.embed_many(model_id, dim, [text], lambda batch: [embed_one(batch[0])])[0]
+
+        return embed
+
+    def compact(self, max_age_days: Optional[float] = None, max_entries: Optional[int] = None,
+                keep_models: Optional[Sequence[str]] = None) -> Dict:
+        """
+        항목 정리 후 VACUUM
+
+        Args:
+            max_age_days: 마지막 사용 후 이 기간이 지난 항목 삭제
+            max_entries: 남길 최대 항목 수 (최근 사용 순으로 유지)
+            keep_models: 지정하면 다른 모델의 항목 삭제
+        """
+        before_bytes = _file_bytes(self.path)
+        conditions, params = [], []
+        if max_age_days is not None:
+            conditions.append("last_used < ?")
+            params.append(time.time() - max_age_days * 86400)
+        if keep_models:
+            conditions.append(f"model_id NOT IN ({','.join('?' * len(keep_models))})")
+            params.extend(keep_models)
+        if max_entries is not None:
+            conditions.append("""
+                (model_id, dim, text_sha) NOT IN (
+                    SELECT model_id, dim, text_sha FROM embeddings ORDER BY last_used DESC LIMIT ?
+                )
+            """)
+            params.append(max_entries)
+
+        removed = 0
+        with self._lock:
+            if conditions:
+                where = " OR ".join(f"({condition})" for condition in conditions)
+                self._conn.execute(f"""
+                    INSERT INTO evicted_totals (model_id, entries, saved_tokens)
+                    SELECT model_id, COUNT(*), SUM(hits * tokens) FROM embeddings WHERE {where}
+                    GROUP BY model_id
+                    ON CONFLICT(model_id) DO UPDATE
+                    SET entries = entries + excluded.entries, saved_tokens = saved_tokens + excluded.saved_tokens
+                """, params)
+                removed = self._conn.execute(f"DELETE FROM embeddings WHERE {where}", params).rowcount
+                self._conn.commit()
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            "removed": removed,
+            "bytes_before": before_bytes,
+            "bytes_after": _file_bytes(self.path),
+        }
+
+    def stats(self) -> Dict:
+        """모델별 항목 수/재사용 횟수/절약 추정 비용 (정리된 항목 포함)"""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT model_id, dim, COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(hits * tokens), 0)
+                FROM embeddings GROUP BY model_id, dim
+            """).fetchall()
+            evicted = dict(
+                (model_id, saved) for model_id, saved in
+                self._conn.execute("SELECT model_id, saved_tokens FROM evicted_totals").fetchall()
+            )
+        models = []
+        for model_id, dim, entries, hits, saved_tokens in rows:
+            saved_tokens += evicted.pop(model_id, 0)
+            models.append({
+                "model_id": model_id,
+                "dim": dim,
+                "entries": entries,
+                "reuse_count": hits,
+                "saved_tokens": saved_tokens,
+                "saved_usd": round(saved_tokens / 1000 * self.price_per_1k, 4),
+            })
+        for model_id, saved_tokens in evicted.items():
+            models.append({
+                "model_id": model_id,
+                "entries": 0,
+                "saved_tokens": saved_tokens,
+                "saved_usd": round(saved_tokens / 1000 * self.price_per_1k, 4),
+            })
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "file_bytes": _file_bytes(self.path),
+            "session_hits": self.hits,
+            "session_misses": self.misses,
+            "session_hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "models": models,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class StoreBackedEmbeddings:
+    """
+    LangChain Embeddings 호환 래퍼 (embed_documents / embed_query)
+
+    Chroma.from_documents(embedding=StoreBackedEmbeddings(BedrockEmbeddings(...), store)) 처럼
+    그대로 넘기면 저장소에 없는 텍스트만 Bedrock으로 임베딩합니다.
+    질의(embed_query)는 문서가 아니므로 저장소를 거치지 않고 바로 임베딩합니다.
+    """
+
+    def __init__(self, embeddings, store: Optional[EmbeddingStore], model_id: Optional[str] = None,
+                 dim: Optional[int] = None):
+        self.embeddings = embeddings
+        self.store = store
+        self.model_id = model_id or getattr(embeddings, "model_id", "amazon.titan-embed-text-v1")
+        self.dim = dim or MODEL_DIMENSIONS[self.model_id]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.store is None:
+            return self.embeddings.embed_documents(texts)
+        return self.store.embed_many(self.model_id, self.dim, texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        # 일회성 질의가 문서 저장소에 쌓이지 않도록 그대로 위임
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,165 @@
+"""
+하이브리드 검색 (벡터 ANN + 어휘 검색, Reciprocal Rank Fusion)
+
+두 검색을 한 SQL 문(한 번의 왕복)에서 실행하고 순위를 RRF로 합칩니다.
+벡터 단계는 좁은 벡터 테이블(document_vectors), 어휘 단계와 최종 본문 조회는 documents를 사용합니다.
+
+    score = vector_weight / (rrf_k + vector_rank) + lexical_weight / (rrf_k + lexical_rank)
+
+각 단계의 소요 시간은 DB 안에서 clock_timestamp()로 측정해 행과 함께 반환합니다
+(vector_ms: ANN 후보 검색, lexical_ms: 어휘 후보 검색).
+
+환경 변수 (.env):
+    RETRIEVAL_MODE              vector | hybrid (기본 vector, 요청별로 변경 가능)
+    HYBRID_VECTOR_WEIGHT        기본 1.0
+    HYBRID_LEXICAL_WEIGHT       기본 1.0
+    HYBRID_VECTOR_CANDIDATES    벡터 단계 후보 수 (기본 20)
+    HYBRID_LEXICAL_CANDIDATES   어휘 단계 후보 수 (기본 20)
+    HYBRID_RRF_K                RRF 상수 (기본 60)
+"""
+import os
+from functools import lru_cache
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from common.lexical import lexical_query, TSV_COLUMN, TS_CONFIG
+from common.quantization import nearest_sql, resolve_storage, rescore_candidates
+from common.vector_table import VECTOR_TABLE
+
+RETRIEVAL_MODES = ("vector", "hybrid")
+
+
+@lru_cache(maxsize=None)
+def hybrid_sql(storage: str) -> str:
+    """
+    단계 실행 순서를 InitPlan으로 고정해 구간별 시간을 잽니다:
+    started → vector_leg → vector_done → lexical_leg → lexical_done → 결합
+
+    벡터 단계는 VECTOR_STORAGE에 따라 양자화 인덱스 후보 + full 벡터 재정렬 (common/quantization.py)
+    """
+    vector_candidates = nearest_sql(
+        ["chunk_id"], storage, where="(SELECT t FROM started) IS NOT NULL", limit="%(vector_candidates)s"
+    )
+    return f"""
+    WITH started AS MATERIALIZED (
+        SELECT clock_timestamp() AS t
+    ), vector_leg AS MATERIALIZED (
+        SELECT chunk_id AS id, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+        FROM ({vector_candidates}) candidates
+    ), vector_done AS MATERIALIZED (
+        SELECT clock_timestamp() AS t FROM (SELECT COUNT(*) FROM vector_leg) c
+    ), lexical_leg AS MATERIALIZED (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY score DESC, id) AS rank
+        FROM (
+            SELECT id, ts_rank({TSV_COLUMN}, query) AS score
+            FROM documents, to_tsquery('{TS_CONFIG}', %(tsquery)s) query
+            WHERE {TSV_COLUMN} @@ query AND (SELECT t FROM vector_done) IS NOT NULL
+            ORDER BY score DESC
+            LIMIT %(lexical_candidates)s
+        ) candidates
+    ), lexical_done AS MATERIALIZED (
+        SELECT clock_timestamp() AS t FROM (SELECT COUNT(*) FROM lexical_leg) c
+    ), fused AS (
+        SELECT COALESCE(v.id, l.id) AS id,
+               COALESCE(%(vector_weight)s::float8 / (%(rrf_k)s::float8 + v.rank), 0)
+             + COALESCE(%(lexical_weight)s::float8 / (%(rrf_k)s::float8 + l.rank), 0) AS score,
+               v.rank AS vector_rank, l.rank AS lexical_rank
+        FROM vector_leg v FULL OUTER JOIN lexical_leg l ON v.id = l.id
+        WHERE (SELECT t FROM lexical_done) IS NOT NULL
+    )
+    SELECT d.content, d.metadata, dv.embedding,
+           f.score, f.vector_rank, f.lexical_rank,
+           dv.embedding <=> %(embedding)s::vector AS distance,
+           d.document_file_id, d.chunk_index,
+           EXTRACT(EPOCH FROM vd.t - s.t) * 1000 AS vector_ms,
+           EXTRACT(EPOCH FROM ld.t - vd.t) * 1000 AS lexical_ms
+    FROM fused f
+    JOIN documents d ON d.id = f.id
+    JOIN {VECTOR_TABLE} dv ON dv.chunk_id = f.id
+    CROSS JOIN started s CROSS JOIN vector_done vd CROSS JOIN lexical_done ld
+    ORDER BY f.score DESC
+    LIMIT %(k)s
+"""
+
+
+@dataclass
+class HybridParams:
+    """RRF 가중치와 단계별 후보 수"""
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+    vector_candidates: int = 20
+    lexical_candidates: int = 20
+    rrf_k: int = 60
+
+    @classmethod
+    def from_env(cls) -> "HybridParams":
+        return cls(
+            vector_weight=float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0")),
+            lexical_weight=float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0")),
+            vector_candidates=int(os.getenv("HYBRID_VECTOR_CANDIDATES", "20")),
+            lexical_candidates=int(os.getenv("HYBRID_LEXICAL_CANDIDATES", "20")),
+            rrf_k=int(os.getenv("HYBRID_RRF_K", "60")),
+        )
+
+    def validate(self) -> "HybridParams":
+        if self.vector_weight < 0 or self.lexical_weight < 0:
+            raise ValueError("Hybrid weights must be non-negative")
+        if self.vector_candidates < 1 or self.lexical_candidates < 0:
+            raise ValueError("vector_candidates must be >= 1 and lexical_candidates >= 0")
+        if self.rrf_k < 0:
+            raise ValueError("rrf_k must be non-negative")
+        return self
+
+
+def resolve_hybrid(mode: Optional[str] = None, **overrides) -> Optional[HybridParams]:
+    """
+    요청 값으로 검색 방식 결정
+
+    mode가 없으면 RETRIEVAL_MODE를 따르고, vector면 None(기존 벡터 검색)을 반환합니다.
+    overrides 중 None이 아닌 값만 환경 변수 기본값을 덮어씁니다.
+    """
+    mode = (mode or os.getenv("RETRIEVAL_MODE", "vector")).lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unsupported retrieval mode: {mode} (use one of {RETRIEVAL_MODES})")
+    if mode == "vector":
+        return None
+    values = {key: value for key, value in overrides.items() if value is not None}
+    return replace(HybridParams.from_env(), **values).validate()
+
+
+async def ahybrid_search(conn, embedding, query_text: str, k: int,
+                         params: HybridParams) -> Tuple[List[tuple], Dict]:
+    """
+    하이브리드 검색 (psycopg 3 AsyncConnection)
+
+    embedding은 float32 np.ndarray (바이너리 전송, common/pgvector_codec.py)이며
+    결과의 embedding 열도 np.ndarray로 받습니다.
+
+    distance는 질의와의 코사인 거리 (어휘 단계로만 들어온 후보 포함),
+    document_file_id/chunk_index는 후처리의 이웃 청크 판단용입니다 (common/postprocess.py).
+
+    Returns:
+        ([(content, metadata, embedding, score, vector_rank, lexical_rank,
+           distance, document_file_id, chunk_index), ...],
+         {"vector_ms": ..., "lexical_ms": ...})
+    """
+    vector_candidates = max(params.vector_candidates, k)
+    cursor = await conn.execute(hybrid_sql(resolve_storage()), {
+        "embedding": embedding,
+        "tsquery": lexical_query(query_text),
+        "vector_candidates": vector_candidates,
+        "candidates": rescore_candidates(vector_candidates),
+        "lexical_candidates": params.lexical_candidates,
+        "vector_weight": params.vector_weight,
+        "lexical_weight": params.lexical_weight,
+        "rrf_k": params.rrf_k,
+        "k": k,
+    }, binary=True)
+    rows = await cursor.fetchall()
+    timings = {}
+    if rows:
+        timings = {
+            "vector_ms": round(float(rows[0][9]), 2),
+            "lexical_ms": round(float(rows[0][10]), 2),
+        }
+    return [row[:9] for row in rows], timings
@@ -0,0 +1,109 @@
+"""
+증분 재수집 (청크 단위 내용 해시)
+
+같은 문서를 수정해 다시 올리면 청크 전체를 새로 임베딩해 추가하고 이전 청크는 그대로 남았습니다.
+documents에는 청크마다 chunk_hash(내용 SHA-256)와 chunk_index(문서 내 위치)를 저장하고,
+ChunkReconciler가 재수집 시 기존 청크와 새로 분할한 청크를 비교합니다.
+
+- 같은 내용의 기존 청크가 있으면 벡터를 재사용 (위치/메타데이터만 갱신, 임베딩 호출 없음)
+- 없으면 임베딩 대상으로 남김 (호출 측이 새로 저장)
+- 끝까지 매칭되지 않은 기존 청크는 삭제
+
+갱신/삭제는 호출 측 트랜잭션 안에서 실행되므로 수집이 실패하면 기존 청크가 그대로 남습니다.
+"""
+import json
+import hashlib
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Tuple
+
+import psycopg2.extras
+
+# 기존 DB의 chunk_hash를 id 구간 [%s, %s) 단위로 채우기 (chunk_hash()와 같은 값,
+# admin/server/db/migrate_chunk_hash.py)
+BACKFILL_CHUNK_HASH_SQL = """
+    UPDATE documents SET chunk_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+    WHERE id >= %s AND id < %s AND chunk_hash IS NULL
+"""
+
+
+def chunk_hash(content: str) -> str:
+    """청크 내용 SHA-256 (hex)"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ReconcileStats:
+    existing: int = 0
+    reused: int = 0
+    added: int = 0
+    removed: int = 0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class ChunkReconciler:
+    """문서 하나의 기존 청크와 새 청크를 내용 해시로 맞춰 보는 도우미"""
+
+    def __init__(self, document_file_id: int):
+        self.document_file_id = document_file_id
+        self.stats = ReconcileStats()
+        self._existing = defaultdict(deque)  # chunk_hash -> 기존 행 id (위치 순)
+        self._reused: List[Tuple[int, int, Dict]] = []  # (id, chunk_index, metadata)
+        self._lock = threading.Lock()
+
+    def load(self, cursor) -> int:
+        """기존 청크의 (id, chunk_hash)를 읽어 둠 (chunk_hash가 없는 행은 매칭되지 않아 삭제 대상)"""
+        cursor.execute("""
+            SELECT id, chunk_hash FROM documents
+            WHERE document_file_id = %s
+            ORDER BY chunk_index NULLS LAST, id
+        """, (self.document_file_id,))
+        rows = cursor.fetchall()
+        for row_id, digest in rows:
+            self._existing[digest].append(row_id)
+        self.stats.existing = len(rows)
+        return len(rows)
+
+    def match(self, digest: str, chunk_index: int, metadata: Dict) -> bool:
+        """
+        같은 내용의 기존 청크가 있으면 재사용으로 기록하고 True (호출 측은 임베딩 생략)
+
+        같은 내용이 문서 안에 여러 번 나오면 기존 행을 위치 순서대로 하나씩 배정합니다.
+        파싱 스레드에서 호출해도 되며, DB 반영은 apply()에서 합니다.
+        """
+        with self._lock:
+            ids = self._existing.get(digest)
+            if not ids:
+                self.stats.added += 1
+                return False
+            self._reused.append((ids.popleft(), chunk_index, metadata))
+            self.stats.reused += 1
+            return True
+
+    def apply(self, cursor, page_size: int = 500) -> ReconcileStats:
+        """재사용 청크의 위치/메타데이터 갱신 + 매칭되지 않은 기존 청크 삭제 (커밋은 호출 측)"""
+        if self._reused:
+            psycopg2.extras.execute_values(
+                cursor,
+                """
+                UPDATE documents AS d
+                SET chunk_index = v.chunk_index, metadata = v.metadata::jsonb
+                FROM (VALUES %s) AS v (id, chunk_index, metadata)
+                WHERE d.id = v.id
+                """,
+                [
+                    (row_id, chunk_index, json.dumps(metadata, ensure_ascii=False))
+                    for row_id, chunk_index, metadata in self._reused
+                ],
+                page_size=page_size
+            )
+        stale = [row_id for ids in self._existing.values() for row_id in ids]
+        if stale:
+            cursor.execute("DELETE FROM documents WHERE id = ANY(%s)", (stale,))
+        self.stats.removed = len(stale)
+        self._existing.clear()
+        self._reused.clear()
+        return self.stats
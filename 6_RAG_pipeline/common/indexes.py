@@ -0,0 +1,170 @@
+"""
+document_vectors.embedding ANN 인덱스 관리 (pgvector HNSW / IVFFlat)
+
+인덱스가 없으면 `ORDER BY embedding <=> %s::vector LIMIT k` 가 전체 테이블을
+순차 스캔합니다. 검색은 코사인 거리(<=>)를 사용하므로 vector_cosine_ops로 생성합니다.
+벡터는 청크 본문과 분리된 좁은 테이블에 있습니다 (common/vector_table.py).
+
+- create_vector_index: 인덱스 생성 (CONCURRENTLY 선택)
+- rebuild_vector_index: 새 파라미터로 동시 재생성 후 교체 (검색 중단 없음)
+- drop_vector_index: 인덱스 삭제
+- asearch_params: 쿼리 단위 hnsw.ef_search / ivfflat.probes 적용
+"""
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, List, Optional
+
+TABLE_NAME = "document_vectors"
+COLUMN_NAME = "embedding"
+OPCLASS = "vector_cosine_ops"
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+
+# pgvector 기본값
+DEFAULT_HNSW_M = 16
+DEFAULT_HNSW_EF_CONSTRUCTION = 64
+
+
+def index_name(method: str) -> str:
+    return f"{TABLE_NAME}_{COLUMN_NAME}_{method}_idx"
+
+
+def _validate_method(method: str) -> str:
+    method = method.lower()
+    if method not in INDEX_METHODS:
+        raise ValueError(f"Unsupported index method: {method} (use one of {INDEX_METHODS})")
+    return method
+
+
+def suggest_ivfflat_lists(row_count: int) -> int:
+    """pgvector 권장값: 100만 행 이하 rows/1000, 초과 시 sqrt(rows)"""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(row_count ** 0.5)
+
+
+def _build_sql(method: str, name: str, m: int, ef_construction: int,
+               lists: int, concurrently: bool) -> str:
+    if method == "hnsw":
+        options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        options = f"lists = {int(lists)}"
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+        f"ON {TABLE_NAME} USING {method} ({COLUMN_NAME} {OPCLASS}) WITH ({options})"
+    )
+
+
+@contextmanager
+def _maintenance_work_mem(cursor, value: Optional[str]):
+    """인덱스 빌드 동안만 maintenance_work_mem 상향 (풀 연결에 남기지 않음)"""
+    if not value:
+        yield
+        return
+    cursor.execute("SELECT set_config('maintenance_work_mem', %s, false)", (value,))
+    try:
+        yield
+    finally:
+        cursor.execute("RESET maintenance_work_mem")
+
+
+def _resolve_lists(cursor, lists: Optional[int]) -> int:
+    if lists:
+        return int(lists)
+    cursor.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}")
+    return suggest_ivfflat_lists(cursor.fetchone()[0])
+
+
+def create_vector_index(conn, method: str = "hnsw", m: int = DEFAULT_HNSW_M,
+                        ef_construction: int = DEFAULT_HNSW_EF_CONSTRUCTION,
+                        lists: Optional[int] = None, concurrently: bool = False,
+                        maintenance_work_mem: Optional[str] = None) -> Dict:
+    """
+    ANN 인덱스 생성 (이미 있으면 그대로 둠)
+
+    concurrently=True는 트랜잭션 밖에서 실행되어야 하므로 autocommit 연결이 필요합니다.
+    IVFFlat의 lists를 생략하면 현재 행 수로 계산합니다 (데이터 적재 후 생성 권장).
+    """
+    method = _validate_method(method)
+    name = index_name(method)
+    with conn.cursor() as cursor:
+        if method == "ivfflat":
+            lists = _resolve_lists(cursor, lists)
+        with _maintenance_work_mem(cursor, maintenance_work_mem):
+            cursor.execute(_build_sql(method, name, m, ef_construction, lists, concurrently))
+    return {"index": name, "method": method, "m": m, "ef_construction": ef_construction,
+            "lists": lists if method == "ivfflat" else None}
+
+
+def rebuild_vector_index(conn, method: str = "hnsw", m: int = DEFAULT_HNSW_M,
+                         ef_construction: int = DEFAULT_HNSW_EF_CONSTRUCTION,
+                         lists: Optional[int] = None,
+                         maintenance_work_mem: Optional[str] = None) -> Dict:
+    """
+    새 파라미터로 인덱스를 동시(CONCURRENTLY) 재생성
+
+    임시 이름으로 새 인덱스를 만든 뒤 기존 인덱스를 삭제하고 이름을 바꿉니다.
+    재생성 중에도 기존 인덱스로 검색이 계속 동작합니다. autocommit 연결이 필요합니다.
+    """
+    method = _validate_method(method)
+    name = index_name(method)
+    tmp_name = f"{name}_new"
+    with conn.cursor() as cursor:
+        if method == "ivfflat":
+            lists = _resolve_lists(cursor, lists)
+        # 이전에 실패한 재생성이 남긴 INVALID 인덱스 정리
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {tmp_name}")
+        with _maintenance_work_mem(cursor, maintenance_work_mem):
+            cursor.execute(_build_sql(method, tmp_name, m, ef_construction, lists, True))
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        cursor.execute(f"ALTER INDEX {tmp_name} RENAME TO {name}")
+    return {"index": name, "method": method, "m": m, "ef_construction": ef_construction,
+            "lists": lists if method == "ivfflat" else None}
+
+
+def drop_vector_index(conn, method: str = "hnsw", concurrently: bool = True) -> Dict:
+    """ANN 인덱스 삭제"""
+    method = _validate_method(method)
+    name = index_name(method)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {name}")
+    return {"index": name, "method": method, "dropped": True}
+
+
+def list_vector_indexes(conn) -> List[Dict]:
+    """document_vectors 테이블의 ANN 인덱스 목록과 크기/유효 여부"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT i.relname, am.amname, pg_get_indexdef(i.oid),
+                   pg_relation_size(i.oid), ix.indisvalid
+            FROM pg_index ix
+            JOIN pg_class i ON i.oid = ix.indexrelid
+            JOIN pg_class t ON t.oid = ix.indrelid
+            JOIN pg_am am ON am.oid = i.relam
+            WHERE t.relname = %s AND am.amname IN ('hnsw', 'ivfflat')
+            ORDER BY i.relname
+        """, (TABLE_NAME,))
+        rows = cursor.fetchall()
+    return [
+        {"index": r[0], "method": r[1], "definition": r[2], "size_bytes": r[3], "valid": r[4]}
+        for r in rows
+    ]
+
+
+@asynccontextmanager
+async def asearch_params(conn, ef_search: Optional[int] = None, probes: Optional[int] = None):
+    """
+    쿼리 단위 ANN 검색 파라미터 적용 (psycopg 3 AsyncConnection)
+
+    hnsw.ef_search(기본 40) / ivfflat.probes(기본 1)를 높이면 재현율이 오르고 지연이 늘어납니다.
+    풀에서 공유되는 연결에 설정이 남지 않도록 트랜잭션 범위(set_config(..., true))로만 적용합니다.
+    """
+    if ef_search is None and probes is None:
+        yield
+        return
+
+    async with conn.transaction():
+        if ef_search is not None:
+            await conn.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(int(ef_search)),))
+        if probes is not None:
+            await conn.execute("SELECT set_config('ivfflat.probes', %s, true)", (str(int(probes)),))
+        yield
@@ -0,0 +1,189 @@
+"""
+스트리밍 수집 파이프라인
+
+PDF 전체 페이지와 청크를 메모리에 올린 뒤 임베딩하지 않고, 세 단계를 스레드로 겹쳐 실행합니다.
+
+    [파싱/분할] --queue--> [임베딩] --queue--> [DB 저장]
+
+- 파싱: 페이지를 하나씩 읽어(lazy) 바로 분할하고 batch_size개씩 묶어 넘김
+- 임베딩: ConcurrentEmbedder로 배치를 동시에 임베딩 (스로틀링 상태는 배치 간 유지)
+- 저장: 호출 측 write(batch) (DB 커서는 이 단계를 실행하는 호출 스레드에서만 사용)
+
+큐 크기(queue_size)가 차면 앞 단계가 기다리므로(backpressure) 문서 크기와 관계없이
+메모리에는 최대 약 (2 × queue_size + 3) 배치만 남습니다.
+실행이 끝나면 단계별 소요 시간과 최대 RSS를 PipelineStats로 반환합니다.
+
+환경 변수:
+    PIPELINE_BATCH_SIZE   단계 간 전달 단위(청크 수) (기본 64)
+    PIPELINE_QUEUE_SIZE   단계 사이 큐에 쌓을 수 있는 배치 수 (기본 2)
+"""
+import os
+import sys
+import time
+import queue
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from common.batch_embed import ConcurrentEmbedder
+
+# (청크 텍스트, write 단계까지 그대로 전달할 값 - 메타데이터 등)
+Chunk = Tuple[str, Any]
+
+_DONE = object()
+
+
+def peak_rss_mb() -> float:
+    """프로세스 최대 RSS (MB, resource 모듈이 없는 환경에서는 0)"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@dataclass
+class PipelineStats:
+    pages: int = 0
+    chunks: int = 0
+    batches: int = 0
+    rows: int = 0
+    parse_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    chunks_per_sec: float = 0.0
+    embed_retries: int = 0
+    embed_min_concurrency: int = 0
+    peak_rss_mb: float = 0.0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_pipeline(pages: Iterable[Any], split: Callable[[Any], List[Chunk]],
+                 embed_one: Callable[[str], List[float]],
+                 write: Callable[[List[Tuple[str, Any, List[float]]]], int],
+                 batch_size: int = None, queue_size: int = None,
+                 concurrency: int = None) -> PipelineStats:
+    """
+    pages를 파싱/분할 → 임베딩 → 저장 단계로 흘려보냄
+
+    Args:
+        pages: 페이지 이터레이터 (lazy하게 생성될수록 메모리가 평탄해짐)
+        split: 페이지 → [(청크 텍스트, 메타데이터), ...] (임베딩이 필요 없는 청크는 빼고 반환)
+        embed_one: 텍스트 하나의 임베딩
+        write: [(텍스트, 메타데이터, 벡터), ...] 저장 후 저장한 행 수 반환 (호출 스레드에서 실행)
+
+    어느 단계에서든 예외가 나면 나머지 단계를 멈추고 그 예외를 다시 raise합니다.
+    """
+    batch_size = max(1, batch_size or int(os.getenv("PIPELINE_BATCH_SIZE", "64")))
+    queue_size = max(1, queue_size or int(os.getenv("PIPELINE_QUEUE_SIZE", "2")))
+    stats = PipelineStats()
+    to_embed: queue.Queue = queue.Queue(maxsize=queue_size)
+    to_write: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    started = time.perf_counter()
+
+    def parse_stage():
+        try:
+            batch: List[Chunk] = []
+            iterator = iter(pages)
+            while True:
+                t0 = time.perf_counter()
+                page = next(iterator, _DONE)
+                if page is not _DONE:
+                    chunks = split(page)
+                stats.parse_seconds += time.perf_counter() - t0
+                if page is _DONE:
+                    break
+                stats.pages += 1
+                for chunk in chunks:
+                    batch.append(chunk)
+                    if len(batch) >= batch_size:
+                        if not _put(to_embed, batch, stop):
+                            return
+                        batch = []
+            if batch:
+                _put(to_embed, batch, stop)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(to_embed, _DONE, stop)
+
+    def embed_stage(embedder: ConcurrentEmbedder):
+        try:
+            while True:
+                batch = _get(to_embed, stop)
+                if batch is _DONE:
+                    break
+                t0 = time.perf_counter()
+                vectors = embedder.embed([text for text, _ in batch])
+                stats.embed_seconds += time.perf_counter() - t0
+                items = [(text, metadata, vector) for (text, metadata), vector in zip(batch, vectors)]
+                if not _put(to_write, items, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(to_write, _DONE, stop)
+
+    with ConcurrentEmbedder(embed_one, concurrency) as embedder:
+        threads = [
+            threading.Thread(target=parse_stage, name="ingest-parse", daemon=True),
+            threading.Thread(target=embed_stage, args=(embedder,), name="ingest-embed", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                items = _get(to_write, stop)
+                if items is _DONE:
+                    break
+                t0 = time.perf_counter()
+                stats.rows += write(items)
+                stats.write_seconds += time.perf_counter() - t0
+                stats.chunks += len(items)
+                stats.batches += 1
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            for thread in threads:
+                thread.join()
+
+    if errors:
+        raise errors[0]
+
+    stats.wall_seconds = time.perf_counter() - started
+    for name in ("parse_seconds", "embed_seconds", "write_seconds", "wall_seconds"):
+        setattr(stats, name, round(getattr(stats, name), 3))
+    stats.chunks_per_sec = round(stats.chunks / stats.wall_seconds, 2) if stats.wall_seconds else 0.0
+    stats.embed_retries = embedder.stats.retries
+    stats.embed_min_concurrency = embedder.stats.min_concurrency
+    stats.peak_rss_mb = peak_rss_mb()
+    return stats
@@ -0,0 +1,111 @@
+"""
+LangChain 없는 수집 구성 요소 (수집 Lambda 콜드 스타트용)
+
+Lambda는 임베딩 API 한 번, 분할기 하나, 로더 하나를 쓰려고 langchain_aws, langchain_text_splitters,
+langchain_community.document_loaders를 모듈 로드 시점에 import했습니다.
+이 모듈은 표준 라이브러리만 import하고, 실제로 쓸 때 필요한 것만 불러옵니다.
+
+- TokenLineSplitter: CharacterTextSplitter.from_tiktoken_encoder(chunk_size=500, chunk_overlap=50,
+                     separator='\\n') 와 바이트 단위로 같은 청크 (tiktoken은 처음 분할할 때 로드)
+- TitanEmbedder: boto3 invoke_model 직접 호출 (BedrockEmbeddings.embed_query와 같은 요청 본문)
+- PDF 백엔드(PyMuPDF)는 common/pdf_source.py 가 파싱 시점에 import
+
+청크가 같은지는 benchmarks/ingest_import.py --verify 로 확인합니다.
+"""
+import os
+import re
+import json
+import threading
+from typing import List, Optional
+
+
+class TokenLineSplitter:
+    """
+    구분자로 나눈 조각을 tiktoken 토큰 수 기준으로 chunk_size 이하가 되도록 합치고,
+    다음 청크는 이전 청크 끝의 chunk_overlap 토큰 이하 조각부터 시작합니다.
+    (langchain_text_splitters TextSplitter._merge_splits 와 같은 규칙)
+    """
+
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, separator: str = "\n",
+                 encoding_name: str = "gpt2"):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if chunk_overlap < 0:
+            raise ValueError(f"chunk_overlap must be >= 0, got {chunk_overlap}")
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separator = separator
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._lock = threading.Lock()
+
+    def _length(self, text: str) -> int:
+        if self._encoding is None:
+            with self._lock:
+                if self._encoding is None:
+                    import tiktoken
+                    self._encoding = tiktoken.get_encoding(self.encoding_name)
+        # 특수 토큰 문자열이 있으면 LangChain과 같이 예외 (disallowed_special="all")
+        return len(self._encoding.encode(text))
+
+    def count_tokens(self, text: str) -> int:
+        """분할 기준과 같은 토큰 수"""
+        return self._length(text)
+
+    def split_text(self, text: str) -> List[str]:
+        splits = [s for s in re.split(re.escape(self.separator), text) if s] if self.separator else list(text)
+        separator_len = self._length(self.separator)
+
+        chunks: List[str] = []
+        current: List[str] = []
+        lengths: List[int] = []  # current 조각별 토큰 수 (다시 세지 않도록 보관)
+        total = 0
+        for piece in splits:
+            length = self._length(piece)
+            if total + length + (separator_len if current else 0) > self.chunk_size:
+                if current:
+                    chunk = self._join(current)
+                    if chunk is not None:
+                        chunks.append(chunk)
+                    while total > self.chunk_overlap or (
+                        total + length + (separator_len if current else 0) > self.chunk_size and total > 0
+                    ):
+                        total -= lengths[0] + (separator_len if len(current) > 1 else 0)
+                        current = current[1:]
+                        lengths = lengths[1:]
+            current.append(piece)
+            lengths.append(length)
+            total += length + (separator_len if len(current) > 1 else 0)
+        chunk = self._join(current)
+        if chunk is not None:
+            chunks.append(chunk)
+        return chunks
+
+    def _join(self, pieces: List[str]) -> Optional[str]:
+        text = self.separator.join(pieces).strip()
+        return text or None
+
+
+class TitanEmbedder:
+    """Titan 텍스트 임베딩 (boto3 bedrock-runtime 클라이언트 직접 호출)"""
+
+    def __init__(self, client, model_id: str = "amazon.titan-embed-text-v1"):
+        self.client = client
+        self.model_id = model_id
+
+    def embed(self, text: str) -> List[float]:
+        # BedrockEmbeddings와 같이 줄바꿈을 공백으로 바꿔 전송 (같은 벡터, 임베딩 저장소 재사용 유지)
+        response = self.client.invoke_model(
+            body=json.dumps({"inputText": text.replace(os.linesep, " ")}),
+            modelId=self.model_id,
+            accept="application/json",
+            contentType="application/json"
+        )
+        embedding = json.loads(response["body"].read()).get("embedding")
+        if embedding is None:
+            raise ValueError("No embedding returned from model")
+        return embedding
@@ -0,0 +1,119 @@
+"""
+어휘(lexical) 검색용 색인
+
+코사인 검색은 과목 코드, "3.75", "00학번" 같은 정확한 용어를 놓치기 쉽습니다.
+documents.content_tsv(tsvector, GIN 인덱스)에 다음 용어를 저장해 정확 일치 검색을 보완합니다.
+
+- 공백/구두점 기준 단어 (소문자, 숫자·소수점 포함)
+- 한글 음절 bigram ("복학신청을" → 복학, 학신, 신청, 청을)
+
+한국어는 조사가 붙어 단어 단위 일치가 잘 안 되므로 bigram으로 부분 일치를 잡습니다.
+'simple' 설정을 쓰므로 형태소 분석기 확장 없이 동작합니다.
+
+질의(lexical_query)는 bigram을 하나씩 OR하지 않습니다. '학기', '신청' 같은 흔한 음절 쌍 하나로
+대부분의 행이 일치하기 때문입니다. 단어마다 (단어 자체 | 그 단어 bigram 모두)를 한 그룹으로 만들고
+그룹끼리 OR로 묶으며, 단어 수(MAX_QUERY_WORDS)와 단어당 bigram 수(MAX_WORD_BIGRAMS)에 상한을 둡니다.
+
+Lambda는 INSERT 시 `to_tsvector('simple', lexical_document(content))` 로 채우고,
+기존 행은 `backfill_lexical` (manage_index.py lexical) 로 채웁니다.
+"""
+import re
+from typing import Dict, List, Optional
+
+TSV_COLUMN = "content_tsv"
+TSV_INDEX = "documents_content_tsv_idx"
+TS_CONFIG = "simple"
+
+_TERM = re.compile(r"[0-9A-Za-z가-힣]+(?:\.[0-9A-Za-z가-힣]+)*")
+_HANGUL_RUN = re.compile(r"[가-힣]{2,}")
+
+# 질의에 쓰는 단어 수 / 단어당 bigram 수 상한
+MAX_QUERY_WORDS = 8
+MAX_WORD_BIGRAMS = 4
+
+
+def lexical_terms(text: str) -> List[str]:
+    """단어 + 한글 bigram (중복 제거, 등장 순서 유지)"""
+    terms = []
+    seen = set()
+
+    def add(term):
+        if term not in seen:
+            seen.add(term)
+            terms.append(term)
+
+    for word in _TERM.findall((text or "").lower()):
+        add(word)
+        for run in _HANGUL_RUN.findall(word):
+            for i in range(len(run) - 1):
+                add(run[i:i + 2])
+    return terms
+
+
+def lexical_document(text: str) -> str:
+    """to_tsvector('simple', ...) 에 넘길 색인용 텍스트 (원문 + bigram)"""
+    return " ".join(lexical_terms(text))
+
+
+def _word_bigrams(word: str) -> List[str]:
+    """질의 단어의 한글 bigram (세 음절 이상이면 끝 음절(조사/어미 자리)은 제외, 최대 MAX_WORD_BIGRAMS개)"""
+    bigrams = []
+    for run in _HANGUL_RUN.findall(word):
+        stem = run[:-1] if len(run) > 2 else run
+        bigrams.extend(stem[i:i + 2] for i in range(len(stem) - 1))
+    return list(dict.fromkeys(bigrams))[:MAX_WORD_BIGRAMS]
+
+
+def lexical_query(text: str) -> Optional[str]:
+    """
+    to_tsquery('simple', ...) 용 질의 (용어가 없으면 None)
+
+    "복학신청을 3.75" → ('복학신청을' | ('복학' & '학신' & '신청')) | '3.75'
+    """
+    groups = []
+    for word in dict.fromkeys(_TERM.findall((text or "").lower())):
+        bigrams = [bigram for bigram in _word_bigrams(word) if bigram != word]
+        if not bigrams:
+            groups.append(f"'{word}'")
+        else:
+            stem = " & ".join(f"'{bigram}'" for bigram in bigrams)
+            groups.append(f"('{word}' | ({stem}))" if len(bigrams) > 1 else f"('{word}' | {stem})")
+        if len(groups) >= MAX_QUERY_WORDS:
+            break
+    return " | ".join(groups) if groups else None
+
+
+def create_lexical_index(conn, concurrently: bool = False) -> Dict:
+    """content_tsv 컬럼과 GIN 인덱스 생성 (concurrently=True는 autocommit 연결 필요)"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE documents ADD COLUMN IF NOT EXISTS {TSV_COLUMN} tsvector")
+        cursor.execute(
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {TSV_INDEX} "
+            f"ON documents USING gin ({TSV_COLUMN})"
+        )
+    return {"index": TSV_INDEX, "column": TSV_COLUMN, "config": TS_CONFIG}
+
+
+def backfill_lexical(conn, batch_size: int = 500) -> int:
+    """content_tsv가 비어 있는 행을 batch_size씩 채움 (배치마다 커밋, 채운 행 수 반환)"""
+    filled = 0
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, content FROM documents WHERE {TSV_COLUMN} IS NULL ORDER BY id LIMIT %s",
+                (batch_size,)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            # 배치 전체를 한 UPDATE 문으로 갱신
+            cursor.execute(f"""
+                UPDATE documents d SET {TSV_COLUMN} = to_tsvector('{TS_CONFIG}', v.doc)
+                FROM unnest(%s::int[], %s::text[]) AS v(id, doc)
+                WHERE d.id = v.id
+            """, ([row[0] for row in rows], [lexical_document(row[1] or "") for row in rows]))
+        if not conn.autocommit:
+            conn.commit()
+        filled += len(rows)
+        print(f"content_tsv backfill: {filled} rows")
+    return filled
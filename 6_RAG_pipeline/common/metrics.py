@@ -0,0 +1,63 @@
+"""
+요청 지연 시간 지표
+
+최근 N개 측정값을 보관하고 평균/p50/p95/최대값을 계산합니다.
+서버의 stats 엔드포인트에서 `latency_summary()` 결과를 그대로 노출합니다.
+"""
+import threading
+from collections import deque
+from typing import Dict
+
+
+class LatencyTracker:
+    """최근 window개 측정값(ms) 기반 지연 시간 통계 (스레드 안전)"""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, value_ms: float):
+        with self._lock:
+            self._samples.append(value_ms)
+            self.count += 1
+
+    def summary(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count}
+
+        def percentile(p):
+            return samples[min(len(samples) - 1, int(round(p * (len(samples) - 1))))]
+
+        return {
+            "count": count,
+            "avg_ms": round(sum(samples) / len(samples), 2),
+            "p50_ms": round(percentile(0.50), 2),
+            "p95_ms": round(percentile(0.95), 2),
+            "max_ms": round(samples[-1], 2),
+        }
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(name: str) -> LatencyTracker:
+    """이름별 공유 트래커 (예: 'chat.ttft', 'chat.total')"""
+    with _trackers_lock:
+        if name not in _trackers:
+            _trackers[name] = LatencyTracker()
+        return _trackers[name]
+
+
+def record_latency(name: str, value_ms: float):
+    get_tracker(name).record(value_ms)
+
+
+def latency_summary() -> Dict:
+    with _trackers_lock:
+        trackers = dict(_trackers)
+    return {name: tracker.summary() for name, tracker in sorted(trackers.items())}
@@ -0,0 +1,93 @@
+"""
+S3 PDF 메모리 파싱 (수집 Lambda/로컬 워커용)
+
+객체를 /tmp 임시 파일로 내려받은 뒤 PyPDFLoader로 다시 읽으면 I/O가 두 배이고,
+Lambda 임시 저장소 크기에 막히며, os.remove가 실행되지 않으면 파일이 남습니다.
+open_s3_pdf는 객체를 스트리밍으로 읽어 메모리 버퍼에 담고(SHA-256 동시 계산)
+PyMuPDF에 바이트를 그대로 넘깁니다. 객체가 memory_limit보다 크면 그때만 디스크로 스풀합니다.
+
+    with open_s3_pdf(s3_client, bucket, key) as pdf:
+        pdf.sha256, pdf.page_count
+        for number, text in pdf.pages():   # 0부터 시작하는 페이지 번호
+            ...
+
+환경 변수:
+    PARSE_MEMORY_LIMIT   메모리로 파싱할 최대 객체 크기, 바이트 (기본 104857600 = 100MB)
+"""
+import os
+import hashlib
+import tempfile
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_MEMORY_LIMIT = 100 * 1024 * 1024
+READ_BLOCK = 1024 * 1024
+
+
+def memory_limit_from_env() -> int:
+    return int(os.getenv("PARSE_MEMORY_LIMIT", str(DEFAULT_MEMORY_LIMIT)))
+
+
+class PdfSource:
+    """메모리(또는 스풀 파일)에 올린 PDF 하나"""
+
+    def __init__(self, data: Optional[bytearray] = None, path: Optional[str] = None,
+                 sha256: str = "", size: int = 0, metadata: Optional[Dict[str, str]] = None):
+        # PDF 백엔드는 실제로 파싱할 때만 import (콜드 스타트 비용)
+        import pymupdf
+
+        self.sha256 = sha256
+        self.size = size
+        self.metadata = metadata or {}  # S3 사용자 메타데이터 (업로드 API가 붙인 document-id 등)
+        self.spooled = path is not None
+        self._path = path
+        self._doc = pymupdf.open(path) if path else pymupdf.open(stream=data, filetype="pdf")
+
+    @property
+    def page_count(self) -> int:
+        return self._doc.page_count
+
+    def pages(self, numbers: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, str]]:
+        """(페이지 번호, 텍스트)를 한 페이지씩 생성 (numbers가 없으면 전체, 페이지 객체는 바로 해제)"""
+        for number in (range(self._doc.page_count) if numbers is None else numbers):
+            page = self._doc.load_page(number)
+            yield number, page.get_text()
+
+    def close(self):
+        self._doc.close()
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+            self._path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_s3_pdf(s3_client, bucket: str, key: str, memory_limit: Optional[int] = None) -> PdfSource:
+    """S3 객체를 스트리밍으로 읽어 PdfSource로 반환 (memory_limit 초과 시에만 임시 파일 사용)"""
+    memory_limit = memory_limit_from_env() if memory_limit is None else memory_limit
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    size = response["ContentLength"]
+    metadata = response.get("Metadata") or {}
+    digest = hashlib.sha256()
+    body = response["Body"]
+
+    if size <= memory_limit:
+        buffer = bytearray()
+        for block in iter(lambda: body.read(READ_BLOCK), b""):
+            digest.update(block)
+            buffer.extend(block)
+        return PdfSource(data=buffer, sha256=digest.hexdigest(), size=size, metadata=metadata)
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            for block in iter(lambda: body.read(READ_BLOCK), b""):
+                digest.update(block)
+                spool.write(block)
+        return PdfSource(path=path, sha256=digest.hexdigest(), size=size, metadata=metadata)
+    except BaseException:
+        os.remove(path)
+        raise
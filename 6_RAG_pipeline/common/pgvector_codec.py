@@ -0,0 +1,168 @@
+"""
+pgvector 바이너리 코덱 (NumPy float32 ↔ vector)
+
+1536차원 벡터를 '[0.0123,...]' 텍스트 리터럴로 주고받으면 질의 하나에 약 20KB 문자열을 만들고,
+서버는 이를 다시 float로 파싱하며, 결과 벡터는 파이썬 float 리스트를 거쳐 NumPy 배열이 됩니다.
+이 모듈은 vector 타입을 pgvector 바이너리 형식 그대로 주고받습니다.
+
+    dim(uint16), unused(uint16), float32[dim]   (빅엔디언, 약 6KB)
+
+- psycopg 3 (서버 비동기 풀): np.ndarray 파라미터는 바이너리로 전송하고,
+  binary=True로 실행한 결과의 vector 열은 연속된 float32 np.ndarray로 받습니다.
+  common/db.py 의 AsyncConnectionPool이 연결마다 register_vector_async를 호출합니다.
+- psycopg2 (평가 스크립트, CLI): 바이너리 파라미터를 지원하지 않으므로 VectorParam으로 감싼 값만
+  float32 정밀도(9자리) '[...]'::vector 리터럴로 보내고, 결과 vector 열은 float32 np.ndarray로 변환합니다.
+  (np.ndarray 전체에 전역 어댑터를 등록하지 않으므로 다른 배열 파라미터에는 영향이 없습니다.)
+
+수집 Lambda는 numpy 없이 COPY (FORMAT binary)로 같은 형식을 보냅니다 (common/bulk_insert.py).
+"""
+import struct
+from functools import lru_cache
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+VECTOR_TYPE = "vector"
+
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+
+Vector = Union[np.ndarray, Sequence[float]]
+
+
+def as_float32(vector: Vector) -> np.ndarray:
+    """임베딩(리스트 등)을 연속된 float32 1차원 배열로 (이미 그렇다면 복사하지 않음)"""
+    return np.ascontiguousarray(vector, dtype=np.float32).reshape(-1)
+
+
+def encode_vector(vector: Vector) -> bytes:
+    """pgvector 바이너리 입력 형식"""
+    values = np.asarray(vector, dtype=_WIRE_DTYPE).reshape(-1)
+    return _HEADER.pack(values.shape[0], 0) + values.tobytes()
+
+
+def decode_vector(data) -> np.ndarray:
+    """pgvector 바이너리 출력 형식 → float32 배열"""
+    dim, _ = _HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=_WIRE_DTYPE, count=dim, offset=_HEADER.size).astype(np.float32)
+
+
+def vector_literal(vector: Vector) -> str:
+    """텍스트 입력 형식 '[x1,x2,...]' (float32 왕복에 충분한 9자리)"""
+    return "[" + ",".join([format(value, ".9g") for value in as_float32(vector).tolist()]) + "]"
+
+
+def parse_vector_literal(text: str) -> np.ndarray:
+    """텍스트 출력 형식 '[x1,x2,...]' → float32 배열"""
+    return np.array(text.strip("[]").split(","), dtype=np.float32)
+
+
+# ---------------------------------------------------------------------------
+# psycopg 3
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _psycopg_adapters(oid: int):
+    from psycopg.adapt import Dumper, Loader
+    from psycopg.pq import Format
+
+    class VectorTextDumper(Dumper):
+        format = Format.TEXT
+
+        def dump(self, obj):
+            return vector_literal(obj).encode()
+
+    class VectorBinaryDumper(Dumper):
+        format = Format.BINARY
+
+        def dump(self, obj):
+            return encode_vector(obj)
+
+    class VectorTextLoader(Loader):
+        format = Format.TEXT
+
+        def load(self, data):
+            return parse_vector_literal(bytes(data).decode())
+
+    class VectorBinaryLoader(Loader):
+        format = Format.BINARY
+
+        def load(self, data):
+            return decode_vector(data)
+
+    VectorTextDumper.oid = VectorBinaryDumper.oid = oid
+    return VectorTextDumper, VectorBinaryDumper, VectorTextLoader, VectorBinaryLoader
+
+
+def register_vector_info(conn, info) -> None:
+    """조회해 둔 TypeInfo로 연결(또는 커서)에 vector 코덱 등록 (%s 자리는 바이너리 덤퍼 사용)"""
+    text_dumper, binary_dumper, text_loader, binary_loader = _psycopg_adapters(info.oid)
+    adapters = conn.adapters
+    adapters.register_dumper(np.ndarray, text_dumper)
+    adapters.register_dumper(np.ndarray, binary_dumper)
+    adapters.register_loader(info.oid, text_loader)
+    adapters.register_loader(info.oid, binary_loader)
+
+
+async def register_vector_async(conn, info=None):
+    """
+    psycopg 3 AsyncConnection에 vector 코덱 등록
+
+    info(TypeInfo)가 없으면 조회하며, vector 확장이 없으면 아무것도 등록하지 않고 None을 반환합니다.
+    같은 데이터베이스의 연결들은 반환된 TypeInfo를 재사용할 수 있습니다.
+    """
+    if info is None:
+        from psycopg.types import TypeInfo
+
+        info = await TypeInfo.fetch(conn, VECTOR_TYPE)
+        if not conn.autocommit:
+            await conn.commit()
+        if info is None:
+            return None
+    register_vector_info(conn, info)
+    return info
+
+
+# ---------------------------------------------------------------------------
+# psycopg2
+# ---------------------------------------------------------------------------
+
+class VectorParam:
+    """
+    psycopg2 파라미터용 vector 값 (`cursor.execute(sql, {"embedding": VectorParam(embedding)})`)
+
+    psycopg2의 __conform__ 프로토콜로 '[...]'::vector 리터럴을 만듭니다 (바이너리 파라미터 미지원).
+    """
+
+    __slots__ = ("array",)
+
+    def __init__(self, vector: Vector):
+        self.array = as_float32(vector)
+
+    def __conform__(self, protocol):
+        return self
+
+    def getquoted(self) -> bytes:
+        return f"'{vector_literal(self.array)}'::vector".encode()
+
+
+def register_vector_psycopg2(conn) -> Optional[int]:
+    """
+    psycopg2 연결에 vector 결과 변환 등록
+
+    결과 vector 열을 float32 np.ndarray로 받습니다 (연결 단위). 파라미터는 VectorParam으로 감싸 보냅니다.
+    vector 타입의 OID를 반환합니다.
+    """
+    import psycopg2.extensions
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regtype(%s)::oid", (VECTOR_TYPE,))
+        oid = cursor.fetchone()[0]
+    if oid is None:
+        return None
+
+    def cast_vector(value, cursor):
+        return None if value is None else parse_vector_literal(value)
+
+    psycopg2.extensions.register_type(psycopg2.extensions.new_type((oid,), "VECTOR", cast_vector), conn)
+    return oid
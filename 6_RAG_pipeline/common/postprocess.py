@@ -0,0 +1,156 @@
+"""
+검색 후처리 (점수 임계값, MMR 다양화, 근접 중복 제거)
+
+청크는 chunk_overlap(50토큰)만큼 앞뒤 청크와 겹치므로, 관련 구간 하나가 이웃 청크 두세 개로
+top-k 자리를 모두 차지하는 일이 잦습니다. 검색 SQL에서 k보다 넉넉한 후보(RETRIEVAL_CANDIDATES)를
+가져온 뒤 후보 행렬 전체에 대해 다음을 행렬 연산으로 적용해 k개를 고릅니다.
+
+- 임계값 : 코사인 유사도(1 - DB 거리)가 RETRIEVAL_MIN_SCORE 미만인 후보 제외
+- 중복    : 이미 고른 청크와 벡터 유사도가 RETRIEVAL_DEDUP_THRESHOLD 이상이거나,
+            같은 문서에서 chunk_index 차이가 RETRIEVAL_NEIGHBOR_WINDOW 이하인 후보 제외
+- MMR     : λ·관련성 - (1-λ)·(이미 고른 청크와의 최대 유사도) 가 큰 순서로 선택 (λ=1이면 관련성 순)
+
+유사도는 DB가 정렬에 쓴 코사인 거리를 그대로 사용하며(similarity = 1 - distance),
+후보 간 유사도 행렬은 벡터가 필요한 경우(MMR, 중복 임계값)에만 한 번 계산합니다.
+
+환경 변수 (.env):
+    RETRIEVAL_CANDIDATES        후처리용 후보 수 (기본 20, k보다 작으면 k)
+    RETRIEVAL_MIN_SCORE         코사인 유사도 하한 (기본 0.0 = 끔)
+    RETRIEVAL_MMR_LAMBDA        MMR 관련성 가중치 0~1 (기본 1.0 = 끔)
+    RETRIEVAL_DEDUP_THRESHOLD   근접 중복 유사도 기준 (기본 1.0 = 끔, 예: 0.95)
+    RETRIEVAL_NEIGHBOR_WINDOW   같은 문서에서 제외할 앞뒤 청크 수 (기본 1, 0이면 끔)
+"""
+import os
+from dataclasses import dataclass, replace
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from common.vector_table import top_k_sql
+
+# 후처리 후보 행의 본문 열 (이웃 청크 판단용 document_file_id, chunk_index 포함)
+CANDIDATE_COLUMNS = ("content", "metadata", "document_file_id", "chunk_index")
+
+# postprocess_rows에 넘길 열 번호: candidate_sql 결과, ahybrid_search 결과 (common/hybrid.py)
+VECTOR_LAYOUT = {"distance": -1, "vector": 4, "file": 2, "position": 3}
+HYBRID_LAYOUT = {"distance": 6, "vector": 2, "relevance": 3, "file": 7, "position": 8}
+
+
+@dataclass
+class PostprocessParams:
+    """후처리 설정"""
+    candidates: int = 20
+    min_score: float = 0.0
+    mmr_lambda: float = 1.0
+    dedup_threshold: float = 1.0
+    neighbor_window: int = 1
+
+    @classmethod
+    def from_env(cls) -> "PostprocessParams":
+        return cls(
+            candidates=int(os.getenv("RETRIEVAL_CANDIDATES", "20")),
+            min_score=float(os.getenv("RETRIEVAL_MIN_SCORE", "0.0")),
+            mmr_lambda=float(os.getenv("RETRIEVAL_MMR_LAMBDA", "1.0")),
+            dedup_threshold=float(os.getenv("RETRIEVAL_DEDUP_THRESHOLD", "1.0")),
+            neighbor_window=int(os.getenv("RETRIEVAL_NEIGHBOR_WINDOW", "1")),
+        )
+
+    def validate(self) -> "PostprocessParams":
+        if not 0.0 <= self.mmr_lambda <= 1.0:
+            raise ValueError("mmr_lambda must be between 0 and 1")
+        if self.candidates < 1 or self.neighbor_window < 0:
+            raise ValueError("candidates must be >= 1 and neighbor_window >= 0")
+        return self
+
+    @property
+    def needs_vectors(self) -> bool:
+        """후보 벡터 행렬이 필요한지 (MMR 또는 유사도 기준 중복 제거)"""
+        return self.mmr_lambda < 1.0 or self.dedup_threshold < 1.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.needs_vectors or self.min_score > 0.0 or self.neighbor_window > 0
+
+    def fetch_count(self, k: int) -> int:
+        """검색 SQL에서 가져올 후보 수"""
+        return max(k, self.candidates) if self.enabled else k
+
+
+def resolve_postprocess(**overrides) -> PostprocessParams:
+    """환경 변수 기본값에 None이 아닌 요청 값만 덮어씀"""
+    values = {key: value for key, value in overrides.items() if value is not None}
+    return replace(PostprocessParams.from_env(), **values).validate()
+
+
+def candidate_sql(params: PostprocessParams, storage: Optional[str] = None) -> str:
+    """벡터 검색 후보 SQL - 결과 열: CANDIDATE_COLUMNS, [embedding], distance"""
+    return top_k_sql(CANDIDATE_COLUMNS, ["embedding"] if params.needs_vectors else [], storage)
+
+
+def select_candidates(similarities: np.ndarray, k: int, params: PostprocessParams,
+                      vectors: Optional[np.ndarray] = None, relevance: Optional[np.ndarray] = None,
+                      files: Optional[np.ndarray] = None, positions: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    후보 n개 중 k개 선택 → 고른 순서대로의 후보 번호
+
+    similarities: (n,) 질의와의 코사인 유사도
+    vectors:      (n, d) 후보 벡터 (MMR/중복 임계값)
+    relevance:    (n,) 선택 순서를 정할 점수 (기본 similarities, 하이브리드는 RRF 점수)
+    files, positions: (n,) document_file_id, chunk_index (이웃 청크 제외)
+    """
+    n = len(similarities)
+    alive = similarities >= params.min_score
+    if relevance is None:
+        relevance = similarities
+    else:
+        # RRF 점수를 코사인 유사도와 같은 0~1 범위로 맞춰 MMR 벌점과 비교
+        top = relevance.max() if n else 0.0
+        relevance = relevance / top if top > 0 else relevance
+
+    redundant = np.zeros((n, n), dtype=bool)
+    pairwise = None
+    if vectors is not None and params.needs_vectors:
+        unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        pairwise = unit @ unit.T
+        if params.dedup_threshold < 1.0:
+            redundant |= pairwise >= params.dedup_threshold
+    if files is not None and positions is not None and params.neighbor_window > 0:
+        redundant |= (files[:, None] == files[None, :]) & \
+                     (np.abs(positions[:, None] - positions[None, :]) <= params.neighbor_window)
+
+    mmr = pairwise is not None and params.mmr_lambda < 1.0
+    penalty = np.zeros(n)
+    selected = []
+    while len(selected) < k and alive.any():
+        objective = params.mmr_lambda * relevance - (1.0 - params.mmr_lambda) * penalty if mmr else relevance
+        chosen = int(np.argmax(np.where(alive, objective, -np.inf)))
+        selected.append(chosen)
+        alive &= ~redundant[chosen]
+        alive[chosen] = False
+        if mmr:
+            penalty = np.maximum(penalty, pairwise[chosen])
+    return np.array(selected, dtype=int)
+
+
+def postprocess_rows(rows: Sequence[tuple], k: int, params: PostprocessParams, distance: int,
+                     vector: Optional[int] = None, relevance: Optional[int] = None,
+                     file: Optional[int] = None, position: Optional[int] = None) -> List[Tuple[tuple, float]]:
+    """
+    검색 결과 행에 후처리 적용 → [(행, 코사인 유사도), ...] (최대 k개)
+
+    distance/vector/relevance/file/position은 행에서 각 값의 열 번호입니다.
+    """
+    if not rows:
+        return []
+    similarities = 1.0 - np.array([row[distance] for row in rows], dtype=np.float64)
+    if not params.enabled:
+        return [(row, float(similarity)) for row, similarity in zip(rows[:k], similarities)]
+    chosen = select_candidates(
+        similarities, k, params,
+        vectors=np.stack([row[vector] for row in rows]) if vector is not None and params.needs_vectors else None,
+        relevance=np.array([row[relevance] for row in rows], dtype=np.float64) if relevance is not None else None,
+        # NULL document_file_id는 NaN이 되어 어떤 후보와도 같은 문서로 보지 않음
+        files=np.array([row[file] for row in rows], dtype=np.float64) if file is not None else None,
+        positions=np.array([row[position] for row in rows], dtype=np.float64) if position is not None else None,
+    )
+    return [(rows[i], float(similarities[i])) for i in chosen]
@@ -0,0 +1,147 @@
+"""
+양자화 벡터 검색 (halfvec / binary 후보 검색 + full precision 재정렬)
+
+document_vectors.embedding은 vector(1536) float32로 행당 약 6KB이고, 같은 크기의 HNSW 인덱스가 함께 커집니다.
+VECTOR_STORAGE를 halfvec 또는 binary로 두면 ANN 후보 검색은 압축된 표현식 인덱스로 하고,
+상위 VECTOR_RESCORE_CANDIDATES개 후보만 원래 float32 벡터와의 코사인 거리로 다시 정렬합니다.
+
+- full    : 기존 document_vectors_embedding_hnsw_idx (vector_cosine_ops)
+- halfvec : (embedding::halfvec(1536)) halfvec_cosine_ops   - 인덱스 크기 약 1/2
+- binary  : (binary_quantize(embedding)::bit(1536)) bit_hamming_ops - 인덱스 크기 약 1/32, 후보를 넉넉히
+
+압축 사본은 표현식 인덱스에만 있으므로 테이블/수집 경로는 바뀌지 않고, 재정렬은 후보 행의 full 벡터만 읽습니다.
+표현식 인덱스는 manage_index.py quantize 로 만듭니다 (pgvector 0.7.0 이상).
+
+환경 변수 (.env):
+    VECTOR_STORAGE              full | halfvec | binary (기본 full)
+    VECTOR_RESCORE_CANDIDATES   재정렬할 후보 수 (기본 40, k보다 작으면 k)
+"""
+import os
+from typing import Dict, Optional, Sequence
+
+from common.indexes import (
+    TABLE_NAME, COLUMN_NAME, DEFAULT_HNSW_M, DEFAULT_HNSW_EF_CONSTRUCTION, _maintenance_work_mem
+)
+
+STORAGE_MODES = ("full", "halfvec", "binary")
+VECTOR_DIMENSIONS = 1536
+MIN_PGVECTOR_VERSION = (0, 7, 0)
+DEFAULT_EF_SEARCH = 40
+
+# 인덱스 표현식과 검색 ORDER BY 식이 정확히 같아야 인덱스를 사용합니다
+_INDEXED_EXPRESSIONS = {
+    "halfvec": (f"({COLUMN_NAME}::halfvec({VECTOR_DIMENSIONS}))", "halfvec_cosine_ops",
+                f"{COLUMN_NAME}::halfvec({VECTOR_DIMENSIONS}) <=> %(embedding)s::halfvec({VECTOR_DIMENSIONS})"),
+    "binary": (f"(binary_quantize({COLUMN_NAME})::bit({VECTOR_DIMENSIONS}))", "bit_hamming_ops",
+               f"binary_quantize({COLUMN_NAME})::bit({VECTOR_DIMENSIONS}) <~> binary_quantize(%(embedding)s::vector)"),
+}
+
+
+def resolve_storage(storage: Optional[str] = None) -> str:
+    storage = (storage or os.getenv("VECTOR_STORAGE", "full")).lower()
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Unsupported vector storage: {storage} (use one of {STORAGE_MODES})")
+    return storage
+
+
+def rescore_candidates(k: int, candidates: Optional[int] = None) -> int:
+    if candidates is None:
+        candidates = int(os.getenv("VECTOR_RESCORE_CANDIDATES", "40"))
+    return max(int(k), int(candidates))
+
+
+def quantized_index_name(storage: str) -> str:
+    return f"{TABLE_NAME}_{COLUMN_NAME}_{storage}_hnsw_idx"
+
+
+def nearest_sql(columns: Sequence[str], storage: Optional[str] = None, where: str = "TRUE",
+                limit: str = "%(k)s") -> str:
+    """
+    %(embedding)s 와 코사인 거리가 가까운 document_vectors 행 (columns..., distance)
+
+    양자화 모드는 압축 인덱스로 %(candidates)s개를 뽑은 뒤 full 벡터 거리로 재정렬해 limit개를 반환합니다.
+    distance는 어느 모드든 float32 벡터와의 정확한 코사인 거리입니다.
+    """
+    storage = resolve_storage(storage)
+    select = ", ".join(columns)
+    if storage == "full":
+        return f"""
+            SELECT {select}, {COLUMN_NAME} <=> %(embedding)s::vector AS distance
+            FROM {TABLE_NAME}
+            WHERE {where}
+            ORDER BY distance
+            LIMIT {limit}
+        """
+    inner = ", ".join(dict.fromkeys([*columns, COLUMN_NAME]))
+    return f"""
+            SELECT {select}, {COLUMN_NAME} <=> %(embedding)s::vector AS distance
+            FROM (
+                SELECT {inner}
+                FROM {TABLE_NAME}
+                WHERE {where}
+                ORDER BY {_INDEXED_EXPRESSIONS[storage][2]}
+                LIMIT %(candidates)s
+            ) candidates
+            ORDER BY distance
+            LIMIT {limit}
+        """
+
+
+def search_ef(ef_search: Optional[int], k: int, storage: Optional[str] = None,
+              candidates: Optional[int] = None) -> Optional[int]:
+    """
+    HNSW는 ef_search개까지만 후보를 돌려주므로 양자화 모드에서는 재정렬 후보 수 이상으로 올림
+    (full 모드는 요청 값을 그대로 사용)
+    """
+    if resolve_storage(storage) == "full":
+        return ef_search
+    return max(ef_search or DEFAULT_EF_SEARCH, rescore_candidates(k, candidates))
+
+
+def _pgvector_version(cursor) -> tuple:
+    cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    row = cursor.fetchone()
+    if row is None:
+        raise RuntimeError("pgvector extension is not installed")
+    return tuple(int(part) for part in row[0].split(".")[:3])
+
+
+def create_quantized_index(conn, storage: str = "halfvec", m: int = DEFAULT_HNSW_M,
+                           ef_construction: int = DEFAULT_HNSW_EF_CONSTRUCTION, concurrently: bool = False,
+                           maintenance_work_mem: Optional[str] = None) -> Dict:
+    """
+    양자화 표현식 HNSW 인덱스 생성 (기존 테이블 마이그레이션, 이미 있으면 그대로 둠)
+
+    테이블을 다시 쓰지 않고 인덱스만 추가하므로 concurrently=True면 서비스 중에도 실행할 수 있습니다
+    (autocommit 연결 필요). 생성 후 VECTOR_STORAGE를 바꾸면 검색이 새 인덱스를 사용합니다.
+    """
+    storage = resolve_storage(storage)
+    if storage == "full":
+        raise ValueError("full storage uses the regular vector index (manage_index.py build)")
+    expression, opclass, _ = _INDEXED_EXPRESSIONS[storage]
+    name = quantized_index_name(storage)
+    with conn.cursor() as cursor:
+        version = _pgvector_version(cursor)
+        if version < MIN_PGVECTOR_VERSION:
+            raise RuntimeError(
+                f"pgvector {'.'.join(map(str, version))} does not support {storage} indexes "
+                f"(requires 0.7.0+, run ALTER EXTENSION vector UPDATE)"
+            )
+        with _maintenance_work_mem(cursor, maintenance_work_mem):
+            cursor.execute(
+                f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+                f"ON {TABLE_NAME} USING hnsw ({expression} {opclass}) "
+                f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+            )
+    return {"index": name, "storage": storage, "m": m, "ef_construction": ef_construction}
+
+
+def drop_quantized_index(conn, storage: str = "halfvec", concurrently: bool = True) -> Dict:
+    """양자화 표현식 인덱스 삭제"""
+    storage = resolve_storage(storage)
+    if storage == "full":
+        raise ValueError("full storage uses the regular vector index (manage_index.py drop)")
+    name = quantized_index_name(storage)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {name}")
+    return {"index": name, "storage": storage, "dropped": True}
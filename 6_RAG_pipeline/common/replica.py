@@ -0,0 +1,410 @@
+"""
+인메모리 벡터 복제본 (정확한 top-k 검색, LISTEN/NOTIFY로 증분 갱신)
+
+코퍼스가 수십만 청크 정도면 전체 임베딩이 float32 행렬 하나로 메모리에 들어갑니다 (30만 × 1536 ≈ 1.8GB).
+서버 시작 시 document_vectors 전체를 연속된 (n, 1536) float32 배열(선택적으로 np.memmap)에 읽어 두고,
+질의는 행렬-벡터 곱(BLAS) + argpartition으로 정확한 코사인 top-k를 구합니다.
+DB에는 최종 후보의 본문만 기본 키로 조회합니다 (ANN 인덱스 탐색 없음).
+
+갱신:
+- 수집 Lambda와 delete_document가 코퍼스 버전을 올리는 트랜잭션에서 CORPUS_CHANNEL로 NOTIFY (common/corpus.py)
+- 복제본은 전용 연결로 LISTEN 하다가 알림을 받으면 해당 document_file_id의 벡터만 다시 읽거나 지웁니다
+- 알림의 버전이 건너뛰었거나(알림 없이 바뀐 변경) LISTEN 연결이 끊겼다 다시 붙으면 전체를 다시 읽습니다
+
+다음 경우에는 fresh()가 False이므로 호출 측은 기존 SQL 검색을 사용합니다.
+- 시작 직후 전체 로드 중(warming), 연결이 끊긴 상태(stale)
+- 받았지만 아직 반영하지 않은 알림이 있을 때
+- 서버가 읽은 코퍼스 버전보다 복제본 버전이 낮을 때
+
+하이브리드 검색은 어휘 단계가 DB에 있으므로 항상 SQL로 실행합니다.
+
+환경 변수 (.env):
+    VECTOR_REPLICA              off | memory | mmap (기본 off)
+    VECTOR_REPLICA_PATH         mmap 파일 디렉터리 (기본 /tmp/vector_replica)
+    VECTOR_REPLICA_BATCH_SIZE   로드 시 한 번에 읽는 행 수 (기본 5000)
+    VECTOR_REPLICA_RETRY        LISTEN 연결이 끊겼을 때 재연결 간격, 초 (기본 5)
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from common.corpus import CORPUS_CHANNEL, SELECT_CORPUS_VERSION_SQL
+from common.quantization import VECTOR_DIMENSIONS
+from common.vector_table import VECTOR_TABLE, PAYLOAD_TABLE
+
+REPLICA_MODES = ("off", "memory", "mmap")
+
+# 지운 행이 이 비율을 넘으면 배열을 다시 만들어 공간 회수
+_COMPACT_RATIO = 0.25
+_GROWTH = 1.25
+
+
+class _Snapshot:
+    """검색 스레드가 한 번에 읽는 배열 묶음 (size 이후 행은 아직 쓰는 중이거나 비어 있음)"""
+
+    def __init__(self, matrix: np.ndarray, ids: np.ndarray, files: np.ndarray, alive: np.ndarray, size: int):
+        self.matrix = matrix
+        self.ids = ids
+        self.files = files
+        self.alive = alive
+        self.size = size
+
+    @property
+    def capacity(self) -> int:
+        return self.matrix.shape[0]
+
+
+class VectorReplica:
+    """document_vectors의 프로세스 내 복제본"""
+
+    def __init__(self, mode: str = "off", path: Optional[str] = None, batch_size: int = 5000,
+                 retry: float = 5.0, dimensions: int = VECTOR_DIMENSIONS):
+        mode = mode.lower()
+        if mode not in REPLICA_MODES:
+            raise ValueError(f"Unsupported replica mode: {mode} (use one of {REPLICA_MODES})")
+        self.mode = mode
+        self.path = Path(path or "/tmp/vector_replica")
+        self.batch_size = max(1, batch_size)
+        self.retry = retry
+        self.dimensions = dimensions
+        self.state = "off" if mode == "off" else "warming"
+        self.version: Optional[int] = None
+        self.pending = 0
+        self.loads = 0
+        self.events = 0
+        self.searches = 0
+        self.last_load_seconds = 0.0
+        self._generation = 0
+        self._data = self._allocate(0)
+        self._lag_since: Optional[float] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls) -> "VectorReplica":
+        return cls(
+            mode=os.getenv("VECTOR_REPLICA", "off"),
+            path=os.getenv("VECTOR_REPLICA_PATH"),
+            batch_size=int(os.getenv("VECTOR_REPLICA_BATCH_SIZE", "5000")),
+            retry=float(os.getenv("VECTOR_REPLICA_RETRY", "5")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def fresh(self, corpus_version: Optional[int]) -> bool:
+        """검색에 써도 되는지 (corpus_version은 서버가 읽은 현재 코퍼스 버전)"""
+        if self.state != "ready" or self.pending:
+            return False
+        if corpus_version is None or self.version is None or self.version >= corpus_version:
+            self._lag_since = None
+            return True
+        # 알림 없이 바뀐 변경 - 알림 전달 지연보다 오래 뒤처져 있으면 전체 다시 읽기
+        now = time.monotonic()
+        if self._lag_since is None:
+            self._lag_since = now
+        elif now - self._lag_since > self.retry and self._queue is not None:
+            self._lag_since = None
+            self.state = "stale"
+            self._queue.put_nowait({"op": "load"})
+        return False
+
+    # ------------------------------------------------------------------
+    # 배열 관리
+    # ------------------------------------------------------------------
+
+    def _allocate(self, capacity: int) -> _Snapshot:
+        capacity = max(1, capacity)
+        if self.mode == "mmap":
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._generation += 1
+            target = self.path / f"vectors-{os.getpid()}-{self._generation}.npy"
+            matrix = np.lib.format.open_memmap(
+                target, mode="w+", dtype=np.float32, shape=(capacity, self.dimensions)
+            )
+            # 매핑은 남아 있으므로 이름만 지워 두면 프로세스 종료 시 공간이 반환됨
+            target.unlink()
+        else:
+            matrix = np.empty((capacity, self.dimensions), dtype=np.float32)
+        return _Snapshot(
+            matrix,
+            np.zeros(capacity, dtype=np.int64),
+            np.full(capacity, -1, dtype=np.int64),
+            np.zeros(capacity, dtype=bool),
+            0
+        )
+
+    def _append(self, data: _Snapshot, ids: List[int], files: List[Optional[int]],
+                vectors: List[np.ndarray]) -> _Snapshot:
+        """행 추가 (용량이 부족하면 새 배열로 옮김), 검색 스레드에는 size를 늘린 새 스냅샷으로 공개"""
+        count = len(ids)
+        if data.size + count > data.capacity:
+            data = self._compact(data, count)
+        end = data.size + count
+        block = np.stack(vectors).astype(np.float32, copy=False)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        # 단위 벡터로 저장해 내적 = 코사인 유사도
+        data.matrix[data.size:end] = block / np.maximum(norms, 1e-12)
+        data.ids[data.size:end] = ids
+        data.files[data.size:end] = [-1 if file is None else file for file in files]
+        data.alive[data.size:end] = True
+        return _Snapshot(data.matrix, data.ids, data.files, data.alive, end)
+
+    def _remove_file(self, document_file_id: int) -> int:
+        data = self._data
+        rows = np.flatnonzero(data.alive[:data.size] & (data.files[:data.size] == document_file_id))
+        data.alive[rows] = False
+        return len(rows)
+
+    def _compact(self, data: _Snapshot, extra: int = 0) -> _Snapshot:
+        """살아 있는 행만 새 배열(extra행 여유 포함)로 옮김"""
+        live = np.flatnonzero(data.alive[:data.size])
+        size = len(live)
+        compacted = self._allocate(int((size + extra) * _GROWTH) + 1024)
+        compacted.matrix[:size] = data.matrix[live]
+        compacted.ids[:size] = data.ids[live]
+        compacted.files[:size] = data.files[live]
+        compacted.alive[:size] = True
+        compacted.size = size
+        return compacted
+
+    def _maybe_compact(self):
+        data = self._data
+        dead = data.size - int(data.alive[:data.size].sum())
+        if data.size and dead / data.size > _COMPACT_RATIO:
+            self._data = self._compact(data)
+
+    # ------------------------------------------------------------------
+    # 로드 / 증분 갱신
+    # ------------------------------------------------------------------
+
+    async def _fetch(self, conn, where: str, params: Dict) -> Tuple[List[int], List[Optional[int]], List[np.ndarray]]:
+        cursor = await conn.execute(f"""
+            SELECT chunk_id, document_file_id, embedding FROM {VECTOR_TABLE}
+            WHERE {where} AND embedding IS NOT NULL
+            ORDER BY chunk_id
+            LIMIT %(limit)s
+        """, {**params, "limit": self.batch_size}, binary=True)
+        rows = await cursor.fetchall()
+        return [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows]
+
+    async def _load_rows(self, conn, data: _Snapshot, where: str, params: Dict) -> _Snapshot:
+        """chunk_id 키셋 배치로 조건에 맞는 벡터를 모두 읽어 추가"""
+        last = 0
+        while True:
+            ids, files, vectors = await self._fetch(conn, f"{where} AND chunk_id > %(last)s", {**params, "last": last})
+            if not ids:
+                return data
+            data = self._append(data, ids, files, vectors)
+            last = ids[-1]
+
+    async def load(self, pool):
+        """전체 로드 (완료 전까지 기존 스냅샷/상태 유지, 다 읽은 뒤 한 번에 교체)"""
+        started = time.perf_counter()
+        async with pool.connection() as conn:
+            version = await _corpus_version(conn)
+            cursor = await conn.execute(f"SELECT COUNT(*) FROM {VECTOR_TABLE}")
+            count = (await cursor.fetchone())[0]
+            data = await self._load_rows(conn, self._allocate(int(count * _GROWTH) + 1024), "TRUE", {})
+        self._data = data
+        self.version = version
+        self.loads += 1
+        self.last_load_seconds = round(time.perf_counter() - started, 3)
+        print(f"[replica] loaded {data.size} vectors ({self.mode}, version {version}) "
+              f"in {self.last_load_seconds}s")
+
+    async def apply(self, pool, event: Dict):
+        """알림 하나 반영 - 버전이 건너뛰었으면 전체 다시 읽기"""
+        version = event.get("version")
+        if version is not None and self.version is not None:
+            if version <= self.version:
+                return  # 전체 로드에 이미 포함된 변경
+            if version > self.version + 1:
+                await self.load(pool)
+                return
+        document_file_id = event.get("document_file_id")
+        removed = self._remove_file(document_file_id)
+        added = 0
+        if event.get("op") == "upsert":
+            async with pool.connection() as conn:
+                before = self._data.size
+                self._data = await self._load_rows(
+                    conn, self._data, "document_file_id = %(file)s", {"file": document_file_id}
+                )
+                added = self._data.size - before
+        self._maybe_compact()
+        if version is not None:
+            self.version = version
+        self.events += 1
+        print(f"[replica] {event.get('op')} document_file_id={document_file_id}: "
+              f"-{removed} +{added} (version {self.version})")
+
+    # ------------------------------------------------------------------
+    # LISTEN 루프
+    # ------------------------------------------------------------------
+
+    async def _listen(self, connect_kwargs: Dict):
+        import psycopg
+
+        conn = await psycopg.AsyncConnection.connect(**connect_kwargs, autocommit=True)
+        try:
+            await conn.execute(f"LISTEN {CORPUS_CHANNEL}")
+            # LISTEN 이후에 전체 로드를 시작하므로 로드 중의 변경도 알림으로 받음
+            await self._queue.put({"op": "load"})
+            async for notify in conn.notifies():
+                try:
+                    event = json.loads(notify.payload)
+                except json.JSONDecodeError:
+                    event = {"op": "load"}
+                self.pending += 1
+                await self._queue.put(event)
+        finally:
+            await conn.close()
+
+    async def _listen_forever(self, connect_kwargs: Dict):
+        while True:
+            try:
+                await self._listen(connect_kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 끊긴 동안의 알림은 받을 수 없으므로 다시 연결한 뒤 전체 로드
+                print(f"[replica] listener error, falling back to SQL: {e}")
+            self.state = "stale"
+            await asyncio.sleep(self.retry)
+
+    async def _worker(self, pool):
+        while True:
+            event = await self._queue.get()
+            try:
+                if event.get("op") == "load":
+                    self.state = "warming" if self.loads == 0 else "stale"
+                    await self.load(pool)
+                    self.state = "ready"
+                elif self.state == "ready":
+                    await self.apply(pool, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[replica] refresh failed, reloading: {e}")
+                self.state = "stale"
+                await asyncio.sleep(self.retry)
+                await self._queue.put({"op": "load"})
+            finally:
+                if event.get("op") != "load":
+                    self.pending = max(0, self.pending - 1)
+
+    def start(self, pool, connect_kwargs: Dict):
+        """서버 시작 시 호출 - 백그라운드로 LISTEN 및 전체 로드 (끝날 때까지 검색은 SQL)"""
+        if not self.enabled or self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._listen_forever(connect_kwargs)),
+            asyncio.create_task(self._worker(pool)),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """정확한 코사인 top-k → (chunk_id, 코사인 유사도, 단위 벡터 행렬), 유사도 내림차순"""
+        data = self._data
+        size = data.size
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32),
+                 np.empty((0, self.dimensions), dtype=np.float32))
+        if size == 0 or k <= 0:
+            return empty
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = data.matrix[:size] @ query
+        scores[~data.alive[:size]] = -np.inf
+        k = min(k, size)
+        top = np.argpartition(scores, size - k)[size - k:]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        self.searches += 1
+        return data.ids[top], scores[top], data.matrix[top]
+
+    async def candidates(self, conn, query: np.ndarray, k: int, with_vectors: bool = False) -> List[tuple]:
+        """
+        검색 후보 행 - candidate_sql과 같은 형태 (common/postprocess.py VECTOR_LAYOUT)
+
+            (content, metadata, document_file_id, chunk_index, [embedding], distance)
+
+        행렬 곱은 스레드풀에서 실행하고(NumPy가 GIL 해제), 본문은 기본 키로 한 번에 조회합니다.
+        복제본에 남아 있지만 이미 지워진 청크는 결과에서 빠집니다.
+        """
+        ids, scores, vectors = await asyncio.get_running_loop().run_in_executor(None, self.search, query, k)
+        if len(ids) == 0:
+            return []
+        cursor = await conn.execute(f"""
+            SELECT id, content, metadata, document_file_id, chunk_index
+            FROM {PAYLOAD_TABLE} WHERE id = ANY(%s)
+        """, (ids.tolist(),))
+        payload = {row[0]: row[1:] for row in await cursor.fetchall()}
+        rows = []
+        for chunk_id, score, vector in zip(ids.tolist(), scores.tolist(), vectors):
+            if chunk_id not in payload:
+                continue
+            rows.append((*payload[chunk_id], *((vector,) if with_vectors else ()), 1.0 - score))
+        return rows
+
+    def stats(self) -> Dict:
+        data = self._data
+        live = int(data.alive[:data.size].sum())
+        return {
+            "mode": self.mode,
+            "state": self.state,
+            "version": self.version,
+            "vectors": live,
+            "capacity": data.capacity,
+            "memory_mb": round(data.matrix.nbytes / 1024 / 1024, 1),
+            "pending_events": self.pending,
+            "loads": self.loads,
+            "events": self.events,
+            "searches": self.searches,
+            "last_load_seconds": self.last_load_seconds,
+        }
+
+
+async def _corpus_version(conn) -> Optional[int]:
+    """복제본이 반영한 코퍼스 버전 (corpus_version 테이블이 없으면 None)"""
+    try:
+        async with conn.transaction():
+            cursor = await conn.execute(SELECT_CORPUS_VERSION_SQL)
+            row = await cursor.fetchone()
+    except Exception:
+        return None
+    return row[0] if row else None
+
+
+_replica: Optional[VectorReplica] = None
+_replica_lock = threading.Lock()
+
+
+def get_vector_replica() -> VectorReplica:
+    global _replica
+    if _replica is None:
+        with _replica_lock:
+            if _replica is None:
+                _replica = VectorReplica.from_env()
+    return _replica
@@ -0,0 +1,303 @@
+"""
+대화 기록 저장소
+
+세션별 InMemoryChatMessageHistory를 dict에 계속 쌓아 두면 메모리와 프롬프트 길이가
+끝없이 늘어납니다. SessionStore는 다음을 보장합니다.
+
+- 세션 수 상한(LRU) + 유휴 시간(idle TTL) 초과 세션 제거
+- 세션당 메시지 수 / 추정 토큰 수 상한 (오래된 메시지부터 삭제)
+- 백엔드 선택: memory(프로세스 내부) 또는 sqlite(로컬 파일, 여러 uvicorn 워커가 공유)
+
+RunnableWithMessageHistory에는 `store.get_session_history`를 그대로 넘기면 됩니다.
+
+환경 변수 (.env):
+    SESSION_BACKEND        memory | sqlite (기본 memory)
+    SESSION_DB_PATH        sqlite 백엔드 파일 경로 (기본 ./sessions.sqlite3)
+    SESSION_MAX_SESSIONS   최대 세션 수 (기본 1000)
+    SESSION_IDLE_TTL       마지막 사용 후 세션을 유지할 시간, 초 (기본 3600)
+    SESSION_MAX_MESSAGES   세션당 최대 메시지 수 (기본 20)
+    SESSION_MAX_TOKENS     세션당 최대 추정 토큰 수 (기본 4000)
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    """토큰 수 근사치 (한국어 기준 약 2자당 1토큰)"""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    return max(1, len(content) // 2)
+
+
+def _message_bytes(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    return sys.getsizeof(message) + sys.getsizeof(content)
+
+
+class InMemorySessionBackend:
+    """프로세스 내부 LRU 백엔드"""
+
+    name = "memory"
+    evict_interval = 0.0  # 정리 비용이 작아 매 조회마다 수행
+
+    def __init__(self):
+        self._sessions = OrderedDict()  # session_id -> [last_access, messages]
+        self._lock = threading.RLock()
+
+    def load(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            entry[0] = time.time()
+            self._sessions.move_to_end(session_id)
+            return list(entry[1])
+
+    def save(self, session_id: str, messages: List[BaseMessage]):
+        with self._lock:
+            self._sessions[session_id] = [time.time(), list(messages)]
+            self._sessions.move_to_end(session_id)
+
+    def append(self, session_id: str, messages: Sequence[BaseMessage],
+               trim: Callable[[List[BaseMessage]], List[BaseMessage]]):
+        """기존 기록 + messages를 trim해 저장 (잠금 안에서 한 번에 처리)"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            current = list(entry[1]) if entry is not None else []
+            current.extend(messages)
+            self.save(session_id, trim(current))
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict(self, max_sessions: int, idle_ttl: float) -> int:
+        evicted = 0
+        cutoff = time.time() - idle_ttl
+        with self._lock:
+            # 가장 오래 사용하지 않은 세션이 앞쪽에 있음
+            while self._sessions:
+                session_id, (last_access, _) = next(iter(self._sessions.items()))
+                if len(self._sessions) <= max_sessions and last_access >= cutoff:
+                    break
+                self._sessions.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def footprint(self) -> Dict:
+        with self._lock:
+            sessions = len(self._sessions)
+            messages = sum(len(entry[1]) for entry in self._sessions.values())
+            size = sum(_message_bytes(m) for entry in self._sessions.values() for m in entry[1])
+        return {"sessions": sessions, "messages": messages, "memory_bytes": size}
+
+
+class SQLiteSessionBackend:
+    """로컬 SQLite 파일 백엔드 (같은 호스트의 여러 워커가 세션 공유)"""
+
+    name = "sqlite"
+    evict_interval = 30.0
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                session_id TEXT PRIMARY KEY,
+                messages TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS chat_sessions_last_access_idx ON chat_sessions (last_access)"
+        )
+        self._conn.commit()
+
+    def load(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return []
+            self._conn.execute(
+                "UPDATE chat_sessions SET last_access = ? WHERE session_id = ?",
+                (time.time(), session_id)
+            )
+            self._conn.commit()
+        return messages_from_dict(json.loads(row[0]))
+
+    def save(self, session_id: str, messages: List[BaseMessage]):
+        payload = json.dumps(messages_to_dict(messages), ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions VALUES (?, ?, ?)",
+                (session_id, payload, time.time())
+            )
+            self._conn.commit()
+
+    def append(self, session_id: str, messages: Sequence[BaseMessage],
+               trim: Callable[[List[BaseMessage]], List[BaseMessage]]):
+        """
+        기존 기록 + messages를 trim해 저장
+
+        BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡아 읽기→추가→저장을 한 트랜잭션으로 처리하므로
+        같은 세션에 동시에 쓰는 다른 스레드/워커의 메시지를 덮어쓰지 않습니다.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT messages FROM chat_sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                current = messages_from_dict(json.loads(row[0])) if row else []
+                current.extend(messages)
+                payload = json.dumps(messages_to_dict(trim(current)), ensure_ascii=False)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO chat_sessions VALUES (?, ?, ?)",
+                    (session_id, payload, time.time())
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def evict(self, max_sessions: int, idle_ttl: float) -> int:
+        with self._lock:
+            idle = self._conn.execute(
+                "DELETE FROM chat_sessions WHERE last_access < ?", (time.time() - idle_ttl,)
+            ).rowcount
+            overflow = self._conn.execute("""
+                DELETE FROM chat_sessions WHERE session_id IN (
+                    SELECT session_id FROM chat_sessions
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (max_sessions,)).rowcount
+            self._conn.commit()
+        return idle + overflow
+
+    def footprint(self) -> Dict:
+        with self._lock:
+            sessions, payload_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(messages)), 0) FROM chat_sessions"
+            ).fetchone()
+        file_bytes = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {"sessions": sessions, "payload_bytes": payload_bytes, "file_bytes": file_bytes}
+
+
+class StoredChatMessageHistory(BaseChatMessageHistory):
+    """SessionStore에 저장되는 세션 단위 대화 기록"""
+
+    def __init__(self, store: "SessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.store.backend.load(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        # 불러오기→추가→저장을 백엔드에서 원자적으로 처리 (동시 요청이 서로의 메시지를 덮어쓰지 않음)
+        self.store.backend.append(self.session_id, messages, self.store.trim)
+
+    def clear(self) -> None:
+        self.store.backend.delete(self.session_id)
+
+
+class SessionStore:
+    """크기 제한/만료가 있는 대화 기록 저장소"""
+
+    def __init__(self, backend=None, max_sessions: int = 1000, idle_ttl: float = 3600,
+                 max_messages: int = 20, max_tokens: int = 4000):
+        self.backend = backend or InMemorySessionBackend()
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.trimmed_messages = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        if os.getenv("SESSION_BACKEND", "memory").lower() == "sqlite":
+            backend = SQLiteSessionBackend(os.getenv("SESSION_DB_PATH", "./sessions.sqlite3"))
+        else:
+            backend = InMemorySessionBackend()
+        return cls(
+            backend=backend,
+            max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "1000")),
+            idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "3600")),
+            max_messages=int(os.getenv("SESSION_MAX_MESSAGES", "20")),
+            max_tokens=int(os.getenv("SESSION_MAX_TOKENS", "4000")),
+        )
+
+    def get_session_history(self, session_id: str) -> StoredChatMessageHistory:
+        self._maybe_evict()
+        return StoredChatMessageHistory(self, session_id)
+
+    def clear(self, session_id: str):
+        self.backend.delete(session_id)
+
+    def trim(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """메시지 수/토큰 상한을 넘으면 오래된 메시지부터 제거 (사용자 메시지로 시작하도록 유지)"""
+        before = len(messages)
+        tokens = sum(estimate_tokens(m) for m in messages)
+        start = 0
+        while start < len(messages) - 1 and (
+            len(messages) - start > self.max_messages or tokens > self.max_tokens
+        ):
+            tokens -= estimate_tokens(messages[start])
+            start += 1
+        while start < len(messages) - 1 and isinstance(messages[start], AIMessage):
+            start += 1
+        kept = messages[start:]
+        if len(kept) < before:
+            with self._lock:
+                self.trimmed_messages += before - len(kept)
+        return kept
+
+    def _maybe_evict(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_evict < self.backend.evict_interval:
+                return
+            self._last_evict = now
+        evicted = self.backend.evict(self.max_sessions, self.idle_ttl)
+        with self._lock:
+            self.evicted += evicted
+
+    def stats(self) -> Dict:
+        stats = {
+            "backend": self.backend.name,
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl,
+            "max_messages": self.max_messages,
+            "max_tokens": self.max_tokens,
+            "evicted_sessions": self.evicted,
+            "trimmed_messages": self.trimmed_messages,
+        }
+        stats.update(self.backend.footprint())
+        return stats
@@ -0,0 +1,176 @@
+"""
+S3 스트리밍 업로드
+
+`await file.read()` 로 파일 전체를 메모리에 올린 뒤 put_object 하지 않고,
+part_size 단위로 읽어 S3 multipart upload로 보냅니다.
+
+- 메모리 사용량: 최대 part_size × (concurrency + 1)
+- 크기 제한: max_bytes를 넘으면 즉시 중단하고 업로드를 취소(abort)
+- 중복 확인: 읽으면서 SHA-256을 계산하고, 마지막에 find_duplicate(sha256)가 기존 문서를 돌려주면
+  업로드를 완료하지 않고 취소합니다 (S3 ObjectCreated 이벤트가 없으므로 재수집도 일어나지 않음)
+- 완료된 객체에는 `sha256=<hex>` 태그를 붙입니다
+
+환경 변수 (.env):
+    UPLOAD_MAX_BYTES     업로드 최대 크기 (기본 209715200 = 200MB)
+    UPLOAD_PART_SIZE     multipart 파트 크기 (기본 8388608 = 8MB, S3 최소 5MB)
+    UPLOAD_CONCURRENCY   동시에 전송할 파트 수 (기본 4, boto3 기본 커넥션 풀 10 이하 권장)
+"""
+import os
+import time
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional
+
+MB = 1024 * 1024
+MIN_PART_SIZE = 5 * MB  # S3 multipart 마지막 파트를 제외한 최소 크기
+
+
+class UploadTooLarge(Exception):
+    """업로드 크기 제한 초과"""
+
+
+@dataclass
+class UploadConfig:
+    """스트리밍 업로드 설정"""
+    max_bytes: int = 200 * MB
+    part_size: int = 8 * MB
+    concurrency: int = 4
+
+    @classmethod
+    def from_env(cls) -> "UploadConfig":
+        return cls(
+            max_bytes=int(os.getenv("UPLOAD_MAX_BYTES", str(200 * MB))),
+            part_size=int(os.getenv("UPLOAD_PART_SIZE", str(8 * MB))),
+            concurrency=int(os.getenv("UPLOAD_CONCURRENCY", "4")),
+        )
+
+
+@dataclass
+class UploadResult:
+    bucket: str
+    key: str
+    size: int
+    sha256: str
+    parts: int
+    elapsed_ms: float
+    duplicate: Optional[Dict] = None  # find_duplicate가 찾은 기존 문서 (있으면 업로드하지 않음)
+
+
+async def stream_upload(source, s3_client, bucket: str, key: str,
+                        content_type: str = "application/pdf",
+                        config: Optional[UploadConfig] = None,
+                        find_duplicate: Optional[Callable[[str], Awaitable[Optional[Dict]]]] = None,
+                        metadata: Optional[Dict[str, str]] = None
+                        ) -> UploadResult:
+    """
+    source(`await source.read(n)` 지원, 예: FastAPI UploadFile)를 S3로 스트리밍 업로드
+
+    boto3 호출은 이벤트 루프 기본 스레드풀에서 실행됩니다.
+    metadata는 S3 사용자 메타데이터(x-amz-meta-*)로 붙습니다 (예: 갱신할 문서 ID).
+    """
+    extra = {"Metadata": metadata} if metadata else {}
+    config = config or UploadConfig.from_env()
+    declared = getattr(source, "size", None)  # UploadFile.size (알 수 있으면 읽기 전에 거절)
+    if declared and declared > config.max_bytes:
+        raise UploadTooLarge(f"File exceeds upload limit of {config.max_bytes} bytes")
+    part_size = max(config.part_size, MIN_PART_SIZE)
+    loop = asyncio.get_running_loop()
+    digest = hashlib.sha256()
+    started = time.perf_counter()
+    size = 0
+
+    def call(method, **kwargs):
+        return loop.run_in_executor(None, partial(method, **kwargs))
+
+    async def read_part() -> bytes:
+        nonlocal size
+        data = await source.read(part_size)
+        size += len(data)
+        if size > config.max_bytes:
+            raise UploadTooLarge(f"File exceeds upload limit of {config.max_bytes} bytes")
+        digest.update(data)
+        return data
+
+    def result(parts: int, duplicate: Optional[Dict] = None) -> UploadResult:
+        return UploadResult(
+            bucket=bucket, key=key, size=size, sha256=digest.hexdigest(), parts=parts,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2), duplicate=duplicate
+        )
+
+    first = await read_part()
+    second = await read_part() if len(first) == part_size else b""
+
+    # 파트 하나로 끝나는 작은 파일: 해시를 먼저 확인하고 put_object
+    if not second:
+        sha256 = digest.hexdigest()
+        duplicate = await find_duplicate(sha256) if find_duplicate else None
+        if duplicate is None:
+            await call(s3_client.put_object, Bucket=bucket, Key=key, Body=first,
+                       ContentType=content_type, Tagging=f"sha256={sha256}", **extra)
+        return result(0 if duplicate else 1, duplicate)
+
+    upload_id = (await call(
+        s3_client.create_multipart_upload, Bucket=bucket, Key=key, ContentType=content_type, **extra
+    ))["UploadId"]
+    slots = asyncio.Semaphore(max(1, config.concurrency))
+    tasks = []
+
+    async def send(number: int, data: bytes) -> Dict:
+        try:
+            response = await call(s3_client.upload_part, Bucket=bucket, Key=key, UploadId=upload_id,
+                                  PartNumber=number, Body=data)
+            return {"PartNumber": number, "ETag": response["ETag"]}
+        finally:
+            slots.release()
+
+    async def schedule(data: bytes):
+        # 전송 중인 파트가 concurrency개면 하나가 끝날 때까지 다음 파트를 읽지 않음
+        await slots.acquire()
+        tasks.append(asyncio.ensure_future(send(len(tasks) + 1, data)))
+
+    try:
+        await schedule(first)
+        await schedule(second)
+        del first, second
+        while True:
+            data = await read_part()
+            if not data:
+                break
+            await schedule(data)
+        parts = await asyncio.gather(*tasks)
+
+        sha256 = digest.hexdigest()
+        duplicate = await find_duplicate(sha256) if find_duplicate else None
+        if duplicate is not None:
+            await call(s3_client.abort_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id)
+            return result(0, duplicate)
+
+        await call(s3_client.complete_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id,
+                   MultipartUpload={"Parts": list(parts)})
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await call(s3_client.abort_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+
+    await call(s3_client.put_object_tagging, Bucket=bucket, Key=key,
+               Tagging={"TagSet": [{"Key": "sha256", "Value": sha256}]})
+    return result(len(parts))
+
+
+async def get_object_sha256(s3_client, bucket: str, key: str) -> Optional[str]:
+    """stream_upload가 붙인 sha256 태그 조회 (객체나 태그가 없으면 None)"""
+    loop = asyncio.get_running_loop()
+    try:
+        response = await loop.run_in_executor(
+            None, partial(s3_client.get_object_tagging, Bucket=bucket, Key=key)
+        )
+    except Exception:
+        return None
+    for tag in response.get("TagSet", []):
+        if tag.get("Key") == "sha256":
+            return tag.get("Value")
+    return None
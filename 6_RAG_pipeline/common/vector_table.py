@@ -0,0 +1,47 @@
+"""
+좁은 벡터 테이블 (document_vectors) + 청크 본문 테이블 (documents)
+
+벡터가 content, metadata(JSONB), content_tsv와 같은 힙에 있으면 ANN 검색과 인덱스 조회가
+넓은 행을 통째로 버퍼 캐시로 끌어옵니다. 벡터는 다음 좁은 테이블에만 저장하고
+
+    document_vectors (chunk_id → documents.id ON DELETE CASCADE, document_file_id, embedding)
+
+검색은 document_vectors에서 top-k id/거리를 구한 뒤, 최종 k개 id의 본문만 documents에서 한 번에 조회합니다
+(같은 SQL 문 안의 조인이므로 왕복은 한 번). 청크/문서 삭제는 CASCADE로 벡터도 함께 지웁니다.
+
+기존 데이터베이스는 admin/server/db/migrate_vector_table.py 로 옮깁니다.
+"""
+from typing import Optional, Sequence
+
+from common.indexes import TABLE_NAME as VECTOR_TABLE
+from common.quantization import VECTOR_DIMENSIONS, nearest_sql
+
+PAYLOAD_TABLE = "documents"
+
+CREATE_VECTOR_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {VECTOR_TABLE} (
+        chunk_id INTEGER PRIMARY KEY REFERENCES {PAYLOAD_TABLE} (id) ON DELETE CASCADE,
+        document_file_id INTEGER,
+        embedding vector({VECTOR_DIMENSIONS})
+    )
+"""
+
+
+def top_k_sql(payload_columns: Sequence[str], vector_columns: Sequence[str] = (),
+              storage: Optional[str] = None) -> str:
+    """
+    벡터 테이블 top-k → 최종 k개 id만 documents와 조인
+
+    결과 열: payload_columns (documents d), vector_columns (document_vectors), distance (가까운 순)
+    파라미터: %(embedding)s, %(k)s, %(candidates)s (양자화 모드 재정렬 후보 수)
+    """
+    nearest = nearest_sql(["chunk_id", *vector_columns], storage)
+    select = ", ".join([*(f"d.{column}" for column in payload_columns),
+                        *(f"top.{column}" for column in vector_columns), "top.distance"])
+    return f"""
+        WITH top AS MATERIALIZED ({nearest})
+        SELECT {select}
+        FROM top
+        JOIN {PAYLOAD_TABLE} d ON d.id = top.chunk_id
+        ORDER BY top.distance
+    """
@@ -1,20 +1,38 @@
 import os
+import sys
 import json
+import time
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Optional
-import boto3
-import psycopg2
 from pathlib import Path
 from dotenv import load_dotenv
 
 # 환경 설정
 # 경로: /user/server/main.py -> /user -> / (6_RAG_pipeline_v2)
-env_path = Path(__file__).parent.parent.parent / '.env'
+BASE_DIR = Path(__file__).parent.parent.parent
+env_path = BASE_DIR / '.env'
 load_dotenv(dotenv_path=env_path)
 
+sys.path.append(str(BASE_DIR))
+from common.db import PoolConfig, get_pool, get_async_pool, pool_stats, close_pools
+from common.aws import get_bedrock_client as get_shared_bedrock_client, configure_default_executor
+from common.indexes import asearch_params
+from common.embedding_cache import get_embedding_cache
+from common.metrics import record_latency, latency_summary
+from common.answer_cache import get_answer_cache, answer_scope
+from common.corpus import get_corpus_version
+from common.replica import get_vector_replica
+from common.hybrid import HybridParams, resolve_hybrid, ahybrid_search
+from common.quantization import rescore_candidates, search_ef
+from common.postprocess import (
+    resolve_postprocess, candidate_sql, postprocess_rows, VECTOR_LAYOUT, HYBRID_LAYOUT
+)
+from common.pgvector_codec import as_float32
+
 # FastAPI 애플리케이션 생성
 app = FastAPI(
     title="RAG User API",
@@ -39,6 +57,21 @@ class ChatRequest(BaseModel):
     """채팅 요청 모델"""
     query: str
     session_id: str
+    ef_search: Optional[int] = None  # HNSW 검색 후보 수 (높을수록 재현율↑, 지연↑)
+    probes: Optional[int] = None  # IVFFlat 탐색 리스트 수
+    retrieval_mode: Optional[str] = None  # vector | hybrid (기본 RETRIEVAL_MODE)
+    vector_weight: Optional[float] = None  # RRF 가중치 (하이브리드)
+    lexical_weight: Optional[float] = None
+    vector_candidates: Optional[int] = None  # 단계별 후보 수 (하이브리드)
+    lexical_candidates: Optional[int] = None
+    
+    def hybrid_params(self) -> Optional[HybridParams]:
+        """하이브리드 검색 설정 (vector 모드면 None)"""
+        return resolve_hybrid(
+            self.retrieval_mode,
+            vector_weight=self.vector_weight, lexical_weight=self.lexical_weight,
+            vector_candidates=self.vector_candidates, lexical_candidates=self.lexical_candidates
+        )
 
 
 class Source(BaseModel):
@@ -52,6 +85,8 @@ class ChatResponse(BaseModel):
     """채팅 응답 모델"""
     response: str
     sources: List[Source]
+    cached: bool = False  # 시맨틱 답변 캐시에서 반환했는지 여부
+    search_metrics: Optional[dict] = None  # 단계별 검색 시간 (vector_ms, lexical_ms, search_ms, postprocess_ms)
 
 
 class ApiResponse(BaseModel):
@@ -66,13 +101,46 @@ class ApiResponse(BaseModel):
 # ============================================
 
 def get_db_connection():
-    """PostgreSQL 데이터베이스 연결"""
-    return psycopg2.connect(
-        host=os.getenv('DB_HOST'),
-        database=os.getenv('DB_NAME'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD')
-    )
+    """
+    공유 커넥션 풀에서 연결 대여
+    
+    `with get_db_connection() as conn:` 블록을 벗어나면 풀로 반납됩니다.
+    """
+    return get_pool().connection()
+
+
+# ============================================
+# Bedrock 클라이언트 / 임베딩
+# ============================================
+
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+_embeddings = None
+
+
+def get_bedrock_client():
+    """
+    Bedrock 런타임 클라이언트
+    
+    프로세스당 1개를 재사용하며 BEDROCK_MAX_POOL_CONNECTIONS 크기의 커넥션 풀을 가집니다.
+    """
+    return get_shared_bedrock_client()
+
+
+async def embed_query(text: str) -> List[float]:
+    """
+    질의 임베딩 생성
+    
+    같은 질의(정규화 기준)는 임베딩 캐시에서 반환하고, 없을 때만 Titan을 호출합니다.
+    Titan 호출은 스레드풀에서 실행되어 이벤트 루프를 막지 않습니다.
+    """
+    global _embeddings
+    if _embeddings is None:
+        from langchain_aws import BedrockEmbeddings
+        _embeddings = BedrockEmbeddings(
+            client=get_bedrock_client(),
+            model_id=EMBEDDING_MODEL_ID
+        )
+    return await get_embedding_cache().aget_or_compute(EMBEDDING_MODEL_ID, text, _embeddings.aembed_query)
 
 
 # ============================================
@@ -85,44 +153,66 @@ async def health_check():
     return {"status": "ok", "message": "User API is running"}
 
 
+@app.get("/api/stats")
+async def get_stats():
+    """
+    서버 내부 지표 조회
+    
+    Returns:
+        dict: 커넥션 풀 크기/대기 시간, 임베딩/답변 캐시 적중률, 첫 토큰 지연(ttft) 등
+    """
+    return {
+        "status": "success",
+        "data": {
+            "db_pool": pool_stats(),
+            "embedding_cache": get_embedding_cache().stats(),
+            "answer_cache": get_answer_cache().stats(),
+            "vector_replica": get_vector_replica().stats(),
+            "latency": latency_summary()
+        }
+    }
+
+
+@app.on_event("startup")
+async def startup():
+    """Bedrock 오프로딩 스레드풀 설정, 비동기 커넥션 풀 열기, 벡터 복제본 백그라운드 로드 (VECTOR_REPLICA)"""
+    configure_default_executor()
+    await get_async_pool().open()
+    get_vector_replica().start(get_async_pool(), PoolConfig.from_env().connect_kwargs())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """서버 종료 시 벡터 복제본 갱신 중지 및 커넥션 풀 정리"""
+    await get_vector_replica().stop()
+    await close_pools()
+
+
 @app.get("/api/documents", response_model=ApiResponse)
-async def get_documents():
+def get_documents():
     """
     문서 목록 조회
     
+    동기 DB 호출을 사용하므로 일반 def로 정의해 스레드풀에서 실행합니다.
+    
     Returns:
         ApiResponse: 문서 목록이 포함된 응답
     """
-    conn = None
-    cursor = None
     try:
-        conn = get_db_connection()
-        conn.autocommit = True
-        cursor = conn.cursor()
-        
-        # 데이터베이스에서 문서 목록 조회
-        cursor.execute("""
-            SELECT DISTINCT 
-                metadata->>'filename' as filename,
-                metadata->>'document_file_id' as document_file_id,
-                COUNT(*) as chunk_count,
-                MAX(created_at) as latest_created_at
-            FROM documents
-            GROUP BY metadata->>'filename', metadata->>'document_file_id'
-            ORDER BY MAX(created_at) DESC
-        """)
-        rows = cursor.fetchall()
+        # 데이터베이스에서 문서 목록 조회 (document_files: 문서 수에 비례, 청크 스캔 없음)
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT filename, id, chunk_count, created_at
+                FROM document_files
+                ORDER BY created_at DESC
+            """)
+            rows = cursor.fetchall()
         
         # 결과를 문서 객체로 변환
         documents = []
         for r in rows:
-            try:
-                doc_id = int(r[1]) if r[1] and str(r[1]).strip() else None
-            except (ValueError, TypeError):
-                doc_id = None
-            
             documents.append({
-                "id": doc_id,
+                "id": r[1],
                 "title": r[0] or "Untitled",
                 "chunk_count": r[2],
                 "created_at": r[3].isoformat() if r[3] else None
@@ -139,13 +229,176 @@ async def get_documents():
         error_msg = f"{str(e)}\n{traceback.format_exc()}"
         print(f"Error in get_documents: {error_msg}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================
+# RAG 단계별 함수
+# ============================================
+
+_llm = None
+
+
+def get_llm():
+    """답변 생성용 ChatBedrock (프로세스당 1개 재사용)"""
+    global _llm
+    if _llm is None:
+        from langchain_aws import ChatBedrock
+        _llm = ChatBedrock(
+            client=get_bedrock_client(),
+            model_id="anthropic.claude-3-haiku-20240307-v1:0",
+            model_kwargs={
+                "max_tokens": 2000,
+                "temperature": 0.1
+            }
+        )
+    return _llm
+
+
+def request_scope(request: ChatRequest) -> str:
+    """답변 캐시 범위 - 검색 설정(ef_search, probes, 검색 모드와 하이브리드 설정)이 같은 요청끼리만 재사용"""
+    return answer_scope(ef_search=request.ef_search, probes=request.probes, hybrid=request.hybrid_params())
+
+
+async def lookup_cached_answer(request: ChatRequest):
+    """
+    시맨틱 답변 캐시 조회
+    
+    같은 검색 설정으로 답한 이전 질문 중 질의 임베딩이 가장 비슷한 것이
+    ANSWER_CACHE_THRESHOLD 이상이고 그 사이 코퍼스 버전이 바뀌지 않았다면 이전 답변을 반환합니다.
+    (이 서버의 답변은 대화 기록을 사용하지 않으므로 세션은 범위에 넣지 않습니다.)
+    
+    Returns:
+        tuple: (질의 임베딩, 코퍼스 버전, (캐시 항목, 유사도) 또는 None)
+    """
+    query_embedding = await embed_query(request.query)
+    version = await get_corpus_version().aget(get_async_pool())
+    return query_embedding, version, get_answer_cache().lookup(query_embedding, version, request_scope(request))
+
+
+async def retrieve_sources(request: ChatRequest, query_embedding: Optional[List[float]] = None,
+                           timings: Optional[dict] = None):
+    """
+    질문 임베딩 → 유사 문서 검색 → 참고 문서 정리
+    
+    retrieval_mode가 hybrid면 벡터 + 어휘 검색을 한 SQL 문에서 실행해 RRF로 합칩니다.
+    후보는 임계값/MMR/이웃 청크 제외 후처리로 3개를 고릅니다 (common/postprocess.py).
+    timings(dict)를 넘기면 단계별 검색 시간(vector_ms, lexical_ms, search_ms, postprocess_ms)을 채웁니다.
+    
+    Returns:
+        tuple: (LLM에 넘길 문서 내용, Source 목록)
+    """
+    timings = {} if timings is None else timings
+    hybrid = request.hybrid_params()
+    # ============================================
+    # 1단계: 질문 임베딩 생성 (캐시 우선)
+    # ============================================
+    if query_embedding is None:
+        query_embedding = await embed_query(request.query)
+    # float32 배열은 pgvector 바이너리 형식으로 전송 (common/pgvector_codec.py)
+    query_vector = as_float32(query_embedding)
+    
+    # ============================================
+    # 2단계: 유사한 문서 검색 (후보 → 후처리로 상위 3개)
+    # ============================================
+    started = time.perf_counter()
+    post = resolve_postprocess()
+    fetch = post.fetch_count(3)
+    # VECTOR_REPLICA가 켜져 있고 최신이면 인메모리 정확 검색 (common/replica.py), 아니면 SQL
+    replica = get_vector_replica()
+    use_replica = hybrid is None and replica.enabled and \
+        replica.fresh(await get_corpus_version().aget(get_async_pool()))
+    # VECTOR_STORAGE가 halfvec/binary면 양자화 인덱스 후보를 full 벡터로 재정렬 (common/quantization.py)
+    ef_search = search_ef(request.ef_search, hybrid.vector_candidates if hybrid is not None else fetch)
+    async with get_async_pool().connection() as conn, \
+            asearch_params(conn, ef_search, request.probes):
+        if hybrid is not None:
+            rows, leg_timings = await ahybrid_search(conn, query_vector, request.query, fetch, hybrid)
+            timings.update(leg_timings)
+            layout = HYBRID_LAYOUT
+        elif use_replica:
+            rows = await replica.candidates(conn, query_vector, fetch, post.needs_vectors)
+            timings["vector_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            timings["replica"] = True
+            layout = VECTOR_LAYOUT
+        else:
+            # 벡터 테이블에서 후보를 구하고 본문만 조인 (common/vector_table.py, common/postprocess.py)
+            cursor = await conn.execute(candidate_sql(post), {
+                "embedding": query_vector,
+                "k": fetch,
+                "candidates": rescore_candidates(fetch)
+            }, binary=True)
+            
+            rows = await cursor.fetchall()
+            timings["vector_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            layout = VECTOR_LAYOUT
+    timings["search_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    for leg in ("vector_ms", "lexical_ms"):
+        if leg in timings:
+            record_latency(f"retrieval.{leg[:-3]}", timings[leg])
+    # 임계값, MMR, 이웃 청크 제외 (후보 행렬 단위 연산)
+    post_started = time.perf_counter()
+    results = [(row[0], row[1]) for row, _ in postprocess_rows(rows, 3, post, **layout)]
+    timings["postprocess_ms"] = round((time.perf_counter() - post_started) * 1000, 2)
+    
+    # ============================================
+    # 3단계: 참고 문서 처리
+    # ============================================
+    context_text = "\n".join([r[0] or "" for r in results])
+    sources = []
     
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    for r in results:
+        content, metadata = r
+        
+        # 메타데이터 파싱
+        if metadata:
+            try:
+                meta_dict = json.loads(metadata) if isinstance(metadata, str) else metadata
+                page = meta_dict.get("page", 0)
+                doc_title = meta_dict.get("filename", meta_dict.get("title", "Unknown"))
+            except (json.JSONDecodeError, AttributeError, TypeError):
+                page = 0
+                doc_title = "Unknown"
+        else:
+            page = 0
+            doc_title = "Unknown"
+        
+        # Source 객체 생성
+        sources.append(Source(
+            content=(content or "")[:200],
+            page=page,
+            document_title=doc_title
+        ))
+    
+    return context_text, sources
+
+
+def build_prompt(context_text: str, query: str):
+    """문서 내용과 질문으로 LLM 입력 메시지 구성"""
+    from langchain_core.messages import HumanMessage
+    prompt = f"문서 내용:\n{context_text}\n\n질문: {query}\n\n답변:"
+    return [HumanMessage(content=prompt)]
+
+
+def content_text(content) -> str:
+    """LLM 응답 content(문자열 또는 content block 리스트)에서 텍스트 추출"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    return str(content)
+
 
+def sse_event(event: str, data: dict) -> str:
+    """Server-Sent Events 형식 메시지"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# ============================================
+# 채팅 엔드포인트
+# ============================================
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
@@ -153,111 +406,127 @@ async def chat(request: ChatRequest):
     사용자 질문에 대한 답변 반환
     
     1. 질문을 임베딩으로 변환
-    2. 유사한 문서 검색
-    3. LLM을 통해 답변 생성
+    2. 비슷한 질문의 답변이 캐시에 있으면 바로 반환
+    3. 유사한 문서 검색
+    4. LLM을 통해 답변 생성
     
     Args:
-        request: ChatRequest (query, session_id)
+        request: ChatRequest (query, session_id, ef_search, probes, retrieval_mode 등 검색 설정)
         
     Returns:
-        ChatResponse: 답변 및 참고 문서
+        ChatResponse: 답변, 참고 문서, 캐시 여부
     """
-    conn = None
-    cursor = None
     try:
-        from langchain_aws import ChatBedrock, BedrockEmbeddings
-        from langchain_core.messages import HumanMessage
-        
-        # AWS Bedrock 클라이언트 초기화
-        bedrock_client = boto3.client(
-            "bedrock-runtime",
-            region_name="us-east-1"
-        )
-        
-        # ============================================
-        # 1단계: 질문 임베딩 생성
-        # ============================================
-        embeddings = BedrockEmbeddings(
-            client=bedrock_client,
-            model_id="amazon.titan-embed-text-v1"
-        )
-        query_embedding = embeddings.embed_query(request.query)
-        embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
-        
-        # ============================================
-        # 2단계: 유사한 문서 검색 (상위 3개)
-        # ============================================
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT content, metadata FROM documents
-            ORDER BY embedding <=> %s::vector LIMIT 3
-        """, (embedding_str,))
-        
-        results = cursor.fetchall()
-        
-        # ============================================
-        # 3단계: 참고 문서 처리
-        # ============================================
-        context_text = "\n".join([r[0] or "" for r in results])
-        sources = []
+        request.hybrid_params()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        query_embedding, version, cached = await lookup_cached_answer(request)
+        if cached is not None:
+            entry, _ = cached
+            return ChatResponse(response=entry["response"], sources=entry["sources"], cached=True)
         
-        for r in results:
-            content, metadata = r
-            
-            # 메타데이터 파싱
-            if metadata:
-                try:
-                    meta_dict = json.loads(metadata) if isinstance(metadata, str) else metadata
-                    page = meta_dict.get("page", 0)
-                    doc_title = meta_dict.get("filename", meta_dict.get("title", "Unknown"))
-                except (json.JSONDecodeError, AttributeError, TypeError):
-                    page = 0
-                    doc_title = "Unknown"
-            else:
-                page = 0
-                doc_title = "Unknown"
-            
-            # Source 객체 생성
-            sources.append(Source(
-                content=(content or "")[:200],
-                page=page,
-                document_title=doc_title
-            ))
+        search_timings = {}
+        context_text, sources = await retrieve_sources(request, query_embedding, search_timings)
         
         # ============================================
         # 4단계: LLM을 통해 답변 생성
         # ============================================
-        llm = ChatBedrock(
-            client=bedrock_client,
-            model_id="anthropic.claude-3-haiku-20240307-v1:0",
-            model_kwargs={
-                "max_tokens": 2000,
-                "temperature": 0.1
-            }
-        )
-        
-        # 프롬프트 구성
-        prompt = f"문서 내용:\n{context_text}\n\n질문: {request.query}\n\n답변:"
-        
-        # LLM 호출
-        response = llm.invoke([HumanMessage(content=prompt)])
-        response_text = response.content if isinstance(response.content, str) else str(response.content)
+        response = await get_llm().ainvoke(build_prompt(context_text, request.query))
+        response_text = content_text(response.content)
         
-        return ChatResponse(response=response_text, sources=sources)
+        get_answer_cache().store(
+            query_embedding, version, {"response": response_text, "sources": sources}, request_scope(request)
+        )
+        return ChatResponse(response=response_text, sources=sources, search_metrics=search_timings)
     
     except Exception as e:
         import traceback
         error_msg = f"{str(e)}\n{traceback.format_exc()}"
         print(f"Error in chat: {error_msg}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    /api/chat 의 Server-Sent Events 버전
+    
+    이벤트 순서:
+        references  참고 문서 목록 (검색 직후)
+        token       생성되는 답변 조각 (여러 번)
+        done        전체 답변, 캐시 여부, 지연 시간 지표 (retrieval_ms, ttft_ms, total_ms,
+                    search: 단계별 검색 시간 vector_ms / lexical_ms)
+        error       처리 중 오류
+    
+    Args:
+        request: ChatRequest (query, session_id, ef_search, probes, retrieval_mode 등 검색 설정)
+        
+    Returns:
+        StreamingResponse: text/event-stream
+    """
+    async def event_stream():
+        started = time.perf_counter()
+        try:
+            query_embedding, version, cached = await lookup_cached_answer(request)
+            if cached is not None:
+                # 캐시 적중: 저장된 답변을 토큰 이벤트 하나로 전송
+                entry, similarity = cached
+                total_ms = (time.perf_counter() - started) * 1000
+                record_latency("chat.cached", total_ms)
+                yield sse_event("references", {"sources": [source.dict() for source in entry["sources"]]})
+                yield sse_event("token", {"content": entry["response"]})
+                yield sse_event("done", {
+                    "response": entry["response"],
+                    "cached": True,
+                    "cache_similarity": round(similarity, 4),
+                    "metrics": {"retrieval_ms": None, "ttft_ms": round(total_ms, 2), "total_ms": round(total_ms, 2)}
+                })
+                return
+            
+            search_timings = {}
+            context_text, sources = await retrieve_sources(request, query_embedding, search_timings)
+            retrieval_ms = (time.perf_counter() - started) * 1000
+            yield sse_event("references", {"sources": [source.dict() for source in sources]})
+            
+            parts = []
+            ttft_ms = None
+            async for chunk in get_llm().astream(build_prompt(context_text, request.query)):
+                text = content_text(chunk.content)
+                if not text:
+                    continue
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                    record_latency("chat.ttft", ttft_ms)
+                parts.append(text)
+                yield sse_event("token", {"content": text})
+            
+            total_ms = (time.perf_counter() - started) * 1000
+            record_latency("chat.total", total_ms)
+            metrics = {
+                "retrieval_ms": round(retrieval_ms, 2),
+                "ttft_ms": round(ttft_ms, 2) if ttft_ms is not None else None,
+                "total_ms": round(total_ms, 2),
+                "search": search_timings
+            }
+            print(f"[stream] session={request.session_id} ttft_ms={metrics['ttft_ms']} total_ms={metrics['total_ms']}")
+            response_text = "".join(parts)
+            get_answer_cache().store(
+                query_embedding, version, {"response": response_text, "sources": sources}, request_scope(request)
+            )
+            yield sse_event("done", {"response": response_text, "cached": False, "metrics": metrics})
+        
+        except Exception as e:
+            import traceback
+            print(f"Error in chat_stream: {str(e)}\n{traceback.format_exc()}")
+            yield sse_event("error", {"message": str(e)})
     
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.delete("/api/chat-history/{session_id}")
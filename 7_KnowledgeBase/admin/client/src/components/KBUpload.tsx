@@ -1,10 +1,10 @@
 import { useState } from 'react';
-import { KnowledgeBase, KBUploadRequest, IngestStatusResponse } from '../types';
+import { KnowledgeBase, KBUploadRequest, KBUploadResponse, IngestStatusResponse } from '../types';
 import '../styles/DocumentUpload.css';
 
 interface KBUploadProps {
   kbs: KnowledgeBase[];
-  onUpload: (data: KBUploadRequest) => Promise<{ job_id: string; kb_id: string; ds_id: string }>;
+  onUpload: (data: KBUploadRequest) => Promise<KBUploadResponse>;
   checkStatus: (kbId: string, dsId: string, jobId: string) => Promise<IngestStatusResponse>;
   isLoading: boolean;
 }
@@ -38,13 +38,19 @@ export const KBUpload: React.FC<KBUploadProps> = ({
 
     try {
       setMessage({ text: 'S3 업로드 및 동기화 요청 중...', type: 'info' });
-      const { job_id, kb_id, ds_id } = await onUpload({
+      const { job_id, kb_id, ds_id, duplicate } = await onUpload({
         kb_id: selectedKB.kb_id,
         ds_id: selectedKB.ds_id,
         bucket: selectedKB.bucket,
         file
       });
 
+      if (duplicate || !job_id) {
+        setMessage({ text: '동일한 파일이 이미 업로드되어 있어 동기화를 생략했습니다', type: 'info' });
+        setFile(null);
+        return;
+      }
+
       setIngestStatus('STARTING');
       pollStatus(kb_id, ds_id, job_id);
     } catch {
@@ -22,9 +22,11 @@ export interface KBUploadRequest {
 }
 
 export interface KBUploadResponse {
-  job_id: string;
+  job_id: string | null;
   kb_id: string;
   ds_id: string;
+  duplicate?: boolean;
+  sha256?: string;
 }
 
 export interface IngestStatusResponse {
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import boto3
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
@@ -7,8 +8,14 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict
 from langchain_aws import ChatBedrock
 from langchain_core.messages import HumanMessage
-from langchain_core.chat_history import InMemoryChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
+from pathlib import Path
+
+# 대화 기록 저장소/스트리밍 업로드는 6_RAG_pipeline/common 모듈을 함께 사용
+# 저장소 전체 체크아웃이 필요 (단독 배포 시 common/ 복사, 7_KnowledgeBase/README.md 참고)
+sys.path.append(str(Path(__file__).parent.parent.parent.parent / '6_RAG_pipeline'))
+from common.session_store import SessionStore
+from common.uploads import stream_upload, get_object_sha256, UploadTooLarge
 
 app = FastAPI(
     title="Knowledge Base Admin API",
@@ -149,12 +156,11 @@ class KBChatbot:
                 "temperature": 0.1
             }
         )
-        self.chat_histories = {}
+        # 세션 수/길이 상한과 만료가 있는 대화 기록 저장소 (SESSION_* 환경 변수)
+        self.session_store = SessionStore.from_env()
 
     def get_session_history(self, session_id):
-        if session_id not in self.chat_histories:
-            self.chat_histories[session_id] = InMemoryChatMessageHistory()
-        return self.chat_histories[session_id]
+        return self.session_store.get_session_history(session_id)
 
     def retrieve_from_kb(self, query: str, kb_ids: List[str], k: int = 3) -> List[Dict]:
         """KB에서 검색 결과 가져오기"""
@@ -222,8 +228,7 @@ class KBChatbot:
         # 대화 기록 관리
         conversation = RunnableWithMessageHistory(
             self.llm,
-            self.get_session_history,
-            max_history=3
+            self.get_session_history
         ).with_config(configurable={"session_id": session_id})
         
         # 프롬프트 구성
@@ -299,22 +304,38 @@ async def upload_and_sync(
     bucket: str = Form(...),
     file: UploadFile = File(...)
 ):
-    """파일 업로드 및 동기화"""
+    """파일 업로드 및 동기화 (파트 단위 스트리밍, 크기 제한, 같은 내용이면 동기화 생략)"""
     try:
         s3 = get_s3_client()
         agent_client = get_bedrock_agent_client()
         
-        # 1. S3 업로드
-        file_content = await file.read()
+        # 1. S3 업로드 (같은 키에 같은 내용(sha256 태그)이 있으면 업로드하지 않음)
         target_key = file.filename
         
-        s3.put_object(
-            Bucket=bucket,
-            Key=target_key,
-            Body=file_content,
-            ContentType="application/pdf"
+        async def find_duplicate(sha256):
+            if await get_object_sha256(s3, bucket, target_key) == sha256:
+                return {"s3_key": target_key}
+            return None
+        
+        result = await stream_upload(
+            file, s3, bucket, target_key,
+            content_type="application/pdf",
+            find_duplicate=find_duplicate
         )
         
+        if result.duplicate is not None:
+            return ApiResponse(
+                status="success",
+                message="동일한 파일이 이미 업로드되어 있어 동기화를 생략했습니다",
+                data={
+                    "job_id": None,
+                    "kb_id": kb_id,
+                    "ds_id": ds_id,
+                    "duplicate": True,
+                    "sha256": result.sha256
+                }
+            )
+        
         # 2. Ingestion Job 시작
         response = agent_client.start_ingestion_job(
             knowledgeBaseId=kb_id, 
@@ -328,9 +349,13 @@ async def upload_and_sync(
             data={
                 "job_id": job_id,
                 "kb_id": kb_id,
-                "ds_id": ds_id
+                "ds_id": ds_id,
+                "duplicate": False,
+                "sha256": result.sha256
             }
         )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -379,8 +404,7 @@ async def chat(request: ChatRequest):
 async def clear_chat_history(session_id: str):
     """대화 기록 초기화"""
     try:
-        if session_id in kb_chatbot.chat_histories:
-            kb_chatbot.chat_histories[session_id].clear()
+        kb_chatbot.session_store.clear(session_id)
         return ApiResponse(
             status="success",
             message="대화 기록이 초기화되었습니다."
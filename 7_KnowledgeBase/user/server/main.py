@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import boto3
 from fastapi import FastAPI, HTTPException
@@ -7,8 +8,13 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict
 from langchain_aws import ChatBedrock
 from langchain_core.messages import HumanMessage
-from langchain_core.chat_history import InMemoryChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
+from pathlib import Path
+
+# 대화 기록 저장소는 6_RAG_pipeline/common 모듈을 함께 사용
+# 저장소 전체 체크아웃이 필요 (단독 배포 시 common/ 복사, 7_KnowledgeBase/README.md 참고)
+sys.path.append(str(Path(__file__).parent.parent.parent.parent / '6_RAG_pipeline'))
+from common.session_store import SessionStore
 
 app = FastAPI(
     title="Knowledge Base User API",
@@ -103,12 +109,11 @@ class KBChatbot:
                 "temperature": 0.1
             }
         )
-        self.chat_histories = {}
+        # 세션 수/길이 상한과 만료가 있는 대화 기록 저장소 (SESSION_* 환경 변수)
+        self.session_store = SessionStore.from_env()
 
     def get_session_history(self, session_id):
-        if session_id not in self.chat_histories:
-            self.chat_histories[session_id] = InMemoryChatMessageHistory()
-        return self.chat_histories[session_id]
+        return self.session_store.get_session_history(session_id)
 
     def retrieve_from_kb(self, query: str, kb_ids: List[str], k: int = 3) -> List[Dict]:
         """KB에서 검색 결과 가져오기"""
@@ -161,8 +166,7 @@ class KBChatbot:
         context = "\n\n".join(context_parts)
         conversation = RunnableWithMessageHistory(
             self.llm,
-            self.get_session_history,
-            max_history=3
+            self.get_session_history
         ).with_config(configurable={"session_id": session_id})
         
         prompt_content = f"""문서 내용을 바탕으로 질문에 답하세요.
@@ -216,8 +220,7 @@ async def chat(request: ChatRequest):
 @app.delete("/api/chat-history/{session_id}")
 async def clear_chat_history(session_id: str):
     """대화 기록 초기화"""
-    if session_id in kb_chatbot.chat_histories:
-        kb_chatbot.chat_histories[session_id].clear()
+    kb_chatbot.session_store.clear(session_id)
     return ApiResponse(
         status="success",
         message="대화 기록이 초기화되었습니다."
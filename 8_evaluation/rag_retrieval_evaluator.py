@@ -10,6 +10,7 @@ RAG 검색 품질 평가 스크립트
 """
 
 import os
+import sys
 import time
 import boto3
 import pandas as pd
@@ -18,6 +19,7 @@ import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 from dotenv import load_dotenv
 from typing import List, Dict
+from pathlib import Path
 
 # LangChain imports
 from langchain_aws import BedrockEmbeddings, ChatBedrock
@@ -25,6 +27,13 @@ from langchain_community.vectorstores import Chroma
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain.text_splitter import CharacterTextSplitter
 
+# 6_RAG_pipeline/common 의 문서 임베딩 저장소 사용 (수집 Lambda, 5_RAG와 공유)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "6_RAG_pipeline"))
+from common.embedding_store import EmbeddingStore, StoreBackedEmbeddings
+from common.quantization import rescore_candidates
+from common.vector_table import top_k_sql
+from common.pgvector_codec import VectorParam, register_vector_psycopg2
+
 # RAGAS imports
 from datasets import Dataset
 from ragas import evaluate
@@ -88,9 +97,14 @@ class ChromaDBRetriever:
 
     def __init__(self, pdf_path: str = None, vector_db_path: str = None):
         self.bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")
-        self.embeddings = BedrockEmbeddings(
-            client=self.bedrock_client, 
-            model_id="amazon.titan-embed-text-v1"
+        # 벡터 스토어를 다시 만들 때도 저장소에 있는 청크는 Bedrock을 호출하지 않음
+        self.embedding_store = EmbeddingStore.from_env()
+        self.embeddings = StoreBackedEmbeddings(
+            BedrockEmbeddings(
+                client=self.bedrock_client,
+                model_id="amazon.titan-embed-text-v1"
+            ),
+            self.embedding_store
         )
 
         if pdf_path and vector_db_path:
@@ -167,7 +181,9 @@ class PostgreSQLRetriever:
 
     def _get_connection(self):
         import psycopg2
-        return psycopg2.connect(**self.db_config)
+        conn = psycopg2.connect(**self.db_config)
+        register_vector_psycopg2(conn)
+        return conn
 
     def retrieve(self, query: str, k: int = 3) -> List[str]:
         """검색 수행"""
@@ -177,12 +193,12 @@ class PostgreSQLRetriever:
             conn = self._get_connection()
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT content
-                FROM documents
-                ORDER BY embedding <=> %s::vector
-                LIMIT %s;
-            """, (query_embedding, k))
+            # 서버와 같은 검색 (벡터 테이블 top-k → 본문 조인, VECTOR_STORAGE 반영)
+            cursor.execute(top_k_sql(["content"]), {
+                "embedding": VectorParam(query_embedding),
+                "k": k,
+                "candidates": rescore_candidates(k)
+            })
 
             results = cursor.fetchall()
             cursor.close()